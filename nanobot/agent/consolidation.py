@@ -0,0 +1,293 @@
+"""Consolidation scheduler: single-flight, debounced memory consolidation jobs."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+from loguru import logger
+
+from nanobot.utils.writer import GroupCommitWriter
+
+# Runner signature: (session_key, archived_messages or None) -> None
+ConsolidationRunner = Callable[[str, list[dict[str, Any]] | None], Awaitable[None]]
+
+# Steady triggers postpone a job by at most this many debounce windows
+_DEBOUNCE_MAX_WINDOWS = 5
+# Upper bound for the backoff between attempts of a failed job
+_RETRY_MAX_S = 600.0
+
+
+@contextlib.asynccontextmanager
+async def _file_lock(path: Path, poll_s: float = 0.05) -> AsyncIterator[None]:
+    """Exclusive lock shared with other processes (flock; a no-op where unavailable)."""
+    try:
+        import fcntl
+    except ImportError:  # Windows: no multi-process gateway there
+        yield
+        return
+    with open(path, "a") as f:
+        # Poll instead of blocking in a thread, so cancellation never leaks a held lock
+        while True:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                await asyncio.sleep(poll_s)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class ConsolidationScheduler:
+    """
+    Schedules memory consolidation jobs per session.
+
+    - At most one job runs per session; triggers that arrive while a job is
+      queued or running are coalesced into a single follow-up run.
+    - Triggers are debounced so a burst of messages causes one job; a
+      steadily busy session still runs after a bounded number of windows.
+    - A global semaphore caps concurrent jobs in this process. MEMORY.md is
+      shared by every session and every worker process, so with lock_path
+      set each job also holds an exclusive file lock around its
+      read-modify-write.
+    - Pending work is persisted to a JSON file and resumed after a restart.
+      The file is rewritten only when the queued work changes, and with a
+      writer the write happens on its background thread.
+      Each process needs its own state_path; with owns set, resume() only
+      picks up the sessions this process writes.
+    - A failed job keeps its unfinished work queued (and persisted) and is
+      retried with exponential backoff; after max_attempts failures in a
+      row it is dropped with an error log.
+
+    Two kinds of work are tracked per session: a "window" job (consolidate
+    the session's unconsolidated slice) and "archives" (message snapshots
+    taken by /new before the session was cleared).
+    """
+
+    def __init__(
+        self,
+        runner: ConsolidationRunner,
+        state_path: Path,
+        max_concurrent: int = 1,
+        debounce_s: float = 2.0,
+        lock_path: Path | None = None,
+        owns: Callable[[str], bool] | None = None,
+        max_attempts: int = 3,
+        retry_delay_s: float = 30.0,
+        writer: GroupCommitWriter | None = None,
+    ):
+        self._runner = runner
+        self.state_path = state_path
+        self.lock_path = lock_path
+        self.owns = owns
+        self.debounce_s = debounce_s
+        self.max_attempts = max(1, max_attempts)
+        self.retry_delay_s = retry_delay_s
+        self.writer = writer
+        self._slots = asyncio.Semaphore(max(1, max_concurrent))
+        self._pending: dict[str, dict[str, Any]] = {}
+        self._tasks: dict[str, asyncio.Task[None]] = {}
+        self._wakeups: dict[str, asyncio.Event] = {}
+        self._inflight: dict[str, dict[str, Any]] = {}
+        self._completed = 0
+        self._failed = 0
+        self._dropped = 0
+        self._attempts: dict[str, int] = {}  # consecutive failures per session
+        self._total_duration = 0.0
+        self._recent: deque[dict[str, Any]] = deque(maxlen=50)  # latest job timings
+
+    def schedule(self, key: str, archive: list[dict[str, Any]] | None = None) -> None:
+        """
+        Request consolidation for a session.
+
+        Args:
+            key: Session key.
+            archive: Messages to archive in full (from /new); None consolidates
+                the live session's unconsolidated slice.
+        """
+        job = self._pending.setdefault(key, {"window": False, "archives": []})
+        if archive:
+            job["archives"].append(archive)
+            self._save_state()
+        elif archive is None and not job["window"]:
+            job["window"] = True
+            self._save_state()
+
+        if key in self._tasks:
+            self._wakeups[key].set()  # restart the debounce window
+        else:
+            self._wakeups[key] = asyncio.Event()
+            self._tasks[key] = asyncio.create_task(self._worker(key))
+
+    def resume(self) -> int:
+        """Re-schedule jobs persisted by a previous process. Returns the count."""
+        if not self.state_path.exists():
+            return 0
+        try:
+            data = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable consolidation queue: {e}")
+            return 0
+        jobs = data.get("jobs", {})
+        if self.owns is not None:
+            foreign = [key for key in jobs if not self.owns(key)]
+            if foreign:
+                logger.warning(f"Skipping {len(foreign)} consolidation job(s) owned by another process")
+            jobs = {key: job for key, job in jobs.items() if key not in foreign}
+        for key, job in jobs.items():
+            for archive in job.get("archives", []):
+                self.schedule(key, archive=archive)
+            if job.get("window"):
+                self.schedule(key)
+        if jobs:
+            logger.info(f"Resumed {len(jobs)} pending consolidation job(s)")
+        return len(jobs)
+
+    async def _worker(self, key: str) -> None:
+        """Debounce, then drain this session's pending work one job at a time."""
+        wakeup = self._wakeups[key]
+        try:
+            while key in self._pending:
+                # Debounce: wait until no new trigger arrives for debounce_s (bounded)
+                deadline = time.monotonic() + self.debounce_s * _DEBOUNCE_MAX_WINDOWS
+                while True:
+                    wakeup.clear()
+                    timeout = min(self.debounce_s, deadline - time.monotonic())
+                    if timeout <= 0:
+                        break
+                    try:
+                        await asyncio.wait_for(wakeup.wait(), timeout=timeout)
+                    except asyncio.TimeoutError:
+                        break
+                retry_in = None
+                async with self._slots:
+                    job = self._inflight[key] = self._pending.pop(key)
+                    try:
+                        if await self._run_job(key, job):
+                            self._attempts.pop(key, None)
+                        else:
+                            retry_in = self._failed_job(key, job)
+                    except asyncio.CancelledError:
+                        self._requeue(key, job)  # stays persisted for resume()
+                        raise
+                    finally:
+                        self._inflight.pop(key, None)
+                        self._save_state()
+                if retry_in is not None:
+                    await asyncio.sleep(retry_in)
+        finally:
+            self._tasks.pop(key, None)
+            self._wakeups.pop(key, None)
+
+    async def _run_job(self, key: str, job: dict[str, Any]) -> bool:
+        """Run a job, removing each part from it as it succeeds. Returns False on failure."""
+        start = time.monotonic()
+        ok = False
+        try:
+            async with self._locked():
+                while job["archives"]:
+                    await self._runner(key, job["archives"][0])
+                    job["archives"].pop(0)
+                if job["window"]:
+                    await self._runner(key, None)
+                    job["window"] = False
+            ok = True
+            self._completed += 1
+        except Exception as e:
+            self._failed += 1
+            logger.error(f"Consolidation job for {key} failed: {e}")
+        finally:
+            duration = time.monotonic() - start
+            self._total_duration += duration
+            self._recent.append({"session": key, "duration_s": round(duration, 3), "ok": ok})
+            logger.debug(f"Consolidation job for {key} took {duration:.2f}s")
+        return ok
+
+    def _requeue(self, key: str, job: dict[str, Any]) -> None:
+        """Put a job's unfinished work back, ahead of triggers that arrived meanwhile."""
+        pending = self._pending.setdefault(key, {"window": False, "archives": []})
+        pending["archives"] = job["archives"] + pending["archives"]
+        pending["window"] = pending["window"] or job["window"]
+
+    def _failed_job(self, key: str, job: dict[str, Any]) -> float | None:
+        """Requeue a failed job for a retry; returns the backoff, or None once it is dropped."""
+        attempts = self._attempts.get(key, 0) + 1
+        if attempts >= self.max_attempts:
+            self._attempts.pop(key, None)
+            self._dropped += 1
+            logger.error(
+                f"Dropping consolidation job for {key} after {attempts} failed attempts: "
+                f"{len(job['archives'])} archived snapshot(s) will never reach memory"
+                + (" and the session window stays unconsolidated" if job["window"] else "")
+            )
+            return None
+        self._attempts[key] = attempts
+        self._requeue(key, job)
+        delay = min(_RETRY_MAX_S, self.retry_delay_s * 2 ** (attempts - 1))
+        logger.warning(f"Retrying consolidation job for {key} in {delay:.0f}s (attempt {attempts + 1}/{self.max_attempts})")
+        return delay
+
+    def _locked(self):
+        if self.lock_path is None:
+            return contextlib.nullcontext()
+        return _file_lock(self.lock_path)
+
+    def _save_state(self) -> None:
+        """Persist pending and in-flight work so a restart does not drop it."""
+        jobs: dict[str, dict[str, Any]] = {}
+        for source in (self._inflight, self._pending):
+            for key, job in source.items():
+                merged = jobs.setdefault(key, {"window": False, "archives": []})
+                merged["window"] = merged["window"] or job["window"]
+                merged["archives"] = merged["archives"] + job["archives"]
+        if self.writer is not None:
+            try:
+                # Keyed by path: only the latest snapshot of a queued burst is written
+                self.writer.submit(self._commit_state, (self.state_path, jobs), key=self.state_path)
+                return
+            except RuntimeError:
+                pass  # writer already closed at shutdown: write in place
+        self._commit_state([(self.state_path, jobs)])
+
+    @staticmethod
+    def _commit_state(snapshots: list[tuple[Path, dict[str, dict[str, Any]]]]) -> None:
+        for path, jobs in snapshots:
+            try:
+                if not jobs:
+                    path.unlink(missing_ok=True)
+                    continue
+                tmp = path.with_suffix(".tmp")
+                tmp.write_text(json.dumps({"jobs": jobs}, ensure_ascii=False), encoding="utf-8")
+                tmp.replace(path)
+            except OSError as e:
+                logger.warning(f"Failed to persist consolidation queue: {e}")
+
+    async def drain(self) -> None:
+        """Wait until all scheduled jobs have finished."""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks.values()), return_exceptions=True)
+
+    @property
+    def queue_depth(self) -> int:
+        """Sessions with consolidation work waiting to run."""
+        return len(self._pending)
+
+    def metrics(self) -> dict[str, Any]:
+        """Queue depth, in-flight count, outcomes and job durations."""
+        finished = self._completed + self._failed
+        return {
+            "queued": self.queue_depth,
+            "running": len(self._inflight),
+            "completed": self._completed,
+            "failed": self._failed,
+            "dropped": self._dropped,
+            "avg_duration_s": round(self._total_duration / finished, 3) if finished else 0.0,
+            "recent_jobs": list(self._recent),
+        }
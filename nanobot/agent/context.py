@@ -8,6 +8,8 @@ from typing import Any
 
 from nanobot.agent.memory import MemoryStore
 from nanobot.agent.skills import SkillsLoader
+from nanobot.utils.helpers import file_signature
+from nanobot.utils.writer import GroupCommitWriter
 
 
 class ContextBuilder:
@@ -20,21 +22,50 @@ class ContextBuilder:
     
     BOOTSTRAP_FILES = ["AGENTS.md", "SOUL.md", "USER.md", "TOOLS.md", "IDENTITY.md"]
     
-    def __init__(self, workspace: Path):
+    def __init__(self, workspace: Path, writer: GroupCommitWriter | None = None):
         self.workspace = workspace
-        self.memory = MemoryStore(workspace)
+        self.memory = MemoryStore(workspace, writer=writer)
         self.skills = SkillsLoader(workspace)
+        # (fingerprint, prompt) of the last assembled static prompt
+        self._prompt_cache: tuple[tuple, str] | None = None
     
     def build_system_prompt(self, skill_names: list[str] | None = None) -> str:
         """
         Build the system prompt from bootstrap files, memory, and skills.
         
+        The prompt is cached and only reassembled when one of its input files
+        changes. It holds no per-request data, so it stays byte-stable and
+        forms the cacheable prefix for provider prompt caching.
+        
         Args:
             skill_names: Optional list of skills to include.
         
         Returns:
             Complete system prompt.
         """
+        return self._get_static_prompt(skill_names)
+    
+    def _input_fingerprint(self, skill_names: list[str] | None) -> tuple:
+        """Stat-based key over every input of the static prompt."""
+        files = [self.workspace / f for f in self.BOOTSTRAP_FILES] + [self.memory.memory_file]
+        return (
+            tuple(skill_names or ()),
+            tuple(file_signature(f) for f in files),
+            self.skills.fingerprint(),
+        )
+    
+    def _get_static_prompt(self, skill_names: list[str] | None = None) -> str:
+        """Return the cached static prompt, rebuilding it if any input changed."""
+        key = self._input_fingerprint(skill_names)
+        if self._prompt_cache and self._prompt_cache[0] == key:
+            return self._prompt_cache[1]
+        prompt = self._build_static_prompt(skill_names)
+        # Re-key after building: requirement checks may have widened the fingerprint
+        self._prompt_cache = (self._input_fingerprint(skill_names), prompt)
+        return prompt
+    
+    def _build_static_prompt(self, skill_names: list[str] | None = None) -> str:
+        """Assemble identity, bootstrap files, memory and skills (no volatile data)."""
         parts = []
         
         # Core identity
@@ -70,12 +101,16 @@ Skills with available="false" need dependencies installed first - you can try in
         
         return "\n\n---\n\n".join(parts)
     
-    def _get_identity(self) -> str:
-        """Get the core identity section."""
+    def _get_time_line(self) -> str:
+        """Get the current-time line (volatile: sent with the user turn, never cached)."""
         from datetime import datetime
         import time as _time
         now = datetime.now().strftime("%Y-%m-%d %H:%M (%A)")
         tz = _time.strftime("%Z") or "UTC"
+        return f"[Current time: {now} ({tz})]"
+    
+    def _get_identity(self) -> str:
+        """Get the core identity section."""
         workspace_path = str(self.workspace.expanduser().resolve())
         system = platform.system()
         runtime = f"{'macOS' if system == 'Darwin' else system} {platform.machine()}, Python {platform.python_version()}"
@@ -89,9 +124,6 @@ You are nanobot, a helpful AI assistant. You have access to tools that allow you
 - Send messages to users on chat channels
 - Spawn subagents for complex background tasks
 
-## Current Time
-{now} ({tz})
-
 ## Runtime
 {runtime}
 
@@ -133,6 +165,10 @@ To recall past events, grep {workspace_path}/memory/HISTORY.md"""
         """
         Build the complete message list for an LLM call.
 
+        Layout keeps the cacheable prefix stable between turns: the system
+        prompt and session block come first, then history; the current time
+        rides on the new user message at the end.
+
         Args:
             history: Previous conversation messages.
             current_message: The new user message.
@@ -156,7 +192,7 @@ To recall past events, grep {workspace_path}/memory/HISTORY.md"""
         messages.extend(history)
 
         # Current message (with optional image attachments)
-        user_content = self._build_user_content(current_message, media)
+        user_content = self._build_user_content(f"{self._get_time_line()}\n\n{current_message}", media)
         messages.append({"role": "user", "content": user_content})
 
         return messages
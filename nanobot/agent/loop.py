@@ -1,18 +1,21 @@
 """Agent loop: the core processing engine."""
 
 import asyncio
+from collections import deque
 from contextlib import AsyncExitStack
-import json
 import json_repair
 from pathlib import Path
 import re
+import time
 from typing import Any, Awaitable, Callable
 
 from loguru import logger
 
 from nanobot.bus.events import InboundMessage, OutboundMessage
 from nanobot.bus.queue import MessageBus
-from nanobot.providers.base import LLMProvider
+from nanobot.providers.base import LLMProvider, LLMResponse
+from nanobot.providers.scheduler import llm_priority
+from nanobot.agent.consolidation import ConsolidationScheduler
 from nanobot.agent.context import ContextBuilder
 from nanobot.agent.tools.registry import ToolRegistry
 from nanobot.agent.tools.filesystem import ReadFileTool, WriteFileTool, EditFileTool, ListDirTool
@@ -21,9 +24,17 @@ from nanobot.agent.tools.web import WebSearchTool, WebFetchTool
 from nanobot.agent.tools.message import MessageTool
 from nanobot.agent.tools.spawn import SpawnTool
 from nanobot.agent.tools.cron import CronTool
-from nanobot.agent.memory import MemoryStore
 from nanobot.agent.subagent import SubagentManager
 from nanobot.session.manager import Session, SessionManager
+from nanobot.utils import codec, tracing
+from nanobot.utils.helpers import estimate_tokens
+
+# Fallback when neither config nor the provider knows the model's window
+_DEFAULT_CONTEXT_WINDOW = 32_768
+# Headroom for estimator error plus the session block, time line and framing
+_CONTEXT_SAFETY_RATIO = 0.9
+# A steady stream of messages postpones a coalesced turn by at most this many quiet windows
+_COALESCE_MAX_WINDOWS = 4
 
 
 class AgentLoop:
@@ -48,12 +59,20 @@ class AgentLoop:
         temperature: float = 0.7,
         max_tokens: int = 4096,
         memory_window: int = 50,
+        context_window_tokens: int = 0,
         brave_api_key: str | None = None,
         exec_config: "ExecToolConfig | None" = None,
         cron_service: "CronService | None" = None,
         restrict_to_workspace: bool = False,
         session_manager: SessionManager | None = None,
         mcp_servers: dict | None = None,
+        max_concurrent_sessions: int = 4,
+        max_parallel_tools: int = 4,
+        stream_channels: set[str] | None = None,
+        stream_interval: float = 1.0,
+        coalesce_windows: dict[str, float] | None = None,
+        max_concurrent_consolidations: int = 1,
+        consolidation_debounce: float = 2.0,
     ):
         from nanobot.config.schema import ExecToolConfig
         from nanobot.cron.service import CronService
@@ -65,13 +84,22 @@ class AgentLoop:
         self.temperature = temperature
         self.max_tokens = max_tokens
         self.memory_window = memory_window
+        self.context_window_tokens = context_window_tokens
         self.brave_api_key = brave_api_key
         self.exec_config = exec_config or ExecToolConfig()
         self.cron_service = cron_service
         self.restrict_to_workspace = restrict_to_workspace
+        self.max_parallel_tools = max_parallel_tools
+        # Bus channels that render token streams by editing a draft message in place
+        self.stream_channels = stream_channels or set()
+        self.stream_interval = stream_interval
+        # Quiet window (seconds) per bus channel for merging rapid-fire messages into one turn
+        self.coalesce_windows = coalesce_windows or {}
+        # Cumulative provider usage (prompt/completion/cached tokens) for diagnostics
+        self.token_usage: dict[str, int] = {}
 
-        self.context = ContextBuilder(workspace)
         self.sessions = session_manager or SessionManager(workspace)
+        self.context = ContextBuilder(workspace, writer=self.sessions.writer)
         self.tools = ToolRegistry()
         self.subagents = SubagentManager(
             provider=provider,
@@ -83,9 +111,29 @@ class AgentLoop:
             brave_api_key=brave_api_key,
             exec_config=self.exec_config,
             restrict_to_workspace=restrict_to_workspace,
+            max_parallel_tools=max_parallel_tools,
         )
         
         self._running = False
+        self._run_task: asyncio.Task | None = None
+        # Per-session ordered lanes; lanes run concurrently up to the global limit
+        self._lanes: dict[str, deque[InboundMessage]] = {}
+        self._lane_tasks: dict[str, asyncio.Task[None]] = {}
+        self._lane_arrivals: dict[str, float] = {}  # monotonic time of each lane's latest message
+        self._session_slots = asyncio.Semaphore(max(1, max_concurrent_sessions))
+        self.max_concurrent_sessions = max(1, max_concurrent_sessions)
+        # Set when a session lane finishes; run() leaves new sessions on the bus while every
+        # slot is taken, so lane priority and the overflow policy apply to them
+        self._slot_freed = asyncio.Event()
+        self._quiet: set[str] = set()  # lanes waiting out a coalescing window (hold no slot)
+        self.consolidator = ConsolidationScheduler(
+            runner=self._run_consolidation,
+            state_path=self.context.memory.memory_dir / ".consolidation_queue.json",
+            max_concurrent=max_concurrent_consolidations,
+            debounce_s=consolidation_debounce,
+            lock_path=self.context.memory.memory_dir / ".consolidation.lock",
+            writer=self.sessions.writer,
+        )
         self._mcp_servers = mcp_servers or {}
         self._mcp_stack: AsyncExitStack | None = None
         self._mcp_connected = False
@@ -168,6 +216,7 @@ class AgentLoop:
         self,
         initial_messages: list[dict],
         on_progress: Callable[[str], Awaitable[None]] | None = None,
+        on_stream: Callable[[str], Awaitable[None]] | None = None,
     ) -> tuple[str | None, list[str]]:
         """
         Run the agent iteration loop.
@@ -175,6 +224,7 @@ class AgentLoop:
         Args:
             initial_messages: Starting messages for the LLM conversation.
             on_progress: Optional callback to push intermediate content to the user.
+            on_stream: Optional callback receiving text deltas as the LLM generates them.
 
         Returns:
             Tuple of (final_content, list_of_tools_used).
@@ -187,13 +237,7 @@ class AgentLoop:
         while iteration < self.max_iterations:
             iteration += 1
 
-            response = await self.provider.chat(
-                messages=messages,
-                tools=self.tools.get_definitions(),
-                model=self.model,
-                temperature=self.temperature,
-                max_tokens=self.max_tokens,
-            )
+            response = await self._chat(messages, on_stream)
 
             if response.has_tool_calls:
                 if on_progress:
@@ -206,7 +250,7 @@ class AgentLoop:
                         "type": "function",
                         "function": {
                             "name": tc.name,
-                            "arguments": json.dumps(tc.arguments)
+                            "arguments": codec.dumps(tc.arguments)
                         }
                     }
                     for tc in response.tool_calls
@@ -216,11 +260,15 @@ class AgentLoop:
                     reasoning_content=response.reasoning_content,
                 )
 
-                for tool_call in response.tool_calls:
+                for tool_call, call in zip(response.tool_calls, tool_call_dicts):
                     tools_used.append(tool_call.name)
-                    args_str = json.dumps(tool_call.arguments, ensure_ascii=False)
-                    logger.info(f"Tool call: {tool_call.name}({args_str[:200]})")
-                    result = await self.tools.execute(tool_call.name, tool_call.arguments)
+                    # Reuse the arguments serialized for the assistant message
+                    logger.info(f"Tool call: {tool_call.name}({call['function']['arguments'][:200]})")
+                results = await self.tools.execute_batch(
+                    [(tc.name, tc.arguments) for tc in response.tool_calls],
+                    max_concurrency=self.max_parallel_tools,
+                )
+                for tool_call, result in zip(response.tool_calls, results):
                     messages = self.context.add_tool_result(
                         messages, tool_call.id, tool_call.name, result
                     )
@@ -230,31 +278,181 @@ class AgentLoop:
 
         return final_content, tools_used
 
+    async def _chat(
+        self,
+        messages: list[dict],
+        on_stream: Callable[[str], Awaitable[None]] | None = None,
+    ) -> LLMResponse:
+        """Call the LLM, forwarding text deltas to on_stream when given."""
+        kwargs = dict(
+            messages=messages,
+            tools=self.tools.get_definitions(),
+            model=self.model,
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+        )
+        with tracing.span("llm.chat", model=self.model, stream=bool(on_stream)) as span:
+            if not on_stream:
+                response = await self.provider.chat(**kwargs)
+            else:
+                response = None
+                async for chunk in self.provider.chat_stream(**kwargs):
+                    if chunk.content:
+                        if "first_token_ms" not in span.attrs:
+                            span.set(first_token_ms=span.duration_ms)
+                        await on_stream(chunk.content)
+                    if chunk.response:
+                        response = chunk.response
+                response = response or LLMResponse(content="Error: stream ended without a response", finish_reason="error")
+            span.set(finish_reason=response.finish_reason, **response.usage)
+        self._record_usage(response.usage)
+        return response
+
+    def _record_usage(self, usage: dict[str, int]) -> None:
+        """Accumulate provider token usage, including prompt-cache hits."""
+        if not usage:
+            return
+        for key, value in usage.items():
+            self.token_usage[key] = self.token_usage.get(key, 0) + value
+        logger.debug(
+            f"LLM usage: prompt={usage.get('prompt_tokens', 0)} "
+            f"cached={usage.get('cached_tokens', 0)} completion={usage.get('completion_tokens', 0)}"
+        )
+
     async def run(self) -> None:
-        """Run the agent loop, processing messages from the bus."""
+        """Run the agent loop, dispatching messages from the bus into per-session lanes."""
         self._running = True
+        self._run_task = asyncio.current_task()
         await self._connect_mcp()
+        self.consolidator.resume()
+        await self.bus.replay_inbound()
         logger.info("Agent loop started")
 
-        while self._running:
+        # Blocks on the queue while idle; stop() cancels the wait instead of it being polled
+        try:
+            while self._running:
+                await self._wait_for_slot()
+                self._dispatch(await self.bus.consume_inbound())
+        except asyncio.CancelledError:
+            if self._running:
+                raise  # cancelled from outside, not by stop()
+        finally:
+            self._run_task = None
+
+    @staticmethod
+    def _lane_key(msg: InboundMessage) -> str:
+        """Session key used for ordering (system messages carry their origin in chat_id)."""
+        return msg.ordering_key
+
+    def _dispatch(self, msg: InboundMessage) -> None:
+        """Queue a message on its session lane, starting a lane worker if idle."""
+        key = self._lane_key(msg)
+        self._lanes.setdefault(key, deque()).append(msg)
+        self._lane_arrivals[key] = time.monotonic()
+        if key not in self._lane_tasks:
+            self._lane_tasks[key] = asyncio.create_task(self._run_lane(key))
+
+    async def _run_lane(self, key: str) -> None:
+        """Process one session's messages strictly in arrival order."""
+        lane = self._lanes[key]
+        try:
+            while lane:
+                window = self.coalesce_windows.get(lane[0].channel, 0)
+                if window:
+                    await self._await_quiet(key, window)
+                msg = self._take_coalesced(lane) if window else lane.popleft()
+                async with self._session_slots:
+                    await self._handle_inbound(msg)
+        finally:
+            self._slot_freed.set()
+            self._lanes.pop(key, None)
+            self._lane_tasks.pop(key, None)
+            self._lane_arrivals.pop(key, None)
+
+    def _active_lanes(self) -> int:
+        """Sessions holding (or waiting for) a session slot; lanes in a quiet window don't count."""
+        return len(self._lane_tasks) - len(self._quiet)
+
+    async def _wait_for_slot(self) -> None:
+        """
+        Wait until fewer sessions are active than the limit.
+
+        Meanwhile, messages for sessions that already have a lane are still
+        taken off the bus, so one session's backlog queues in its own lane
+        (and can be coalesced) instead of blocking other sessions.
+        """
+        while self._active_lanes() >= self.max_concurrent_sessions:
+            self._slot_freed.clear()
+            arrived = self.bus.inbound.next_put()
+            for msg in self.bus.inbound.take_where(lambda m: self._lane_key(m) in self._lanes):
+                self._dispatch(msg)
+            waiters = {asyncio.ensure_future(self._slot_freed.wait()), asyncio.ensure_future(arrived.wait())}
             try:
-                msg = await asyncio.wait_for(
-                    self.bus.consume_inbound(),
-                    timeout=1.0
-                )
-                try:
-                    response = await self._process_message(msg)
-                    if response:
-                        await self.bus.publish_outbound(response)
-                except Exception as e:
-                    logger.error(f"Error processing message: {e}")
-                    await self.bus.publish_outbound(OutboundMessage(
-                        channel=msg.channel,
-                        chat_id=msg.chat_id,
-                        content=f"Sorry, I encountered an error: {str(e)}"
-                    ))
-            except asyncio.TimeoutError:
-                continue
+                await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for waiter in waiters:
+                    waiter.cancel()
+
+    async def _await_quiet(self, key: str, window: float) -> None:
+        """Sleep until a lane has had no new message for one quiet window (bounded)."""
+        deadline = time.monotonic() + window * _COALESCE_MAX_WINDOWS
+        self._quiet.add(key)
+        self._slot_freed.set()  # other sessions may start meanwhile
+        try:
+            while True:
+                delay = min(self._lane_arrivals.get(key, 0.0) + window, deadline) - time.monotonic()
+                if delay <= 0:
+                    return
+                await asyncio.sleep(delay)
+        finally:
+            self._quiet.discard(key)
+
+    @staticmethod
+    def _take_coalesced(lane: deque[InboundMessage]) -> InboundMessage:
+        """Pop the next message, merged with the same sender's queued follow-ups."""
+        batch = [lane.popleft()]
+        first = batch[0]
+        while lane and not first.content.startswith("/"):
+            nxt = lane[0]
+            if (nxt.channel, nxt.chat_id, nxt.sender_id) != (first.channel, first.chat_id, first.sender_id):
+                break
+            if nxt.content.startswith("/"):
+                break  # commands always run as their own turn
+            batch.append(lane.popleft())
+        return InboundMessage.merge(batch) if len(batch) > 1 else first
+
+    async def _handle_inbound(self, msg: InboundMessage) -> None:
+        """Process one bus message and publish its response (or an error reply)."""
+        trace = msg.metadata.get(tracing.TRACE_KEY) or {}
+        trace_id, parent_id = trace.get("trace_id"), trace.get("span_id")
+        if trace_id:
+            # From channel receipt to now: bus queue, coalescing window and session lane
+            tracing.tracer.record(
+                "queue.wait", start=msg.timestamp.timestamp(), trace_id=trace_id, parent_id=parent_id,
+                lane=self.bus.lane_of(msg), coalesced=msg.metadata.get("coalesced", 1),
+            )
+        with llm_priority(self.bus.lane_of(msg)), tracing.span(
+            "agent.turn", trace_id=trace_id, parent_id=parent_id, channel=msg.channel, session=self._lane_key(msg),
+        ):
+            try:
+                response = await self._process_message(msg)
+                if response:
+                    await self.bus.publish_outbound(response)
+            except Exception as e:
+                logger.error(f"Error processing message: {e}")
+                await self.bus.publish_outbound(OutboundMessage(
+                    channel=msg.channel,
+                    chat_id=msg.chat_id,
+                    content=f"Sorry, I encountered an error: {str(e)}",
+                    metadata={tracing.TRACE_KEY: trace} if trace else {},
+                ))
+        # Not reached on cancellation (shutdown), so an interrupted turn is replayed on restart
+        self.bus.ack_inbound(msg)
+
+    @property
+    def active_sessions(self) -> int:
+        """Number of sessions with queued or in-flight messages."""
+        return len(self._lane_tasks)
     
     async def close_mcp(self) -> None:
         """Close MCP connections."""
@@ -268,6 +466,8 @@ class AgentLoop:
     def stop(self) -> None:
         """Stop the agent loop."""
         self._running = False
+        if self._run_task and self._run_task is not asyncio.current_task():
+            self._run_task.cancel()
         logger.info("Agent loop stopping")
     
     async def _process_message(
@@ -275,6 +475,7 @@ class AgentLoop:
         msg: InboundMessage,
         session_key: str | None = None,
         on_progress: Callable[[str], Awaitable[None]] | None = None,
+        on_stream: Callable[[str], Awaitable[None]] | None = None,
     ) -> OutboundMessage | None:
         """
         Process a single inbound message.
@@ -283,6 +484,8 @@ class AgentLoop:
             msg: The inbound message to process.
             session_key: Override session key (used by process_direct).
             on_progress: Optional callback for intermediate output (defaults to bus publish).
+            on_stream: Optional callback for text deltas (defaults to a draft relay
+                for channels listed in stream_channels).
         
         Returns:
             The response message, or None if no response needed.
@@ -300,44 +503,47 @@ class AgentLoop:
         # Handle slash commands
         cmd = msg.content.strip().lower()
         if cmd == "/new":
-            # Capture messages before clearing (avoid race condition with background task)
+            # Capture messages before clearing; the scheduler archives the snapshot
+            session.load_all()
             messages_to_archive = session.messages.copy()
             session.clear()
             self.sessions.save(session)
             self.sessions.invalidate(session.key)
-
-            async def _consolidate_and_cleanup():
-                temp_session = Session(key=session.key)
-                temp_session.messages = messages_to_archive
-                await self._consolidate_memory(temp_session, archive_all=True)
-
-            asyncio.create_task(_consolidate_and_cleanup())
+            self.consolidator.schedule(session.key, archive=messages_to_archive)
             return OutboundMessage(channel=msg.channel, chat_id=msg.chat_id,
                                   content="New session started. Memory consolidation in progress.")
         if cmd == "/help":
             return OutboundMessage(channel=msg.channel, chat_id=msg.chat_id,
                                   content="🐈 nanobot commands:\n/new — Start a new conversation\n/help — Show available commands")
         
-        if len(session.messages) > self.memory_window:
-            asyncio.create_task(self._consolidate_memory(session))
+        if session.message_count > self.memory_window:
+            self.consolidator.schedule(session.key)
 
         self._set_tool_context(msg.channel, msg.chat_id)
         initial_messages = self.context.build_messages(
-            history=session.get_history(max_messages=self.memory_window),
+            history=session.get_history(max_tokens=self._history_budget(msg.content)),
             current_message=msg.content,
             media=msg.media if msg.media else None,
             channel=msg.channel,
             chat_id=msg.chat_id,
         )
 
+        relay = None
+        if on_stream is None and on_progress is None and msg.channel in self.stream_channels:
+            relay = _DraftRelay(self.bus, msg, self.stream_interval)
+
         async def _bus_progress(content: str) -> None:
+            if relay and await relay.seal(content):
+                return
             await self.bus.publish_outbound(OutboundMessage(
                 channel=msg.channel, chat_id=msg.chat_id, content=content,
                 metadata=msg.metadata or {},
             ))
 
         final_content, tools_used = await self._run_agent_loop(
-            initial_messages, on_progress=on_progress or _bus_progress,
+            initial_messages,
+            on_progress=on_progress or _bus_progress,
+            on_stream=on_stream or (relay.push if relay else None),
         )
 
         if final_content is None:
@@ -355,9 +561,24 @@ class AgentLoop:
             channel=msg.channel,
             chat_id=msg.chat_id,
             content=final_content,
-            metadata=msg.metadata or {},  # Pass through for channel-specific needs (e.g. Slack thread_ts)
+            # Pass through for channel-specific needs (e.g. Slack thread_ts)
+            metadata=relay.final_metadata() if relay else (msg.metadata or {}),
         )
     
+    def _history_budget(self, current_message: str) -> int:
+        """Tokens left for history after the system prompt, tools, message and reply."""
+        window = (
+            self.context_window_tokens
+            or self.provider.get_context_window(self.model)
+            or _DEFAULT_CONTEXT_WINDOW
+        )
+        fixed = (
+            estimate_tokens(self.context.build_system_prompt())
+            + estimate_tokens(codec.dumps(self.tools.get_definitions()))
+            + estimate_tokens(current_message)
+        )
+        return max(0, int(window * _CONTEXT_SAFETY_RATIO) - self.max_tokens - fixed)
+
     async def _process_system_message(self, msg: InboundMessage) -> OutboundMessage | None:
         """
         Process a system message (e.g., subagent announce).
@@ -381,7 +602,7 @@ class AgentLoop:
         session = self.sessions.get_or_create(session_key)
         self._set_tool_context(origin_channel, origin_chat_id)
         initial_messages = self.context.build_messages(
-            history=session.get_history(max_messages=self.memory_window),
+            history=session.get_history(max_tokens=self._history_budget(msg.content)),
             current_message=msg.content,
             channel=origin_channel,
             chat_id=origin_chat_id,
@@ -401,6 +622,21 @@ class AgentLoop:
             content=final_content
         )
     
+    async def _run_consolidation(self, key: str, archive: list[dict] | None) -> None:
+        """Scheduler job: archive a /new snapshot, or consolidate the live session."""
+        if archive is not None:
+            temp_session = Session(key=key)
+            temp_session.messages = archive
+            await self._consolidate_memory(temp_session, archive_all=True)
+        else:
+            session = self.sessions.get_or_create(key)
+            await self._consolidate_memory(session)
+            self.sessions.save(session)
+        # MEMORY.md must be on disk before the job releases the cross-process lock
+        writer = self.context.memory.writer
+        if writer is not None:
+            await asyncio.to_thread(writer.flush)
+
     async def _consolidate_memory(self, session, archive_all: bool = False) -> None:
         """Consolidate old messages into MEMORY.md + HISTORY.md.
 
@@ -408,7 +644,7 @@ class AgentLoop:
             archive_all: If True, clear all messages and reset session (for /new command).
                        If False, only write to files without modifying session.
         """
-        memory = MemoryStore(self.workspace)
+        memory = self.context.memory
 
         if archive_all:
             old_messages = session.messages
@@ -416,19 +652,19 @@ class AgentLoop:
             logger.info(f"Memory consolidation (archive_all): {len(session.messages)} total messages archived")
         else:
             keep_count = self.memory_window // 2
-            if len(session.messages) <= keep_count:
-                logger.debug(f"Session {session.key}: No consolidation needed (messages={len(session.messages)}, keep={keep_count})")
+            if session.message_count <= keep_count:
+                logger.debug(f"Session {session.key}: No consolidation needed (messages={session.message_count}, keep={keep_count})")
                 return
 
-            messages_to_process = len(session.messages) - session.last_consolidated
+            messages_to_process = session.message_count - session.last_consolidated
             if messages_to_process <= 0:
-                logger.debug(f"Session {session.key}: No new messages to consolidate (last_consolidated={session.last_consolidated}, total={len(session.messages)})")
+                logger.debug(f"Session {session.key}: No new messages to consolidate (last_consolidated={session.last_consolidated}, total={session.message_count})")
                 return
 
-            old_messages = session.messages[session.last_consolidated:-keep_count]
+            old_messages = session.messages_from(session.last_consolidated)[:-keep_count]
             if not old_messages:
                 return
-            logger.info(f"Memory consolidation started: {len(session.messages)} total, {len(old_messages)} new to consolidate, {keep_count} keep")
+            logger.info(f"Memory consolidation started: {session.message_count} total, {len(old_messages)} new to consolidate, {keep_count} keep")
 
         lines = []
         for m in old_messages:
@@ -453,7 +689,8 @@ class AgentLoop:
 
 Respond with ONLY valid JSON, no markdown fences."""
 
-        try:
+        # Failures raise, so the consolidation scheduler counts and logs them
+        with llm_priority("background"), tracing.span("llm.chat", model=self.model, purpose="consolidation") as span:
             response = await self.provider.chat(
                 messages=[
                     {"role": "system", "content": "You are a memory consolidation agent. Respond only with valid JSON."},
@@ -461,30 +698,29 @@ Respond with ONLY valid JSON, no markdown fences."""
                 ],
                 model=self.model,
             )
-            text = (response.content or "").strip()
-            if not text:
-                logger.warning("Memory consolidation: LLM returned empty response, skipping")
-                return
-            if text.startswith("```"):
-                text = text.split("\n", 1)[-1].rsplit("```", 1)[0].strip()
-            result = json_repair.loads(text)
-            if not isinstance(result, dict):
-                logger.warning(f"Memory consolidation: unexpected response type, skipping. Response: {text[:200]}")
-                return
-
-            if entry := result.get("history_entry"):
-                memory.append_history(entry)
-            if update := result.get("memory_update"):
-                if update != current_memory:
-                    memory.write_long_term(update)
+            span.set(finish_reason=response.finish_reason, **response.usage)
+        if response.finish_reason == "error":
+            raise RuntimeError(response.content or "LLM call failed")
+        text = (response.content or "").strip()
+        if not text:
+            raise ValueError("LLM returned an empty response")
+        if text.startswith("```"):
+            text = text.split("\n", 1)[-1].rsplit("```", 1)[0].strip()
+        result = json_repair.loads(text)
+        if not isinstance(result, dict):
+            raise ValueError(f"Unexpected response type. Response: {text[:200]}")
+
+        if entry := result.get("history_entry"):
+            memory.append_history(entry)
+        if update := result.get("memory_update"):
+            if update != current_memory:
+                memory.write_long_term(update)
 
-            if archive_all:
-                session.last_consolidated = 0
-            else:
-                session.last_consolidated = len(session.messages) - keep_count
-            logger.info(f"Memory consolidation done: {len(session.messages)} messages, last_consolidated={session.last_consolidated}")
-        except Exception as e:
-            logger.error(f"Memory consolidation failed: {e}")
+        if archive_all:
+            session.last_consolidated = 0
+        else:
+            session.last_consolidated = session.message_count - keep_count
+        logger.info(f"Memory consolidation done: {session.message_count} messages, last_consolidated={session.last_consolidated}")
 
     async def process_direct(
         self,
@@ -493,6 +729,7 @@ Respond with ONLY valid JSON, no markdown fences."""
         channel: str = "cli",
         chat_id: str = "direct",
         on_progress: Callable[[str], Awaitable[None]] | None = None,
+        on_stream: Callable[[str], Awaitable[None]] | None = None,
     ) -> str:
         """
         Process a message directly (for CLI or cron usage).
@@ -503,6 +740,7 @@ Respond with ONLY valid JSON, no markdown fences."""
             channel: Source channel (for tool context routing).
             chat_id: Source chat ID (for tool context routing).
             on_progress: Optional callback for intermediate output.
+            on_stream: Optional callback receiving text deltas as they are generated.
         
         Returns:
             The agent's response.
@@ -515,5 +753,67 @@ Respond with ONLY valid JSON, no markdown fences."""
             content=content
         )
         
-        response = await self._process_message(msg, session_key=session_key, on_progress=on_progress)
+        with tracing.span("agent.turn", channel=channel, session=session_key):
+            response = await self._process_message(
+                msg, session_key=session_key, on_progress=on_progress, on_stream=on_stream,
+            )
         return response.content if response else ""
+
+
+class _DraftRelay:
+    """
+    Relay streamed text to a bus channel as a throttled, edit-in-place draft.
+
+    Drafts are OutboundMessages whose metadata carries ``_stream`` =
+    ``{"id": ..., "final": bool}``; channels that support streaming edit the
+    message with that id instead of sending a new one. Each LLM iteration gets
+    its own draft so intermediate text stays visible like progress messages.
+    """
+
+    def __init__(self, bus: MessageBus, msg: InboundMessage, interval: float):
+        self.bus = bus
+        self.msg = msg
+        self.interval = interval
+        self._seq = 0
+        self._text = ""
+        self._published = False
+        self._last_flush = 0.0
+
+    @property
+    def _stream_id(self) -> str:
+        return f"{self.msg.session_key}:{id(self)}:{self._seq}"
+
+    async def _publish(self, content: str, final: bool) -> None:
+        await self.bus.publish_outbound(OutboundMessage(
+            channel=self.msg.channel,
+            chat_id=self.msg.chat_id,
+            content=content,
+            metadata={**(self.msg.metadata or {}), "_stream": {"id": self._stream_id, "final": final}},
+        ))
+
+    async def push(self, delta: str) -> None:
+        """Append a delta, publishing the draft at most once per interval."""
+        self._text += delta
+        now = time.monotonic()
+        if now - self._last_flush >= self.interval and self._text.strip():
+            self._last_flush = now
+            self._published = True
+            await self._publish(self._text, final=False)
+
+    async def seal(self, content: str) -> bool:
+        """Finalize the open draft with content; False if no draft was shown."""
+        published = self._published
+        if published:
+            await self._publish(content, final=True)
+        self._seq += 1
+        self._text = ""
+        self._published = False
+        self._last_flush = 0.0
+        return published
+
+    def final_metadata(self) -> dict:
+        """Metadata for the final response (marks the open draft final)."""
+        meta = dict(self.msg.metadata or {})
+        if self._published:
+            meta["_stream"] = {"id": self._stream_id, "final": True}
+        return meta
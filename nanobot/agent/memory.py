@@ -1,29 +1,64 @@
 """Memory system for persistent agent memory."""
 
+import os
 from pathlib import Path
 
 from nanobot.utils.helpers import ensure_dir
+from nanobot.utils.writer import GroupCommitWriter
 
 
 class MemoryStore:
-    """Two-layer memory: MEMORY.md (long-term facts) + HISTORY.md (grep-searchable log)."""
+    """
+    Two-layer memory: MEMORY.md (long-term facts) + HISTORY.md (grep-searchable log).
 
-    def __init__(self, workspace: Path):
+    With a writer, writes go through its background thread instead of the
+    event loop; reads see a long-term update as soon as it is queued.
+    """
+
+    def __init__(self, workspace: Path, writer: GroupCommitWriter | None = None):
         self.memory_dir = ensure_dir(workspace / "memory")
         self.memory_file = self.memory_dir / "MEMORY.md"
         self.history_file = self.memory_dir / "HISTORY.md"
+        self.writer = writer
+        self._pending_long_term: str | None = None  # queued but not yet on disk
 
     def read_long_term(self) -> str:
+        if self._pending_long_term is not None:
+            return self._pending_long_term
         if self.memory_file.exists():
             return self.memory_file.read_text(encoding="utf-8")
         return ""
 
     def write_long_term(self, content: str) -> None:
-        self.memory_file.write_text(content, encoding="utf-8")
+        if self.writer is None:
+            self.memory_file.write_text(content, encoding="utf-8")
+            return
+        self._pending_long_term = content
+        self.writer.submit(self._commit_long_term, content, key="long_term")
 
     def append_history(self, entry: str) -> None:
+        if self.writer is None:
+            with open(self.history_file, "a", encoding="utf-8") as f:
+                f.write(entry.rstrip() + "\n\n")
+            return
+        self.writer.submit(self._commit_history, entry)
+
+    def _commit_long_term(self, contents: list[str]) -> None:
+        content = contents[-1]
+        tmp = self.memory_file.with_suffix(".md.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.memory_file)
+        if self._pending_long_term == content:
+            self._pending_long_term = None
+
+    def _commit_history(self, entries: list[str]) -> None:
         with open(self.history_file, "a", encoding="utf-8") as f:
-            f.write(entry.rstrip() + "\n\n")
+            f.write("".join(entry.rstrip() + "\n\n" for entry in entries))
+            f.flush()
+            os.fsync(f.fileno())
 
     def get_memory_context(self) -> str:
         long_term = self.read_long_term()
@@ -6,6 +6,8 @@ import re
 import shutil
 from pathlib import Path
 
+from nanobot.utils.helpers import file_signature
+
 # Default builtin skills directory (relative to this file)
 BUILTIN_SKILLS_DIR = Path(__file__).parent.parent / "skills"
 
@@ -22,6 +24,9 @@ class SkillsLoader:
         self.workspace = workspace
         self.workspace_skills = workspace / "skills"
         self.builtin_skills = builtin_skills_dir or BUILTIN_SKILLS_DIR
+        # Requirements seen by _check_requirements, tracked for fingerprint()
+        self._required_bins: set[str] = set()
+        self._required_env: set[str] = set()
     
     def list_skills(self, filter_unavailable: bool = True) -> list[dict[str, str]]:
         """
@@ -177,6 +182,8 @@ class SkillsLoader:
     def _check_requirements(self, skill_meta: dict) -> bool:
         """Check if skill requirements are met (bins, env vars)."""
         requires = skill_meta.get("requires", {})
+        self._required_bins.update(requires.get("bins", []))
+        self._required_env.update(requires.get("env", []))
         for b in requires.get("bins", []):
             if not shutil.which(b):
                 return False
@@ -200,6 +207,29 @@ class SkillsLoader:
                 result.append(s["name"])
         return result
     
+    def fingerprint(self) -> tuple:
+        """
+        Cheap change-detection key for everything skill listing depends on.
+
+        Only stats paths: the skill roots, each skill directory and SKILL.md,
+        the PATH directories (when any skill needs a binary) and the presence
+        of required env vars. No SKILL.md is read or parsed.
+        """
+        key: list = []
+        for root in (self.workspace_skills, self.builtin_skills):
+            if not root or not root.exists():
+                key.append(None)
+                continue
+            key.append(file_signature(root))
+            for skill_dir in sorted(root.iterdir()):
+                if skill_dir.is_dir():
+                    key.append((skill_dir.name, file_signature(skill_dir), file_signature(skill_dir / "SKILL.md")))
+        if self._required_bins:
+            path = os.environ.get("PATH", "")
+            key.append((path, tuple(file_signature(Path(d)) for d in path.split(os.pathsep) if d)))
+        key.append(tuple((e, bool(os.environ.get(e))) for e in sorted(self._required_env)))
+        return tuple(key)
+    
     def get_skill_metadata(self, name: str) -> dict | None:
         """
         Get metadata from a skill's frontmatter.
@@ -226,3 +256,4 @@ class SkillsLoader:
                 return metadata
         
         return None
+
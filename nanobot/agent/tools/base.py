@@ -39,6 +39,11 @@ class Tool(ABC):
         """JSON Schema for tool parameters."""
         pass
     
+    @property
+    def concurrency_safe(self) -> bool:
+        """Whether calls may run alongside other calls from the same turn (no side effects)."""
+        return False
+    
     @abstractmethod
     async def execute(self, **kwargs: Any) -> str:
         """
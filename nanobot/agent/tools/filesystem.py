@@ -1,5 +1,6 @@
 """File system tools: read, write, edit."""
 
+import asyncio
 from pathlib import Path
 from typing import Any
 
@@ -24,6 +25,10 @@ class ReadFileTool(Tool):
     def name(self) -> str:
         return "read_file"
     
+    @property
+    def concurrency_safe(self) -> bool:
+        return True
+    
     @property
     def description(self) -> str:
         return "Read the contents of a file at the given path."
@@ -49,7 +54,8 @@ class ReadFileTool(Tool):
             if not file_path.is_file():
                 return f"Error: Not a file: {path}"
             
-            content = file_path.read_text(encoding="utf-8")
+            # Off the event loop so parallel reads actually overlap
+            content = await asyncio.to_thread(file_path.read_text, encoding="utf-8")
             return content
         except PermissionError as e:
             return f"Error: {e}"
@@ -171,6 +177,10 @@ class ListDirTool(Tool):
     def name(self) -> str:
         return "list_dir"
     
+    @property
+    def concurrency_safe(self) -> bool:
+        return True
+    
     @property
     def description(self) -> str:
         return "List the contents of a directory."
@@ -1,8 +1,10 @@
 """Tool registry for dynamic tool management."""
 
+import asyncio
 from typing import Any
 
 from nanobot.agent.tools.base import Tool
+from nanobot.utils import tracing
 
 
 class ToolRegistry:
@@ -53,13 +55,57 @@ class ToolRegistry:
         if not tool:
             return f"Error: Tool '{name}' not found"
 
-        try:
-            errors = tool.validate_params(params)
-            if errors:
-                return f"Error: Invalid parameters for tool '{name}': " + "; ".join(errors)
-            return await tool.execute(**params)
-        except Exception as e:
-            return f"Error executing {name}: {str(e)}"
+        with tracing.span("tool.execute", tool=name) as span:
+            try:
+                errors = tool.validate_params(params)
+                if errors:
+                    span.status = "error"
+                    return f"Error: Invalid parameters for tool '{name}': " + "; ".join(errors)
+                return await tool.execute(**params)
+            except Exception as e:
+                span.status = "error"
+                span.set(error=str(e)[:200])
+                return f"Error executing {name}: {str(e)}"
+    
+    async def execute_batch(
+        self,
+        calls: list[tuple[str, dict[str, Any]]],
+        max_concurrency: int = 4,
+    ) -> list[str]:
+        """
+        Execute several tool calls from one LLM turn.
+        
+        Consecutive concurrency-safe calls run together (at most
+        max_concurrency at a time); any other call runs alone, after
+        everything before it has finished.
+        
+        Args:
+            calls: (name, params) pairs in the order the model emitted them.
+            max_concurrency: Per-turn cap on simultaneously running calls.
+        
+        Returns:
+            Results in the same order as calls.
+        """
+        results: list[str] = [""] * len(calls)
+        slots = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def _run(i: int) -> None:
+            async with slots:
+                results[i] = await self.execute(*calls[i])
+
+        batch: list[int] = []
+        for i, (name, _) in enumerate(calls):
+            tool = self._tools.get(name)
+            if tool and tool.concurrency_safe:
+                batch.append(i)
+                continue
+            if batch:
+                await asyncio.gather(*(_run(j) for j in batch))
+                batch = []
+            await _run(i)
+        if batch:
+            await asyncio.gather(*(_run(j) for j in batch))
+        return results
     
     @property
     def tool_names(self) -> list[str]:
@@ -22,6 +22,65 @@ class InboundMessage:
         """Unique key for session identification."""
         return f"{self.channel}:{self.chat_id}"
 
+    @property
+    def ordering_key(self) -> str:
+        """Key whose messages must be handled in order (system messages carry their origin in chat_id)."""
+        if self.channel == "system" and ":" in self.chat_id:
+            return self.chat_id
+        return self.session_key
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSON-compatible form, for logs and inter-process transport."""
+        return {
+            "channel": self.channel,
+            "sender_id": self.sender_id,
+            "chat_id": self.chat_id,
+            "content": self.content,
+            "timestamp": self.timestamp.isoformat(),
+            "media": self.media,
+            "metadata": self.metadata,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "InboundMessage":
+        return cls(
+            channel=data["channel"],
+            sender_id=data["sender_id"],
+            chat_id=data["chat_id"],
+            content=data["content"],
+            timestamp=datetime.fromisoformat(data["timestamp"]),
+            media=data.get("media", []),
+            metadata=data.get("metadata", {}),
+        )
+
+    @classmethod
+    def merge(cls, messages: list["InboundMessage"]) -> "InboundMessage":
+        """
+        Combine consecutive messages from one chat into a single turn.
+
+        Texts are joined by newlines and media lists concatenated; metadata
+        is layered oldest to newest, so reply targets point at the latest
+        message, and "coalesced" records how many messages were merged.
+        """
+        first = messages[0]
+        metadata: dict[str, Any] = {}
+        for msg in messages:
+            metadata.update(msg.metadata)
+        metadata["coalesced"] = len(messages)
+        # Keep every write-ahead log entry so the merged turn acknowledges them all
+        seqs = [msg.metadata["_wal_seq"] for msg in messages if "_wal_seq" in msg.metadata]
+        if seqs:
+            metadata["_wal_seqs"] = seqs
+        return cls(
+            channel=first.channel,
+            sender_id=first.sender_id,
+            chat_id=first.chat_id,
+            content="\n".join(msg.content for msg in messages if msg.content),
+            timestamp=first.timestamp,
+            media=[m for msg in messages for m in msg.media],
+            metadata=metadata,
+        )
+
 
 @dataclass
 class OutboundMessage:
@@ -34,4 +93,26 @@ class OutboundMessage:
     media: list[str] = field(default_factory=list)
     metadata: dict[str, Any] = field(default_factory=dict)
 
+    def to_dict(self) -> dict[str, Any]:
+        """JSON-compatible form, for inter-process transport."""
+        return {
+            "channel": self.channel,
+            "chat_id": self.chat_id,
+            "content": self.content,
+            "reply_to": self.reply_to,
+            "media": self.media,
+            "metadata": self.metadata,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "OutboundMessage":
+        return cls(
+            channel=data["channel"],
+            chat_id=data["chat_id"],
+            content=data["content"],
+            reply_to=data.get("reply_to"),
+            media=data.get("media", []),
+            metadata=data.get("metadata", {}),
+        )
+
 
@@ -0,0 +1,328 @@
+"""Unix-socket transport that shards the bus across agent worker processes."""
+
+from __future__ import annotations
+
+import asyncio
+import struct
+import sys
+import zlib
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+from nanobot.bus.events import InboundMessage, OutboundMessage
+from nanobot.bus.queue import MessageBus
+from nanobot.utils import codec
+
+_HEADER = struct.Struct(">I")  # frame length prefix
+
+
+def shard_for(msg: InboundMessage, workers: int) -> int:
+    """Worker that owns a message's session (stable across restarts, unlike hash())."""
+    return shard_of(msg.ordering_key, workers)
+
+
+def shard_of(session_key: str, workers: int) -> int:
+    """Worker that owns a session key."""
+    return zlib.crc32(session_key.encode()) % workers
+
+
+async def write_frame(writer: asyncio.StreamWriter, frame: dict[str, Any]) -> None:
+    body = codec.dumpb(frame, default=str)
+    writer.write(_HEADER.pack(len(body)) + body)
+    await writer.drain()
+
+
+async def read_frame(reader: asyncio.StreamReader) -> dict[str, Any]:
+    """Read one frame. Raises asyncio.IncompleteReadError when the peer has gone."""
+    (size,) = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    return codec.loads(await reader.readexactly(size))
+
+
+class BusBroker:
+    """
+    Routes the gateway's inbound messages to agent worker processes.
+
+    Each worker connects over a Unix socket and announces its shard. The
+    broker drains the local bus and sends every message to the worker
+    owning shard_for(msg): one session always lands on one worker, and
+    frames on a socket arrive in order, so per-session ordering holds.
+    Workers send back their responses (published on the local outbound
+    queue for the channels), subagent announcements (published inbound,
+    so they are logged and routed like any other message) and acks.
+
+    Messages for a worker that is not connected are held until it is.
+    With the inbound log enabled, messages sent to a worker but not yet
+    acknowledged are also remembered and resent if the worker reconnects
+    after a crash.
+    """
+
+    def __init__(
+        self,
+        bus: MessageBus,
+        socket_path: Path,
+        workers: int,
+        settings: dict[str, Any] | None = None,
+    ):
+        """
+        Args:
+            bus: The gateway's bus (channels publish to it, the dispatcher drains it).
+            socket_path: Unix socket to listen on.
+            workers: Number of shards.
+            settings: Agent settings sent to each worker when it connects.
+        """
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.bus = bus
+        self.socket_path = socket_path
+        self.workers = workers
+        self.settings = settings or {}
+        self._writers: dict[int, asyncio.StreamWriter] = {}
+        self._held: dict[int, deque[InboundMessage]] = {shard: deque() for shard in range(workers)}
+        self._inflight: dict[int, OrderedDict[int, InboundMessage]] = {
+            shard: OrderedDict() for shard in range(workers)
+        }
+        self._routed = [0] * workers
+        self._server: asyncio.AbstractServer | None = None
+        self._running = False
+        self._run_task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        """Listen for worker connections."""
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        self.socket_path.unlink(missing_ok=True)  # stale socket from a previous run
+        self._server = await asyncio.start_unix_server(self._serve, path=str(self.socket_path))
+        logger.info(f"Bus broker listening on {self.socket_path} for {self.workers} workers")
+
+    async def run(self) -> None:
+        """Route inbound messages to workers until stopped."""
+        self._running = True
+        self._run_task = asyncio.current_task()
+        await self.bus.replay_inbound()
+        try:
+            while self._running:
+                await self._route(await self.bus.consume_inbound())
+        except asyncio.CancelledError:
+            if self._running:
+                raise  # cancelled from outside, not by stop()
+        finally:
+            self._run_task = None
+
+    async def _route(self, msg: InboundMessage) -> None:
+        shard = shard_for(msg, self.workers)
+        self._routed[shard] += 1
+        seq = msg.metadata.get("_wal_seq")
+        writer = self._writers.get(shard)
+        if writer is None:
+            self._held[shard].append(msg)
+            return
+        if seq is not None:
+            self._inflight[shard][seq] = msg
+        try:
+            await write_frame(writer, {"t": "in", "msg": msg.to_dict()})
+        except (ConnectionError, RuntimeError) as e:
+            logger.warning(f"Lost worker {shard} while routing: {e}")
+            if seq is None:
+                self._held[shard].append(msg)  # logged messages are recovered from _inflight
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Handle one worker connection: hello, catch-up, then its frames."""
+        shard = None
+        try:
+            hello = await read_frame(reader)
+            shard = hello.get("shard")
+            if hello.get("t") != "hello" or not isinstance(shard, int) or not 0 <= shard < self.workers:
+                logger.warning(f"Bus broker rejected connection with hello {hello!r}")
+                shard = None
+                return
+            if shard in self._writers:
+                logger.warning(f"Worker {shard} reconnected, replacing the old connection")
+                self._disconnect(shard)
+            await write_frame(writer, {"t": "settings", "settings": {**self.settings, "workers": self.workers}})
+
+            # Catch up before going live; nothing awaits between the last send and registration
+            held = self._held[shard]
+            while held:
+                msg = held.popleft()
+                seq = msg.metadata.get("_wal_seq")
+                if seq is not None:
+                    self._inflight[shard][seq] = msg
+                await write_frame(writer, {"t": "in", "msg": msg.to_dict()})
+            self._writers[shard] = writer
+            logger.info(f"Worker {shard} connected")
+
+            while True:
+                await self._handle(shard, await read_frame(reader))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if shard is not None and self._writers.get(shard) is writer:
+                self._disconnect(shard)
+                logger.warning(f"Worker {shard} disconnected")
+            writer.close()
+
+    def _disconnect(self, shard: int) -> None:
+        """Forget a worker's connection; its unacknowledged messages go back to the front of the queue."""
+        self._writers.pop(shard, None)
+        inflight = self._inflight[shard]
+        if inflight:
+            self._held[shard].extendleft(reversed(list(inflight.values())))
+            inflight.clear()
+
+    async def _handle(self, shard: int, frame: dict[str, Any]) -> None:
+        kind = frame.get("t")
+        if kind == "out":
+            await self.bus.publish_outbound(OutboundMessage.from_dict(frame["msg"]))
+        elif kind == "in":
+            await self.bus.publish_inbound(InboundMessage.from_dict(frame["msg"]))
+        elif kind == "ack":
+            for seq in frame["seqs"]:
+                self._inflight[shard].pop(seq, None)
+                if self.bus.wal is not None:
+                    self.bus.wal.ack(seq)
+        else:
+            logger.warning(f"Unknown frame type {kind!r} from worker {shard}")
+
+    def stop(self) -> None:
+        """Stop routing and close the socket."""
+        self._running = False
+        if self._run_task and self._run_task is not asyncio.current_task():
+            self._run_task.cancel()
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        for writer in self._writers.values():
+            writer.close()
+        self._writers.clear()
+        self.socket_path.unlink(missing_ok=True)
+
+    def stats(self) -> dict[str, Any]:
+        """Per-shard connection state and message counts."""
+        return {
+            str(shard): {
+                "connected": shard in self._writers,
+                "routed": self._routed[shard],
+                "held": len(self._held[shard]),
+                "inflight": len(self._inflight[shard]),
+            }
+            for shard in range(self.workers)
+        }
+
+
+class RemoteBus(MessageBus):
+    """
+    A worker's view of the gateway bus.
+
+    Inbound messages arrive from the broker on the local inbound queue, so
+    AgentLoop runs unchanged; publishing in either direction and acks are
+    forwarded to the broker. `closed` is set when the connection drops.
+    """
+
+    def __init__(self, socket_path: Path, shard: int, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.socket_path = socket_path
+        self.shard = shard
+        self.settings: dict[str, Any] = {}
+        self.closed = asyncio.Event()
+        self._writer: asyncio.StreamWriter | None = None
+        self._reader_task: asyncio.Task | None = None
+
+    async def connect(self) -> None:
+        """Connect to the broker, announce the shard and receive the agent settings."""
+        reader, self._writer = await asyncio.open_unix_connection(str(self.socket_path))
+        await write_frame(self._writer, {"t": "hello", "shard": self.shard})
+        frame = await read_frame(reader)
+        self.settings = frame.get("settings", {})
+        self._reader_task = asyncio.create_task(self._read(reader))
+        logger.info(f"Worker {self.shard} connected to {self.socket_path}")
+
+    async def _read(self, reader: asyncio.StreamReader) -> None:
+        try:
+            while True:
+                frame = await read_frame(reader)
+                if frame.get("t") == "in":
+                    msg = InboundMessage.from_dict(frame["msg"])
+                    await self.inbound.put(msg, self.lane_of(msg))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            logger.warning(f"Worker {self.shard} lost its broker connection")
+        finally:
+            self.closed.set()
+
+    async def _send(self, frame: dict[str, Any]) -> bool:
+        if self._writer is None or self.closed.is_set():
+            return False
+        try:
+            await write_frame(self._writer, frame)
+            return True
+        except (ConnectionError, RuntimeError) as e:
+            logger.warning(f"Worker {self.shard} could not reach the broker: {e}")
+            return False
+
+    async def publish_inbound(self, msg: InboundMessage) -> bool:
+        """Send a message (e.g. a subagent announcement) to the broker for logging and routing."""
+        return await self._send({"t": "in", "msg": msg.to_dict()})
+
+    async def publish_outbound(self, msg: OutboundMessage) -> bool:
+        """Send a response to the broker, which hands it to the channels."""
+        return await self._send({"t": "out", "msg": msg.to_dict()})
+
+    def ack_inbound(self, msg: InboundMessage) -> None:
+        seqs = [seq for seq in msg.metadata.get("_wal_seqs") or [msg.metadata.get("_wal_seq")] if seq is not None]
+        if seqs and self._writer is not None and not self.closed.is_set():
+            body = codec.dumpb({"t": "ack", "seqs": seqs})
+            self._writer.write(_HEADER.pack(len(body)) + body)  # flushed by the next drain
+
+    async def replay_inbound(self) -> int:
+        return 0  # the broker owns the inbound log
+
+    def close(self) -> None:
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class WorkerPool:
+    """Runs one `nanobot worker` process per shard and restarts any that exit."""
+
+    def __init__(self, socket_path: Path, workers: int, restart_delay: float = 1.0, command: list[str] | None = None):
+        self.socket_path = socket_path
+        self.workers = workers
+        self.restart_delay = restart_delay
+        self.command = command or [sys.executable, "-m", "nanobot", "worker"]
+        self.restarts = 0
+        self._procs: dict[int, asyncio.subprocess.Process] = {}
+        self._running = False
+
+    async def run(self) -> None:
+        self._running = True
+        await asyncio.gather(*(self._supervise(shard) for shard in range(self.workers)))
+
+    async def _supervise(self, shard: int) -> None:
+        while self._running:
+            proc = await asyncio.create_subprocess_exec(
+                *self.command, "--socket", str(self.socket_path), "--shard", str(shard),
+            )
+            self._procs[shard] = proc
+            code = await proc.wait()
+            if not self._running:
+                return
+            self.restarts += 1
+            logger.warning(f"Worker {shard} exited with code {code}, restarting in {self.restart_delay}s")
+            await asyncio.sleep(self.restart_delay)
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Ask the workers to shut down (SIGTERM), killing any that do not exit within the timeout."""
+        self._running = False
+        procs = [proc for proc in self._procs.values() if proc.returncode is None]
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            try:
+                await asyncio.wait_for(proc.wait(), timeout)
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
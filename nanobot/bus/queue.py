@@ -1,81 +1,335 @@
 """Async message queue for decoupled channel-agent communication."""
 
 import asyncio
-from typing import Callable, Awaitable
+import time
+from collections import deque
+from typing import Any, Callable, Awaitable, Generic, TypeVar
 
 from loguru import logger
 
 from nanobot.bus.events import InboundMessage, OutboundMessage
+from nanobot.bus.wal import InboundLog
+
+T = TypeVar("T")
+
+# Priority lanes, highest first
+LANES = ("interactive", "system", "scheduled")
+DEFAULT_LANE_WEIGHTS = {"interactive": 4, "system": 2, "scheduled": 1}
+OVERFLOW_POLICIES = ("block", "drop_oldest", "reject")
+
+
+class LaneQueue(Generic[T]):
+    """
+    Bounded queue with priority lanes and weighted scheduling.
+
+    Each lane is a FIFO with its own capacity, so a flood in one lane
+    cannot crowd the others out. get() picks among non-empty lanes by
+    smooth weighted round-robin: with weights 4/2/1, a saturated
+    interactive lane gets four of every seven slots and the lower lanes
+    are never starved outright.
+
+    When a lane is full, the overflow policy decides what a put() does:
+    "block" waits for room, "drop_oldest" discards the lane's oldest item,
+    and "reject" refuses the new item (put() returns False).
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 0,
+        overflow: str = "block",
+        weights: dict[str, int] | None = None,
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {overflow!r} (expected one of {', '.join(OVERFLOW_POLICIES)})")
+        self.maxsize = maxsize  # per lane; 0 = unbounded
+        self.overflow = overflow
+        self.weights = {lane: max(1, (weights or DEFAULT_LANE_WEIGHTS).get(lane, 1)) for lane in LANES}
+        self._lanes: dict[str, deque[tuple[float, T]]] = {lane: deque() for lane in LANES}
+        self._credit = {lane: 0 for lane in LANES}
+        self._not_empty = asyncio.Event()
+        self._not_full = {lane: asyncio.Event() for lane in LANES}
+        self.on_drop: Callable[[T], None] | None = None  # called with items discarded by drop_oldest
+        self._put_waiters: list[asyncio.Event] = []
+        self._stats = {
+            lane: {"enqueued": 0, "dequeued": 0, "dropped": 0, "rejected": 0, "wait_ms_total": 0.0, "wait_ms_max": 0.0}
+            for lane in LANES
+        }
+
+    async def put(self, item: T, lane: str = "interactive") -> bool:
+        """Queue an item on a lane, applying the overflow policy. Returns False if rejected."""
+        queue = self._lanes[lane]
+        while self.maxsize and len(queue) >= self.maxsize and self.overflow == "block":
+            self._not_full[lane].clear()
+            await self._not_full[lane].wait()
+        return self.put_nowait(item, lane)
+
+    def put_nowait(self, item: T, lane: str = "interactive") -> bool:
+        """Queue an item without waiting; a full "block" lane rejects instead."""
+        queue = self._lanes[lane]
+        stats = self._stats[lane]
+        if self.maxsize and len(queue) >= self.maxsize:
+            if self.overflow != "drop_oldest":
+                stats["rejected"] += 1
+                return False
+            _, dropped = queue.popleft()
+            stats["dropped"] += 1
+            if self.on_drop is not None:
+                self.on_drop(dropped)
+        queue.append((time.monotonic(), item))
+        stats["enqueued"] += 1
+        self._not_empty.set()
+        waiters, self._put_waiters = self._put_waiters, []
+        for event in waiters:
+            event.set()
+        return True
+
+    def next_put(self) -> asyncio.Event:
+        """An event set by the next successful put (register before checking the queue)."""
+        event = asyncio.Event()
+        self._put_waiters.append(event)
+        return event
+
+    def take_where(self, predicate: Callable[[T], bool]) -> list[T]:
+        """Remove and return every queued item matching predicate, oldest first, outside the lane schedule."""
+        taken: list[tuple[float, str, T]] = []
+        now = time.monotonic()
+        for lane, queue in self._lanes.items():
+            if not any(predicate(item) for _, item in queue):
+                continue
+            kept = deque()
+            for enqueued_at, item in queue:
+                if predicate(item):
+                    taken.append((enqueued_at, lane, item))
+                else:
+                    kept.append((enqueued_at, item))
+            self._lanes[lane] = kept
+            self._not_full[lane].set()
+        taken.sort(key=lambda entry: entry[0])
+        for enqueued_at, lane, _ in taken:
+            stats = self._stats[lane]
+            wait_ms = (now - enqueued_at) * 1000
+            stats["dequeued"] += 1
+            stats["wait_ms_total"] += wait_ms
+            stats["wait_ms_max"] = max(stats["wait_ms_max"], wait_ms)
+        return [item for _, _, item in taken]
+
+    async def get(self) -> T:
+        """Take the next item (blocks until one is available)."""
+        while not self.qsize():
+            self._not_empty.clear()
+            await self._not_empty.wait()
+        return self.get_nowait()
+
+    def get_nowait(self) -> T:
+        """Take the next item by weighted round-robin over the non-empty lanes."""
+        ready = [lane for lane in LANES if self._lanes[lane]]
+        if not ready:
+            raise asyncio.QueueEmpty
+        for lane in ready:
+            self._credit[lane] += self.weights[lane]
+        lane = max(ready, key=lambda name: self._credit[name])
+        self._credit[lane] -= sum(self.weights[name] for name in ready)
+        if len(ready) == 1:
+            self._credit[lane] = 0  # no competition: don't bank credit
+
+        enqueued_at, item = self._lanes[lane].popleft()
+        wait_ms = (time.monotonic() - enqueued_at) * 1000
+        stats = self._stats[lane]
+        stats["dequeued"] += 1
+        stats["wait_ms_total"] += wait_ms
+        stats["wait_ms_max"] = max(stats["wait_ms_max"], wait_ms)
+        self._not_full[lane].set()
+        return item
+
+    def qsize(self) -> int:
+        return sum(len(queue) for queue in self._lanes.values())
+
+    def depth(self, lane: str) -> int:
+        return len(self._lanes[lane])
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Per-lane depth, counters and queue wait times."""
+        now = time.monotonic()
+        result = {}
+        for lane in LANES:
+            queue = self._lanes[lane]
+            stats = self._stats[lane]
+            result[lane] = {
+                "depth": len(queue),
+                "enqueued": stats["enqueued"],
+                "dequeued": stats["dequeued"],
+                "dropped": stats["dropped"],
+                "rejected": stats["rejected"],
+                "wait_ms_avg": round(stats["wait_ms_total"] / stats["dequeued"], 2) if stats["dequeued"] else 0.0,
+                "wait_ms_max": round(stats["wait_ms_max"], 2),
+                "oldest_ms": round((now - queue[0][0]) * 1000, 2) if queue else 0.0,
+            }
+        return result
 
 
 class MessageBus:
     """
     Async message bus that decouples chat channels from the agent core.
-    
+
     Channels push messages to the inbound queue, and the agent processes
-    them and pushes responses to the outbound queue.
+    them and pushes responses to the outbound queue. Both queues are
+    bounded LaneQueues: human conversations ride the "interactive" lane,
+    subagent announcements (channel "system") the "system" lane, and
+    cron/heartbeat output or bulk channels the "scheduled" lane.
     """
-    
-    def __init__(self):
-        self.inbound: asyncio.Queue[InboundMessage] = asyncio.Queue()
-        self.outbound: asyncio.Queue[OutboundMessage] = asyncio.Queue()
+
+    def __init__(
+        self,
+        inbound_capacity: int = 0,
+        outbound_capacity: int = 0,
+        overflow: str = "block",
+        lane_weights: dict[str, int] | None = None,
+        channel_lanes: dict[str, str] | None = None,
+        wal: InboundLog | None = None,
+    ):
+        """
+        Args:
+            inbound_capacity: Max queued inbound messages per lane (0 = unbounded).
+            outbound_capacity: Max queued outbound messages per lane (0 = unbounded).
+            overflow: Full-lane policy: "block", "drop_oldest" or "reject".
+            lane_weights: Scheduling weight per lane.
+            channel_lanes: Lane overrides per channel name (e.g. {"email": "scheduled"}).
+            wal: Optional write-ahead log that makes inbound messages survive restarts.
+        """
+        for channel, lane in (channel_lanes or {}).items():
+            if lane not in LANES:
+                raise ValueError(f"Unknown lane {lane!r} for channel {channel!r}")
+        self.inbound: LaneQueue[InboundMessage] = LaneQueue(inbound_capacity, overflow, lane_weights)
+        self.outbound: LaneQueue[OutboundMessage] = LaneQueue(outbound_capacity, overflow, lane_weights)
+        self.channel_lanes = dict(channel_lanes or {})
+        self.wal = wal
+        self.inbound.on_drop = self.ack_inbound
         self._outbound_subscribers: dict[str, list[Callable[[OutboundMessage], Awaitable[None]]]] = {}
         self._running = False
-    
-    async def publish_inbound(self, msg: InboundMessage) -> None:
-        """Publish a message from a channel to the agent."""
-        await self.inbound.put(msg)
-    
+        self._dispatch_task: asyncio.Task | None = None
+
+    def lane_of(self, msg: InboundMessage | OutboundMessage) -> str:
+        """Priority lane for a message: explicit metadata["lane"], then channel mapping."""
+        lane = msg.metadata.get("lane")
+        if lane in LANES:
+            return lane
+        if msg.channel in self.channel_lanes:
+            return self.channel_lanes[msg.channel]
+        return "system" if msg.channel == "system" else "interactive"
+
+    async def publish_inbound(self, msg: InboundMessage) -> bool:
+        """
+        Publish a message from a channel to the agent.
+
+        Returns False if the message was a logged duplicate or its lane rejected it.
+        """
+        if self.wal is not None:
+            seq = self.wal.append(msg)
+            if seq is None:
+                logger.info(f"Skipping duplicate message {msg.metadata.get('message_id')} from {msg.channel}:{msg.chat_id}")
+                return False
+            msg.metadata["_wal_seq"] = seq
+        lane = self.lane_of(msg)
+        if not await self.inbound.put(msg, lane):
+            logger.warning(f"Inbound {lane} lane full, rejected message from {msg.channel}:{msg.chat_id}")
+            self.ack_inbound(msg)
+            return False
+        return True
+
+    def ack_inbound(self, msg: InboundMessage) -> None:
+        """Mark an inbound message (or every message merged into it) as fully processed."""
+        if self.wal is None:
+            return
+        seqs = msg.metadata.get("_wal_seqs") or [msg.metadata.get("_wal_seq")]
+        for seq in seqs:
+            if seq is not None:
+                self.wal.ack(seq)
+
+    async def replay_inbound(self) -> int:
+        """Queue messages logged but not processed before the last shutdown. Returns the count."""
+        if self.wal is None:
+            return 0
+        pending = self.wal.pending()
+        for seq, msg in pending:
+            msg.metadata["_wal_seq"] = seq
+            msg.metadata["replayed"] = True
+            await self.inbound.put(msg, self.lane_of(msg))
+        if pending:
+            logger.info(f"Replayed {len(pending)} inbound message(s) from the write-ahead log")
+        return len(pending)
+
     async def consume_inbound(self) -> InboundMessage:
         """Consume the next inbound message (blocks until available)."""
         return await self.inbound.get()
-    
-    async def publish_outbound(self, msg: OutboundMessage) -> None:
-        """Publish a response from the agent to channels."""
-        await self.outbound.put(msg)
-    
+
+    async def publish_outbound(self, msg: OutboundMessage) -> bool:
+        """Publish a response from the agent to channels. Returns False if the lane rejected it."""
+        lane = self.lane_of(msg)
+        if not await self.outbound.put(msg, lane):
+            logger.warning(f"Outbound {lane} lane full, rejected message to {msg.channel}:{msg.chat_id}")
+            return False
+        return True
+
     async def consume_outbound(self) -> OutboundMessage:
         """Consume the next outbound message (blocks until available)."""
         return await self.outbound.get()
-    
+
     def subscribe_outbound(
-        self, 
-        channel: str, 
+        self,
+        channel: str,
         callback: Callable[[OutboundMessage], Awaitable[None]]
     ) -> None:
         """Subscribe to outbound messages for a specific channel."""
         if channel not in self._outbound_subscribers:
             self._outbound_subscribers[channel] = []
         self._outbound_subscribers[channel].append(callback)
-    
+
     async def dispatch_outbound(self) -> None:
         """
         Dispatch outbound messages to subscribed channels.
         Run this as a background task.
         """
         self._running = True
-        while self._running:
-            try:
-                msg = await asyncio.wait_for(self.outbound.get(), timeout=1.0)
+        self._dispatch_task = asyncio.current_task()
+        try:
+            while self._running:
+                msg = await self.outbound.get()
                 subscribers = self._outbound_subscribers.get(msg.channel, [])
                 for callback in subscribers:
                     try:
                         await callback(msg)
                     except Exception as e:
                         logger.error(f"Error dispatching to {msg.channel}: {e}")
-            except asyncio.TimeoutError:
-                continue
-    
+        except asyncio.CancelledError:
+            if self._running:
+                raise  # cancelled from outside, not by stop()
+        finally:
+            self._dispatch_task = None
+
     def stop(self) -> None:
-        """Stop the dispatcher loop."""
+        """Stop the dispatcher loop (wakes it if it is waiting for a message)."""
         self._running = False
-    
+        if self._dispatch_task and self._dispatch_task is not asyncio.current_task():
+            self._dispatch_task.cancel()
+
     @property
     def inbound_size(self) -> int:
         """Number of pending inbound messages."""
         return self.inbound.qsize()
-    
+
     @property
     def outbound_size(self) -> int:
         """Number of pending outbound messages."""
         return self.outbound.qsize()
+
+    def close(self) -> None:
+        """Close the inbound log, if any."""
+        if self.wal is not None:
+            self.wal.close()
+
+    def stats(self) -> dict[str, Any]:
+        """Per-lane depth and wait times of both queues, for monitoring."""
+        stats = {"inbound": self.inbound.stats(), "outbound": self.outbound.stats()}
+        if self.wal is not None:
+            stats["wal"] = self.wal.stats()
+        return stats
@@ -0,0 +1,185 @@
+"""Write-ahead log for inbound bus messages."""
+
+from __future__ import annotations
+
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+from nanobot.bus.events import InboundMessage
+from nanobot.utils import codec
+
+_SEGMENT_GLOB = "inbound-*.wal"
+_ACKS_FILE = "acks.json"
+
+
+def _segment_name(first_seq: int) -> str:
+    return f"inbound-{first_seq:012d}.wal"
+
+
+def idempotency_key(msg: InboundMessage) -> str | None:
+    """Key identifying a platform message (from its channel message ID), if it has one."""
+    message_id = msg.metadata.get("message_id")
+    if message_id in (None, ""):
+        return None
+    return f"{msg.channel}:{msg.chat_id}:{message_id}"
+
+
+class InboundLog:
+    """
+    Segmented, append-only log of inbound messages.
+
+    Every published message is appended (and by default fsynced) before it
+    is queued, and acknowledged once the agent has finished with it. Acks
+    are kept as a watermark (every sequence number at or below it is done)
+    plus the done numbers above it, since session lanes finish out of
+    order; they are rewritten atomically to acks.json. A segment is deleted
+    once all of its records are below the watermark.
+
+    After a restart, pending() returns the messages that were logged but
+    never acknowledged, for replay. Messages carrying a platform message ID
+    are deduplicated against the records still on disk, so a redelivered
+    message does not start a second turn.
+    """
+
+    def __init__(self, log_dir: Path, segment_bytes: int = 4 * 1024 * 1024, fsync: bool = True):
+        self.log_dir = log_dir
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        log_dir.mkdir(parents=True, exist_ok=True)
+
+        self._watermark = 0
+        self._done: set[int] = set()
+        self._pending: OrderedDict[int, InboundMessage] = OrderedDict()
+        self._keys: dict[str, Path] = {}  # idempotency key -> segment holding it
+        self._segments: OrderedDict[Path, int] = OrderedDict()  # segment -> last seq in it
+        self._file: Any = None
+        self._file_path: Path | None = None
+        self.appended = 0
+        self.duplicates = 0
+        self._load()
+
+    # ---- startup ----------------------------------------------------------
+
+    def _load(self) -> None:
+        acks_path = self.log_dir / _ACKS_FILE
+        if acks_path.exists():
+            try:
+                acks = codec.loads(acks_path.read_bytes())
+                self._watermark = acks.get("watermark", 0)
+                self._done = set(acks.get("done", []))
+            except (codec.JSONDecodeError, OSError) as e:
+                logger.warning(f"Unreadable inbound log acks, replaying everything on disk: {e}")
+
+        last_seq = self._watermark
+        for path in sorted(self.log_dir.glob(_SEGMENT_GLOB)):
+            segment_last = 0
+            with open(path, "rb") as f:
+                for raw in f:
+                    try:
+                        record = codec.loads(raw)
+                    except codec.JSONDecodeError:
+                        continue  # torn append from a crash
+                    seq = record["seq"]
+                    segment_last = max(segment_last, seq)
+                    if record.get("key"):
+                        self._keys[record["key"]] = path
+                    if seq > self._watermark and seq not in self._done:
+                        self._pending[seq] = InboundMessage.from_dict(record["msg"])
+            self._segments[path] = segment_last
+            last_seq = max(last_seq, segment_last)
+        self._next_seq = last_seq + 1
+        if self._pending:
+            logger.info(f"Inbound log has {len(self._pending)} unprocessed message(s) to replay")
+
+    # ---- writes -----------------------------------------------------------
+
+    def append(self, msg: InboundMessage) -> int | None:
+        """Durably log a message. Returns its sequence number, or None for a duplicate."""
+        key = idempotency_key(msg)
+        if key is not None and key in self._keys:
+            self.duplicates += 1
+            return None
+        seq = self._next_seq
+        self._next_seq += 1
+        line = codec.dumpb({"seq": seq, "key": key, "msg": msg.to_dict()}, default=str) + b"\n"
+
+        f = self._segment_for(seq)
+        f.write(line)
+        f.flush()
+        if self.fsync:
+            os.fsync(f.fileno())
+        self._segments[self._file_path] = seq
+        if key is not None:
+            self._keys[key] = self._file_path
+        self._pending[seq] = msg
+        self.appended += 1
+        return seq
+
+    def _segment_for(self, seq: int) -> Any:
+        """The open segment, rotated to a new file once it reaches segment_bytes."""
+        if self._file is not None and self._file.tell() >= self.segment_bytes:
+            self._file.close()
+            self._file = None
+        if self._file is None:
+            self._file_path = self.log_dir / _segment_name(seq)
+            self._file = open(self._file_path, "ab")
+            self._segments.setdefault(self._file_path, seq)
+        return self._file
+
+    def ack(self, seq: int) -> None:
+        """Mark a message as processed; advances the watermark and drops finished segments."""
+        if seq <= self._watermark or seq in self._done:
+            return
+        self._pending.pop(seq, None)
+        self._done.add(seq)
+        while self._watermark + 1 in self._done:
+            self._watermark += 1
+            self._done.discard(self._watermark)
+        self._write_acks()
+        self._drop_segments()
+
+    def _write_acks(self) -> None:
+        path = self.log_dir / _ACKS_FILE
+        tmp = path.with_suffix(".json.tmp")
+        with open(tmp, "wb") as f:
+            f.write(codec.dumpb({"watermark": self._watermark, "done": sorted(self._done)}))
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def _drop_segments(self) -> None:
+        dropped = set()
+        for path, last in list(self._segments.items()):
+            if path == self._file_path or last > self._watermark:
+                break
+            del self._segments[path]
+            path.unlink(missing_ok=True)
+            dropped.add(path)
+        if dropped:
+            # Keys are remembered only as long as their records are on disk
+            self._keys = {key: path for key, path in self._keys.items() if path not in dropped}
+
+    # ---- reads ------------------------------------------------------------
+
+    def pending(self) -> list[tuple[int, InboundMessage]]:
+        """Logged but unacknowledged messages, oldest first."""
+        return list(self._pending.items())
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "pending": len(self._pending),
+            "watermark": self._watermark,
+            "segments": len(self._segments),
+            "appended": self.appended,
+            "duplicates": self.duplicates,
+        }
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
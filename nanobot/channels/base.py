@@ -1,5 +1,6 @@
 """Base channel interface for chat platforms."""
 
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Any
 
@@ -7,6 +8,7 @@ from loguru import logger
 
 from nanobot.bus.events import InboundMessage, OutboundMessage
 from nanobot.bus.queue import MessageBus
+from nanobot.utils import tracing
 
 
 class BaseChannel(ABC):
@@ -18,6 +20,7 @@ class BaseChannel(ABC):
     """
     
     name: str = "base"
+    supports_streaming: bool = False  # Can edit a draft in place (OutboundMessage metadata "_stream")
     
     def __init__(self, config: Any, bus: MessageBus):
         """
@@ -29,7 +32,32 @@ class BaseChannel(ABC):
         """
         self.config = config
         self.bus = bus
+        self._stop_event = asyncio.Event()
         self._running = False
+
+    @property
+    def _running(self) -> bool:
+        return not self._stop_event.is_set()
+
+    @_running.setter
+    def _running(self, value: bool) -> None:
+        # Setting _running = False (in stop()) wakes everything parked on the stop event
+        if value:
+            self._stop_event.clear()
+        else:
+            self._stop_event.set()
+
+    async def _wait_until_stopped(self) -> None:
+        """Park start() until stop() is called, without periodic wakeups."""
+        await self._stop_event.wait()
+
+    async def _sleep_unless_stopped(self, seconds: float) -> bool:
+        """Sleep for a retry or poll delay; returns True early if stop() is called."""
+        try:
+            await asyncio.wait_for(self._stop_event.wait(), seconds)
+            return True
+        except asyncio.TimeoutError:
+            return False
     
     @abstractmethod
     async def start(self) -> None:
@@ -110,16 +138,18 @@ class BaseChannel(ABC):
             )
             return
         
-        msg = InboundMessage(
-            channel=self.name,
-            sender_id=str(sender_id),
-            chat_id=str(chat_id),
-            content=content,
-            media=media or [],
-            metadata=metadata or {}
-        )
-        
-        await self.bus.publish_inbound(msg)
+        # The trace starts here and travels with the message through the bus
+        with tracing.span("channel.receive", channel=self.name, chat_id=str(chat_id)) as span:
+            msg = InboundMessage(
+                channel=self.name,
+                sender_id=str(sender_id),
+                chat_id=str(chat_id),
+                content=content,
+                media=media or [],
+                metadata=metadata or {}
+            )
+            msg.metadata[tracing.TRACE_KEY] = {**span.context(), "received_at": span.start}
+            await self.bus.publish_inbound(msg)
     
     @property
     def is_running(self) -> bool:
@@ -145,7 +145,7 @@ class DingTalkChannel(BaseChannel):
                     logger.warning(f"DingTalk stream error: {e}")
                 if self._running:
                     logger.info("Reconnecting DingTalk stream in 5 seconds...")
-                    await asyncio.sleep(5)
+                    await self._sleep_unless_stopped(5)
 
         except Exception as e:
             logger.exception(f"Failed to start DingTalk channel: {e}")
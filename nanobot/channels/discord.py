@@ -23,6 +23,7 @@ class DiscordChannel(BaseChannel):
     """Discord channel using Gateway websocket."""
 
     name = "discord"
+    supports_streaming = True
 
     def __init__(self, config: DiscordConfig, bus: MessageBus):
         super().__init__(config, bus)
@@ -32,6 +33,7 @@ class DiscordChannel(BaseChannel):
         self._heartbeat_task: asyncio.Task | None = None
         self._typing_tasks: dict[str, asyncio.Task] = {}
         self._http: httpx.AsyncClient | None = None
+        self._drafts: dict[str, str] = {}  # stream id -> message id of the draft being edited
 
     async def start(self) -> None:
         """Start the Discord gateway connection."""
@@ -54,7 +56,7 @@ class DiscordChannel(BaseChannel):
                 logger.warning(f"Discord gateway error: {e}")
                 if self._running:
                     logger.info("Reconnecting to Discord gateway in 5 seconds...")
-                    await asyncio.sleep(5)
+                    await self._sleep_unless_stopped(5)
 
     async def stop(self) -> None:
         """Stop the Discord channel."""
@@ -80,8 +82,20 @@ class DiscordChannel(BaseChannel):
 
         url = f"{DISCORD_API_BASE}/channels/{msg.chat_id}/messages"
         payload: dict[str, Any] = {"content": msg.content}
-
-        if msg.reply_to:
+        method = "POST"
+
+        # Streamed drafts: post once, then PATCH the same message
+        stream = (msg.metadata or {}).get("_stream")
+        final = not stream or bool(stream.get("final"))
+        sid = stream.get("id", "") if stream else ""
+        if stream:
+            draft_id = self._drafts.pop(sid, None) if final else self._drafts.get(sid)
+            if not final:
+                payload["content"] = msg.content[:2000]
+            if draft_id:
+                method, url = "PATCH", f"{url}/{draft_id}"
+
+        if msg.reply_to and method == "POST":
             payload["message_reference"] = {"message_id": msg.reply_to}
             payload["allowed_mentions"] = {"replied_user": False}
 
@@ -90,7 +104,7 @@ class DiscordChannel(BaseChannel):
         try:
             for attempt in range(3):
                 try:
-                    response = await self._http.post(url, headers=headers, json=payload)
+                    response = await self._http.request(method, url, headers=headers, json=payload)
                     if response.status_code == 429:
                         data = response.json()
                         retry_after = float(data.get("retry_after", 1.0))
@@ -98,6 +112,8 @@ class DiscordChannel(BaseChannel):
                         await asyncio.sleep(retry_after)
                         continue
                     response.raise_for_status()
+                    if not final and method == "POST":
+                        self._drafts[sid] = response.json().get("id")
                     return
                 except Exception as e:
                     if attempt == 2:
@@ -105,7 +121,8 @@ class DiscordChannel(BaseChannel):
                     else:
                         await asyncio.sleep(1)
         finally:
-            await self._stop_typing(msg.chat_id)
+            if final:
+                await self._stop_typing(msg.chat_id)
 
     async def _gateway_loop(self) -> None:
         """Main gateway loop: identify, heartbeat, dispatch events."""
@@ -96,7 +96,8 @@ class EmailChannel(BaseChannel):
             except Exception as e:
                 logger.error(f"Email polling error: {e}")
 
-            await asyncio.sleep(poll_seconds)
+            if await self._sleep_unless_stopped(poll_seconds):
+                break
 
     async def stop(self) -> None:
         """Stop polling loop."""
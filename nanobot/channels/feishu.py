@@ -162,8 +162,7 @@ class FeishuChannel(BaseChannel):
         logger.info("No public IP required - using WebSocket to receive events")
         
         # Keep running until stopped
-        while self._running:
-            await asyncio.sleep(1)
+        await self._wait_until_stopped()
     
     async def stop(self) -> None:
         """Stop the Feishu bot."""
@@ -3,6 +3,8 @@
 from __future__ import annotations
 
 import asyncio
+import time
+from collections import deque
 from typing import Any
 
 from loguru import logger
@@ -11,6 +13,95 @@ from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
 from nanobot.config.schema import Config
+from nanobot.utils import tracing
+
+
+class ChannelOutbox:
+    """
+    Outbound queue and send workers for one channel.
+
+    Messages are queued per chat and each chat is drained by its own task,
+    so delivery to a chat stays in order while different chats send
+    concurrently, up to the channel's concurrency limit. A channel that is
+    slow or hung only backs up its own outbox; once it holds capacity
+    messages, new ones are dropped rather than stalling the dispatcher.
+    """
+
+    def __init__(self, name: str, channel: BaseChannel, capacity: int = 1000, concurrency: int = 1):
+        self.name = name
+        self.channel = channel
+        self.capacity = capacity  # 0 = unbounded
+        self._chats: dict[str, deque[OutboundMessage]] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._slots = asyncio.Semaphore(max(1, concurrency))
+        self._queued = 0
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self._send_ms_total = 0.0
+        self._send_ms_max = 0.0
+
+    def put(self, msg: OutboundMessage) -> bool:
+        """Queue a message for delivery. Returns False if the outbox is full."""
+        if self.capacity and self._queued >= self.capacity:
+            self.dropped += 1
+            logger.error(f"Outbox for {self.name} is full ({self._queued} queued), dropping message to {msg.chat_id}")
+            return False
+        self._chats.setdefault(msg.chat_id, deque()).append(msg)
+        self._queued += 1
+        if msg.chat_id not in self._tasks:
+            self._tasks[msg.chat_id] = asyncio.create_task(self._run_chat(msg.chat_id))
+        return True
+
+    async def _run_chat(self, chat_id: str) -> None:
+        """Send one chat's messages strictly in order."""
+        queue = self._chats[chat_id]
+        try:
+            while queue:
+                msg = queue[0]
+                async with self._slots:
+                    start = time.monotonic()
+                    trace = msg.metadata.get(tracing.TRACE_KEY) or {}
+                    with tracing.span("channel.send", trace_id=trace.get("trace_id"), parent_id=trace.get("span_id"),
+                                      channel=self.name, chat_id=chat_id) as span:
+                        if "received_at" in trace:
+                            span.set(since_received_ms=round((span.start - trace["received_at"]) * 1000, 3))
+                        try:
+                            await self.channel.send(msg)
+                            self.sent += 1
+                        except Exception as e:
+                            self.failed += 1
+                            span.status = "error"
+                            span.set(error=str(e)[:200])
+                            logger.error(f"Error sending to {self.name}: {e}")
+                    elapsed = (time.monotonic() - start) * 1000
+                self._send_ms_total += elapsed
+                self._send_ms_max = max(self._send_ms_max, elapsed)
+                queue.popleft()
+                self._queued -= 1
+        finally:
+            self._queued -= len(queue)
+            self._chats.pop(chat_id, None)
+            self._tasks.pop(chat_id, None)
+
+    async def close(self) -> None:
+        """Cancel in-flight and queued sends."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> dict[str, Any]:
+        done = self.sent + self.failed
+        return {
+            "queued": self._queued,
+            "chats": len(self._chats),
+            "sent": self.sent,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "send_ms_avg": round(self._send_ms_total / done, 2) if done else 0.0,
+            "send_ms_max": round(self._send_ms_max, 2),
+        }
 
 
 class ChannelManager:
@@ -20,16 +111,27 @@ class ChannelManager:
     Responsibilities:
     - Initialize enabled channels (Telegram, WhatsApp, etc.)
     - Start/stop channels
-    - Route outbound messages
+    - Route outbound messages to a per-channel ChannelOutbox
     """
     
     def __init__(self, config: Config, bus: MessageBus):
         self.config = config
         self.bus = bus
         self.channels: dict[str, BaseChannel] = {}
+        self.outboxes: dict[str, ChannelOutbox] = {}
         self._dispatch_task: asyncio.Task | None = None
         
         self._init_channels()
+        channels_config = config.channels
+        for name, channel in self.channels.items():
+            self.outboxes[name] = ChannelOutbox(
+                name,
+                channel,
+                capacity=channels_config.outbound_capacity,
+                concurrency=channels_config.outbound_concurrency_per_channel.get(
+                    name, channels_config.outbound_concurrency
+                ),
+            )
     
     def _init_channels(self) -> None:
         """Initialize channels based on config."""
@@ -173,6 +275,8 @@ class ChannelManager:
                 await self._dispatch_task
             except asyncio.CancelledError:
                 pass
+        for outbox in self.outboxes.values():
+            await outbox.close()
         
         # Stop all channels
         for name, channel in self.channels.items():
@@ -183,29 +287,20 @@ class ChannelManager:
                 logger.error(f"Error stopping {name}: {e}")
     
     async def _dispatch_outbound(self) -> None:
-        """Dispatch outbound messages to the appropriate channel."""
+        """Hand outbound messages to their channel's outbox (never waits on a send)."""
         logger.info("Outbound dispatcher started")
         
+        # Blocks on the queue while idle; stop_all() cancels the task
         while True:
             try:
-                msg = await asyncio.wait_for(
-                    self.bus.consume_outbound(),
-                    timeout=1.0
-                )
-                
-                channel = self.channels.get(msg.channel)
-                if channel:
-                    try:
-                        await channel.send(msg)
-                    except Exception as e:
-                        logger.error(f"Error sending to {msg.channel}: {e}")
-                else:
-                    logger.warning(f"Unknown channel: {msg.channel}")
-                    
-            except asyncio.TimeoutError:
-                continue
+                msg = await self.bus.consume_outbound()
             except asyncio.CancelledError:
                 break
+            outbox = self.outboxes.get(msg.channel)
+            if outbox:
+                outbox.put(msg)
+            else:
+                logger.warning(f"Unknown channel: {msg.channel}")
     
     def get_channel(self, name: str) -> BaseChannel | None:
         """Get a channel by name."""
@@ -216,7 +311,8 @@ class ChannelManager:
         return {
             name: {
                 "enabled": True,
-                "running": channel.is_running
+                "running": channel.is_running,
+                "outbound": self.outboxes[name].stats(),
             }
             for name, channel in self.channels.items()
         }
@@ -225,3 +321,20 @@ class ChannelManager:
     def enabled_channels(self) -> list[str]:
         """Get list of enabled channel names."""
         return list(self.channels.keys())
+
+    @property
+    def coalesce_windows(self) -> dict[str, float]:
+        """Quiet window in seconds for channels that merge rapid-fire messages."""
+        return {
+            name: channel.config.coalesce_ms / 1000
+            for name, channel in self.channels.items()
+            if getattr(channel.config, "coalesce_ms", 0) > 0
+        }
+
+    @property
+    def streaming_channels(self) -> set[str]:
+        """Names of channels that render token streams as edit-in-place drafts."""
+        return {
+            name for name, channel in self.channels.items()
+            if channel.supports_streaming and getattr(channel.config, "streaming", False)
+        }
@@ -265,8 +265,7 @@ class MochatChannel(BaseChannel):
             await self._ensure_fallback_workers()
 
         self._refresh_task = asyncio.create_task(self._refresh_loop())
-        while self._running:
-            await asyncio.sleep(1)
+        await self._wait_until_stopped()
 
     async def stop(self) -> None:
         """Stop all workers and clean up resources."""
@@ -484,7 +483,8 @@ class MochatChannel(BaseChannel):
     async def _refresh_loop(self) -> None:
         interval_s = max(1.0, self.config.refresh_interval_ms / 1000.0)
         while self._running:
-            await asyncio.sleep(interval_s)
+            if await self._sleep_unless_stopped(interval_s):
+                break
             try:
                 await self._refresh_targets(subscribe_new=self._ws_ready)
             except Exception as e:
@@ -83,7 +83,7 @@ class QQChannel(BaseChannel):
                 logger.warning(f"QQ bot error: {e}")
             if self._running:
                 logger.info("Reconnecting QQ bot in 5 seconds...")
-                await asyncio.sleep(5)
+                await self._sleep_unless_stopped(5)
 
     async def stop(self) -> None:
         """Stop the QQ bot."""
@@ -1,6 +1,5 @@
 """Slack channel implementation using Socket Mode."""
 
-import asyncio
 import re
 from typing import Any
 
@@ -22,6 +21,7 @@ class SlackChannel(BaseChannel):
     """Slack channel using Socket Mode."""
 
     name = "slack"
+    supports_streaming = True
 
     def __init__(self, config: SlackConfig, bus: MessageBus):
         super().__init__(config, bus)
@@ -29,6 +29,7 @@ class SlackChannel(BaseChannel):
         self._web_client: AsyncWebClient | None = None
         self._socket_client: SocketModeClient | None = None
         self._bot_user_id: str | None = None
+        self._drafts: dict[str, str] = {}  # stream id -> ts of the draft being edited
 
     async def start(self) -> None:
         """Start the Slack Socket Mode client."""
@@ -60,8 +61,7 @@ class SlackChannel(BaseChannel):
         logger.info("Starting Slack Socket Mode client...")
         await self._socket_client.connect()
 
-        while self._running:
-            await asyncio.sleep(1)
+        await self._wait_until_stopped()
 
     async def stop(self) -> None:
         """Stop the Slack client."""
@@ -84,11 +84,23 @@ class SlackChannel(BaseChannel):
             channel_type = slack_meta.get("channel_type")
             # Only reply in thread for channel/group messages; DMs don't use threads
             use_thread = thread_ts and channel_type != "im"
-            await self._web_client.chat_postMessage(
+            stream = msg.metadata.get("_stream") if msg.metadata else None
+            if stream:
+                sid = stream.get("id", "")
+                draft_ts = self._drafts.pop(sid, None) if stream.get("final") else self._drafts.get(sid)
+                if draft_ts:
+                    # Edit the streamed draft in place
+                    await self._web_client.chat_update(
+                        channel=msg.chat_id, ts=draft_ts, text=self._to_mrkdwn(msg.content),
+                    )
+                    return
+            response = await self._web_client.chat_postMessage(
                 channel=msg.chat_id,
                 text=self._to_mrkdwn(msg.content),
                 thread_ts=thread_ts if use_thread else None,
             )
+            if stream and not stream.get("final"):
+                self._drafts[stream.get("id", "")] = response.get("ts")
         except Exception as e:
             logger.error(f"Error sending Slack message: {e}")
 
@@ -106,6 +106,7 @@ class TelegramChannel(BaseChannel):
     """
     
     name = "telegram"
+    supports_streaming = True
     
     # Commands registered with Telegram's command menu
     BOT_COMMANDS = [
@@ -126,6 +127,7 @@ class TelegramChannel(BaseChannel):
         self._app: Application | None = None
         self._chat_ids: dict[str, int] = {}  # Map sender_id to chat_id for replies
         self._typing_tasks: dict[str, asyncio.Task] = {}  # chat_id -> typing loop task
+        self._drafts: dict[str, int] = {}  # stream id -> message_id of the draft being edited
     
     async def start(self) -> None:
         """Start the Telegram bot with long polling."""
@@ -180,8 +182,7 @@ class TelegramChannel(BaseChannel):
         )
         
         # Keep running until stopped
-        while self._running:
-            await asyncio.sleep(1)
+        await self._wait_until_stopped()
     
     async def stop(self) -> None:
         """Stop the Telegram bot."""
@@ -216,7 +217,9 @@ class TelegramChannel(BaseChannel):
             logger.warning("Telegram bot not running")
             return
 
-        self._stop_typing(msg.chat_id)
+        stream = (msg.metadata or {}).get("_stream")
+        if not stream or stream.get("final"):
+            self._stop_typing(msg.chat_id)
 
         try:
             chat_id = int(msg.chat_id)
@@ -224,6 +227,9 @@ class TelegramChannel(BaseChannel):
             logger.error(f"Invalid chat_id: {msg.chat_id}")
             return
 
+        if stream and not msg.media and await self._send_stream(chat_id, msg.content, stream):
+            return
+
         # Send media files
         for media_path in (msg.media or []):
             try:
@@ -243,16 +249,66 @@ class TelegramChannel(BaseChannel):
 
         # Send text content
         if msg.content and msg.content != "[empty message]":
-            for chunk in _split_message(msg.content):
+            await self._send_text(chat_id, _split_message(msg.content))
+
+    async def _send_text(self, chat_id: int, chunks: list[str]) -> None:
+        """Send text chunks as HTML, falling back to plain text."""
+        for chunk in chunks:
+            try:
+                html = _markdown_to_telegram_html(chunk)
+                await self._app.bot.send_message(chat_id=chat_id, text=html, parse_mode="HTML")
+            except Exception as e:
+                logger.warning(f"HTML parse failed, falling back to plain text: {e}")
                 try:
-                    html = _markdown_to_telegram_html(chunk)
-                    await self._app.bot.send_message(chat_id=chat_id, text=html, parse_mode="HTML")
-                except Exception as e:
-                    logger.warning(f"HTML parse failed, falling back to plain text: {e}")
-                    try:
-                        await self._app.bot.send_message(chat_id=chat_id, text=chunk)
-                    except Exception as e2:
-                        logger.error(f"Error sending Telegram message: {e2}")
+                    await self._app.bot.send_message(chat_id=chat_id, text=chunk)
+                except Exception as e2:
+                    logger.error(f"Error sending Telegram message: {e2}")
+
+    async def _send_stream(self, chat_id: int, content: str, stream: dict) -> bool:
+        """
+        Create or edit a streamed draft message.
+
+        Drafts are plain text; the final edit is rendered as HTML and any
+        overflow beyond Telegram's limit is sent as follow-up messages.
+        Returns False when there is no draft to edit (caller sends normally).
+        """
+        sid = stream.get("id", "")
+        final = bool(stream.get("final"))
+        message_id = self._drafts.pop(sid, None) if final else self._drafts.get(sid)
+
+        if message_id is None:
+            if final or not content:
+                return False
+            try:
+                sent = await self._app.bot.send_message(chat_id=chat_id, text=content[:4000])
+                self._drafts[sid] = sent.message_id
+            except Exception as e:
+                logger.warning(f"Error sending Telegram draft: {e}")
+            return True
+
+        if not final:
+            try:
+                await self._app.bot.edit_message_text(
+                    chat_id=chat_id, message_id=message_id, text=content[:4000],
+                )
+            except Exception as e:
+                logger.debug(f"Telegram draft edit skipped: {e}")
+            return True
+
+        chunks = _split_message(content) or [""]
+        try:
+            await self._app.bot.edit_message_text(
+                chat_id=chat_id, message_id=message_id,
+                text=_markdown_to_telegram_html(chunks[0]), parse_mode="HTML",
+            )
+        except Exception as e:
+            logger.warning(f"HTML edit failed, falling back to plain text: {e}")
+            try:
+                await self._app.bot.edit_message_text(chat_id=chat_id, message_id=message_id, text=chunks[0])
+            except Exception as e2:
+                logger.debug(f"Telegram final edit skipped: {e2}")
+        await self._send_text(chat_id, chunks[1:])
+        return True
     
     async def _on_start(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle /start command."""
@@ -1,7 +1,6 @@
 """WhatsApp channel implementation using Node.js bridge."""
 
 import asyncio
-import json
 from typing import Any
 
 from loguru import logger
@@ -10,6 +9,7 @@ from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
 from nanobot.config.schema import WhatsAppConfig
+from nanobot.utils import codec
 
 
 class WhatsAppChannel(BaseChannel):
@@ -44,7 +44,7 @@ class WhatsAppChannel(BaseChannel):
                     self._ws = ws
                     # Send auth token if configured
                     if self.config.bridge_token:
-                        await ws.send(json.dumps({"type": "auth", "token": self.config.bridge_token}))
+                        await ws.send(codec.dumps({"type": "auth", "token": self.config.bridge_token}))
                     self._connected = True
                     logger.info("Connected to WhatsApp bridge")
                     
@@ -64,7 +64,7 @@ class WhatsAppChannel(BaseChannel):
                 
                 if self._running:
                     logger.info("Reconnecting in 5 seconds...")
-                    await asyncio.sleep(5)
+                    await self._sleep_unless_stopped(5)
     
     async def stop(self) -> None:
         """Stop the WhatsApp channel."""
@@ -87,15 +87,15 @@ class WhatsAppChannel(BaseChannel):
                 "to": msg.chat_id,
                 "text": msg.content
             }
-            await self._ws.send(json.dumps(payload))
+            await self._ws.send(codec.dumps(payload))
         except Exception as e:
             logger.error(f"Error sending WhatsApp message: {e}")
     
     async def _handle_bridge_message(self, raw: str) -> None:
         """Handle a message from the bridge."""
         try:
-            data = json.loads(raw)
-        except json.JSONDecodeError:
+            data = codec.loads(raw)
+        except codec.JSONDecodeError:
             logger.warning(f"Invalid JSON from bridge: {raw[:100]}")
             return
         
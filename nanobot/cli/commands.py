@@ -282,14 +282,78 @@ This file stores important information that should persist across sessions.
 
 
 def _make_provider(config: Config):
-    """Create the appropriate LLM provider from config."""
+    """Create the LLM provider from config, routed across extra keys and fallback models if any."""
+    from nanobot.providers.routing import RoutingProvider
+
+    backends = _make_backends(config, config.agents.defaults.model, primary=True)
+    for model in config.routing.fallback_models:
+        backends += _make_backends(config, model, primary=False)
+    if len(backends) == 1:
+        return backends[0].provider
+
+    rc = config.routing
+    console.print(f"[green]✓[/green] LLM routing ({rc.strategy}): {', '.join(b.name for b in backends)}")
+    return RoutingProvider(
+        backends,
+        strategy=rc.strategy,
+        failure_threshold=rc.failure_threshold,
+        cooldown=rc.cooldown_s,
+        attempt_timeout=rc.attempt_timeout_s,
+    )
+
+
+def _make_backends(config: Config, model: str, primary: bool):
+    """Routing backends for one model: its provider's main key, then any extra keys."""
+    from nanobot.providers.registry import find_by_name
+    from nanobot.providers.routing import Backend
+
+    if not primary:
+        # Config falls back to any configured key; a fallback must really have its own
+        spec = find_by_name(config.get_provider_name(model))
+        if not spec or not (spec.is_gateway or any(kw in model.lower() for kw in spec.keywords)):
+            console.print(f"[yellow]Warning: No provider configured for fallback model {model}, skipping it[/yellow]")
+            return []
+    provider = _make_model_provider(config, model, required=primary)
+    if provider is None:
+        return []
+    name = f"{config.get_provider_name(model) or 'default'}:{model}"
+    # The primary follows whatever model the caller asks for; fallbacks pin theirs
+    pinned = None if primary else model
+    p = config.get_provider(model)
+    backends = [Backend(name, _schedule(config, provider, p), model=pinned)]
+    for i, key in enumerate(p.extra_api_keys if p else [], 2):
+        extra = _make_model_provider(config, model, api_key=key)
+        backends.append(Backend(f"{name}#{i}", _schedule(config, extra, p), model=pinned))
+    return backends
+
+
+def _schedule(config: Config, provider, p):
+    """Put the rate-limit scheduler in front of one key's provider (if enabled)."""
+    from nanobot.providers.scheduler import ScheduledProvider
+
+    sc = config.scheduler
+    if not sc.enabled:
+        return provider
+    return ScheduledProvider(
+        provider,
+        rpm=p.rpm if p else 0,
+        tpm=p.tpm if p else 0,
+        max_retries=sc.max_retries,
+        backoff_base=sc.backoff_base_s,
+        backoff_max=sc.backoff_max_s,
+        max_retry_after=sc.max_retry_after_s,
+    )
+
+
+def _make_model_provider(config: Config, model: str, api_key: str | None = None, required: bool = True):
+    """Create the provider for one model (None if it has no key and is not required)."""
     from nanobot.providers.litellm_provider import LiteLLMProvider
     from nanobot.providers.openai_codex_provider import OpenAICodexProvider
     from nanobot.providers.custom_provider import CustomProvider
 
-    model = config.agents.defaults.model
     provider_name = config.get_provider_name(model)
     p = config.get_provider(model)
+    api_key = api_key or (p.api_key if p else None)
 
     # OpenAI Codex (OAuth)
     if provider_name == "openai_codex" or model.startswith("openai-codex/"):
@@ -298,22 +362,26 @@ def _make_provider(config: Config):
     # Custom: direct OpenAI-compatible endpoint, bypasses LiteLLM
     if provider_name == "custom":
         return CustomProvider(
-            api_key=p.api_key if p else "no-key",
+            api_key=api_key or "no-key",
             api_base=config.get_api_base(model) or "http://localhost:8000/v1",
             default_model=model,
+            prompt_caching=p.prompt_caching if p else False,
         )
 
 
     from nanobot.providers.registry import find_by_name
     spec = find_by_name(provider_name)
-    if not model.startswith("bedrock/") and not (p and p.api_key) and not (spec and spec.is_oauth):
+    if not model.startswith("bedrock/") and not api_key and not (spec and spec.is_oauth):
+        if not required:
+            console.print(f"[yellow]Warning: No API key for fallback model {model}, skipping it[/yellow]")
+            return None
         console.print("[red]Error: No API key configured.[/red]")
         from nanobot.identity import CONFIG_PATH
         console.print(f"Set one in {CONFIG_PATH} under providers section")
         raise typer.Exit(1)
 
     return LiteLLMProvider(
-        api_key=p.api_key if p else None,
+        api_key=api_key,
         api_base=config.get_api_base(model),
         default_model=model,
         extra_headers=p.extra_headers if p else None,
@@ -321,6 +389,70 @@ def _make_provider(config: Config):
     )
 
 
+def _make_session_manager(config: Config):
+    """Create the session manager with the configured store and cache limits."""
+    from nanobot.session.manager import SessionManager
+    from nanobot.utils.writer import GroupCommitWriter
+
+    defaults = config.agents.defaults
+    writer = GroupCommitWriter(commit_window=defaults.commit_window_ms / 1000) if defaults.background_writes else None
+    return SessionManager(
+        config.workspace_path,
+        max_cached=defaults.session_cache_size,
+        max_cache_bytes=defaults.session_cache_mb * 1024 * 1024,
+        backend=defaults.session_store,
+        writer=writer,
+    )
+
+
+def _make_bus(config: Config, durable: bool = False):
+    """Create the message bus with the configured queue limits and lanes (and inbound log if durable)."""
+    from nanobot.bus.queue import MessageBus
+    from nanobot.bus.wal import InboundLog
+    from nanobot.config.loader import get_data_dir
+
+    wal = None
+    if durable and config.bus.wal:
+        wal = InboundLog(
+            get_data_dir() / "inbound",
+            segment_bytes=config.bus.wal_segment_mb * 1024 * 1024,
+            fsync=config.bus.wal_fsync,
+        )
+    return MessageBus(
+        inbound_capacity=config.bus.inbound_capacity,
+        outbound_capacity=config.bus.outbound_capacity,
+        overflow=config.bus.overflow,
+        lane_weights=config.bus.lane_weights,
+        channel_lanes=config.bus.channel_lanes,
+        wal=wal,
+    )
+
+
+def _configure_tracing(config: Config) -> None:
+    """Apply the tracing config to the process-wide tracer."""
+    from nanobot.config.loader import get_data_dir
+    from nanobot.utils.tracing import tracer
+
+    tc = config.tracing
+    path = Path(tc.path).expanduser() if tc.path else get_data_dir() / "traces" / "spans.jsonl"
+    tracer.configure(enabled=tc.enabled, ring_size=tc.ring_size, sink=tc.sink, path=path)
+
+
+def _configure_http(config: Config) -> None:
+    """Apply the HTTP pool config to the shared clients."""
+    from nanobot.utils.httpclient import http_clients
+
+    hc = config.http
+    http_clients.configure(
+        max_connections=hc.max_connections,
+        max_keepalive_connections=hc.max_keepalive_connections,
+        keepalive_expiry=hc.keepalive_expiry,
+        timeout=hc.timeout,
+        connect_timeout=hc.connect_timeout,
+        http2=hc.http2,
+    )
+
+
 # ============================================================================
 # Gateway / Server
 # ============================================================================
@@ -329,17 +461,18 @@ def _make_provider(config: Config):
 @app.command()
 def gateway(
     port: int = typer.Option(18790, "--port", "-p", help="Gateway port"),
+    workers: int = typer.Option(None, "--workers", "-w", help="Agent worker processes (default: config gateway.workers)"),
     verbose: bool = typer.Option(False, "--verbose", "-v", help="Verbose output"),
 ):
     """Start the nanobot gateway."""
     from nanobot.config.loader import load_config, get_data_dir
-    from nanobot.bus.queue import MessageBus
     from nanobot.agent.loop import AgentLoop
     from nanobot.channels.manager import ChannelManager
-    from nanobot.session.manager import SessionManager
     from nanobot.cron.service import CronService
     from nanobot.cron.types import CronJob
     from nanobot.heartbeat.service import HeartbeatService
+    from nanobot.providers.scheduler import llm_priority
+    from nanobot.utils.httpclient import http_clients
     
     if verbose:
         import logging
@@ -348,9 +481,11 @@ def gateway(
     console.print(f"{__logo__} Starting nanobot gateway on port {port}...")
     
     config = load_config()
-    bus = MessageBus()
+    _configure_tracing(config)
+    _configure_http(config)
+    bus = _make_bus(config, durable=True)
     provider = _make_provider(config)
-    session_manager = SessionManager(config.workspace_path)
+    session_manager = _make_session_manager(config)
     
     # Create cron service first (callback set after agent creation)
     cron_store_path = get_data_dir() / "cron" / "jobs.json"
@@ -366,29 +501,35 @@ def gateway(
         max_tokens=config.agents.defaults.max_tokens,
         max_iterations=config.agents.defaults.max_tool_iterations,
         memory_window=config.agents.defaults.memory_window,
+        context_window_tokens=config.agents.defaults.context_window_tokens,
+        max_concurrent_consolidations=config.agents.defaults.max_concurrent_consolidations,
+        max_parallel_tools=config.agents.defaults.max_parallel_tools,
         brave_api_key=config.tools.web.search.api_key or None,
         exec_config=config.tools.exec,
         cron_service=cron,
         restrict_to_workspace=config.tools.restrict_to_workspace,
         session_manager=session_manager,
         mcp_servers=config.tools.mcp_servers,
+        max_concurrent_sessions=config.agents.defaults.max_concurrent_sessions,
     )
     
     # Set cron callback (needs agent)
     async def on_cron_job(job: CronJob) -> str | None:
         """Execute a cron job through the agent."""
-        response = await agent.process_direct(
-            job.payload.message,
-            session_key=f"cron:{job.id}",
-            channel=job.payload.channel or "cli",
-            chat_id=job.payload.to or "direct",
-        )
+        with llm_priority("scheduled"):
+            response = await agent.process_direct(
+                job.payload.message,
+                session_key=f"cron:{job.id}",
+                channel=job.payload.channel or "cli",
+                chat_id=job.payload.to or "direct",
+            )
         if job.payload.deliver and job.payload.to:
             from nanobot.bus.events import OutboundMessage
             await bus.publish_outbound(OutboundMessage(
                 channel=job.payload.channel or "cli",
                 chat_id=job.payload.to,
-                content=response or ""
+                content=response or "",
+                metadata={"lane": "scheduled"},
             ))
         return response
     cron.on_job = on_cron_job
@@ -396,7 +537,8 @@ def gateway(
     # Create heartbeat service
     async def on_heartbeat(prompt: str) -> str:
         """Execute heartbeat through the agent."""
-        return await agent.process_direct(prompt, session_key="heartbeat")
+        with llm_priority("scheduled"):
+            return await agent.process_direct(prompt, session_key="heartbeat")
     
     heartbeat = HeartbeatService(
         workspace=config.workspace_path,
@@ -407,6 +549,8 @@ def gateway(
     
     # Create channel manager
     channels = ChannelManager(config, bus)
+    agent.stream_channels = channels.streaming_channels
+    agent.coalesce_windows = channels.coalesce_windows
     
     if channels.enabled_channels:
         console.print(f"[green]✓[/green] Channels enabled: {', '.join(channels.enabled_channels)}")
@@ -418,27 +562,161 @@ def gateway(
         console.print(f"[green]✓[/green] Cron: {cron_status['jobs']} scheduled jobs")
     
     console.print(f"[green]✓[/green] Heartbeat: every 30m")
+
+    # With several workers, this process keeps the channels, cron and heartbeat;
+    # chat turns run in worker processes fed by the broker
+    workers = workers or config.gateway.workers
+    broker = pool = None
+    if workers > 1:
+        from nanobot.bus.ipc import BusBroker, WorkerPool
+        broker = BusBroker(
+            bus,
+            get_data_dir() / "gateway.sock",
+            workers,
+            settings={
+                "stream_channels": sorted(channels.streaming_channels),
+                "coalesce_windows": channels.coalesce_windows,
+                "archive_days": config.agents.defaults.session_archive_days,
+            },
+        )
+        pool = WorkerPool(broker.socket_path, workers)
+        console.print(f"[green]✓[/green] Workers: {workers} processes")
+    
+    archive_days = config.agents.defaults.session_archive_days
     
     async def run():
+        archiver = None
         try:
             await cron.start()
             await heartbeat.start()
-            await asyncio.gather(
-                agent.run(),
-                channels.start_all(),
-            )
+            if archive_days > 0:
+                # With workers, this process only writes the cron and heartbeat sessions
+                owns = _is_gateway_session if broker else None
+                archiver = asyncio.create_task(session_manager.run_archiver(archive_days, owns=owns))
+            if broker:
+                # Consolidation for cron and heartbeat runs here; workers resume their own shards
+                _own_consolidation(agent, "gateway", _is_gateway_session)
+                agent.consolidator.resume()
+                await broker.start()
+                await asyncio.gather(broker.run(), pool.run(), channels.start_all())
+            else:
+                await asyncio.gather(
+                    agent.run(),
+                    channels.start_all(),
+                )
         except KeyboardInterrupt:
             console.print("\nShutting down...")
         finally:
+            if archiver:
+                archiver.cancel()
             await agent.close_mcp()
             heartbeat.stop()
             cron.stop()
             agent.stop()
+            if broker:
+                await pool.stop()
+                broker.stop()
             await channels.stop_all()
+            await http_clients.aclose()
+            session_manager.close()
+            bus.close()
     
     asyncio.run(run())
 
 
+def _is_gateway_session(key: str) -> bool:
+    """Sessions the gateway process itself writes (cron jobs and heartbeat run there)."""
+    return key.startswith("cron:") or key == "heartbeat"
+
+
+def _own_consolidation(agent, name: str, owns) -> None:
+    """Give this process its own consolidation queue file, resuming only the sessions it owns."""
+    consolidator = agent.consolidator
+    consolidator.state_path = consolidator.state_path.with_name(f".consolidation_queue.{name}.json")
+    consolidator.owns = owns
+
+
+@app.command(hidden=True)
+def worker(
+    socket: Path = typer.Option(..., "--socket", help="Broker socket"),
+    shard: int = typer.Option(..., "--shard", help="Shard this worker owns"),
+):
+    """Run an agent worker for a multi-process gateway (started by the gateway)."""
+    from nanobot.config.loader import load_config, get_data_dir
+    from nanobot.agent.loop import AgentLoop
+    from nanobot.bus.ipc import RemoteBus, shard_of
+    from nanobot.cron.service import CronService
+    from nanobot.utils.httpclient import http_clients
+
+    config = load_config()
+    _configure_tracing(config)
+    _configure_http(config)
+    bus = RemoteBus(
+        socket,
+        shard,
+        inbound_capacity=config.bus.inbound_capacity,
+        overflow=config.bus.overflow,
+        lane_weights=config.bus.lane_weights,
+        channel_lanes=config.bus.channel_lanes,
+    )
+    provider = _make_provider(config)
+    session_manager = _make_session_manager(config)
+
+    # Jobs added by the cron tool are picked up by the gateway's scheduler
+    cron = CronService(get_data_dir() / "cron" / "jobs.json")
+
+    agent = AgentLoop(
+        bus=bus,
+        provider=provider,
+        workspace=config.workspace_path,
+        model=config.agents.defaults.model,
+        temperature=config.agents.defaults.temperature,
+        max_tokens=config.agents.defaults.max_tokens,
+        max_iterations=config.agents.defaults.max_tool_iterations,
+        memory_window=config.agents.defaults.memory_window,
+        context_window_tokens=config.agents.defaults.context_window_tokens,
+        max_concurrent_consolidations=config.agents.defaults.max_concurrent_consolidations,
+        max_parallel_tools=config.agents.defaults.max_parallel_tools,
+        brave_api_key=config.tools.web.search.api_key or None,
+        exec_config=config.tools.exec,
+        cron_service=cron,
+        restrict_to_workspace=config.tools.restrict_to_workspace,
+        session_manager=session_manager,
+        mcp_servers=config.tools.mcp_servers,
+        max_concurrent_sessions=config.agents.defaults.max_concurrent_sessions,
+    )
+
+    async def run():
+        archiver = None
+        try:
+            await bus.connect()
+            agent.stream_channels = set(bus.settings.get("stream_channels", []))
+            agent.coalesce_windows = bus.settings.get("coalesce_windows", {})
+            # Only this worker writes the sessions of its shard
+            workers = bus.settings["workers"]
+            owns = lambda key: not _is_gateway_session(key) and shard_of(key, workers) == shard
+            _own_consolidation(agent, f"shard{shard}", owns)
+            loop_task = asyncio.create_task(agent.run())
+            archive_days = bus.settings.get("archive_days", 0)
+            if archive_days > 0:
+                archiver = asyncio.create_task(session_manager.run_archiver(archive_days, owns=owns))
+            # The pool stops workers with SIGTERM: shut down like when the gateway goes away,
+            # so sessions are flushed and MCP / HTTP connections closed
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, bus.closed.set)
+            await bus.closed.wait()  # the gateway went away (or restarted), or SIGTERM
+            agent.stop()
+            await loop_task
+        finally:
+            if archiver:
+                archiver.cancel()
+            await agent.close_mcp()
+            await http_clients.aclose()
+            bus.close()
+            session_manager.close()
+
+    asyncio.run(run())
+
+
 # ============================================================================
 # Web UI
 # ============================================================================
@@ -452,9 +730,7 @@ def web(
 ):
     """Start the nanobot web UI."""
     from nanobot.config.loader import load_config
-    from nanobot.bus.queue import MessageBus
     from nanobot.agent.loop import AgentLoop
-    from nanobot.session.manager import SessionManager
 
     if verbose:
         import logging
@@ -466,9 +742,11 @@ def web(
 
     console.print(f"{__logo__} Starting nanobot web UI...")
 
-    bus = MessageBus()
+    _configure_tracing(config)
+    _configure_http(config)
+    bus = _make_bus(config)
     provider = _make_provider(config)
-    session_manager = SessionManager(config.workspace_path)
+    session_manager = _make_session_manager(config)
 
     agent_loop = AgentLoop(
         bus=bus,
@@ -479,6 +757,9 @@ def web(
         max_tokens=config.agents.defaults.max_tokens,
         max_iterations=config.agents.defaults.max_tool_iterations,
         memory_window=config.agents.defaults.memory_window,
+        context_window_tokens=config.agents.defaults.context_window_tokens,
+        max_concurrent_consolidations=config.agents.defaults.max_concurrent_consolidations,
+        max_parallel_tools=config.agents.defaults.max_parallel_tools,
         brave_api_key=config.tools.web.search.api_key or None,
         exec_config=config.tools.exec,
         restrict_to_workspace=config.tools.restrict_to_workspace,
@@ -495,6 +776,7 @@ def web(
 
     import uvicorn
     uvicorn.run(web_app, host=web_host, port=web_port, log_level="info" if verbose else "warning")
+    session_manager.close()
 
 
 # ============================================================================
@@ -511,14 +793,13 @@ def agent(
 ):
     """Interact with the agent directly."""
     from nanobot.config.loader import load_config, get_data_dir
-    from nanobot.bus.queue import MessageBus
     from nanobot.agent.loop import AgentLoop
     from nanobot.cron.service import CronService
     from loguru import logger
     
     config = load_config()
     
-    bus = MessageBus()
+    bus = _make_bus(config)
     provider = _make_provider(config)
 
     # Create cron service for tool usage (no callback needed for CLI unless running)
@@ -539,10 +820,14 @@ def agent(
         max_tokens=config.agents.defaults.max_tokens,
         max_iterations=config.agents.defaults.max_tool_iterations,
         memory_window=config.agents.defaults.memory_window,
+        context_window_tokens=config.agents.defaults.context_window_tokens,
+        max_concurrent_consolidations=config.agents.defaults.max_concurrent_consolidations,
+        max_parallel_tools=config.agents.defaults.max_parallel_tools,
         brave_api_key=config.tools.web.search.api_key or None,
         exec_config=config.tools.exec,
         cron_service=cron,
         restrict_to_workspace=config.tools.restrict_to_workspace,
+        session_manager=_make_session_manager(config),
         mcp_servers=config.tools.mcp_servers,
     )
     
@@ -564,6 +849,7 @@ def agent(
                 response = await agent_loop.process_direct(message, session_id, on_progress=_cli_progress)
             _print_agent_response(response, render_markdown=markdown)
             await agent_loop.close_mcp()
+            agent_loop.sessions.close()
         
         asyncio.run(run_once())
     else:
@@ -606,6 +892,7 @@ def agent(
                         break
             finally:
                 await agent_loop.close_mcp()
+                agent_loop.sessions.close()
         
         asyncio.run(run_interactive())
 
@@ -768,6 +1055,65 @@ def channels_login():
         console.print("[red]npm not found. Please install Node.js.[/red]")
 
 
+# ============================================================================
+# Session Commands
+# ============================================================================
+
+sessions_app = typer.Typer(help="Manage conversation sessions")
+app.add_typer(sessions_app, name="sessions")
+
+
+@sessions_app.command("migrate")
+def sessions_migrate(
+    to: str = typer.Option("sqlite", "--to", help="Target store: jsonl or sqlite"),
+    source: str = typer.Option(None, "--from", help="Source store (default: the configured one)"),
+):
+    """Copy all sessions into another session store."""
+    from nanobot.config.loader import load_config
+    from nanobot.session.manager import make_store, migrate_sessions
+    from nanobot.utils.helpers import ensure_dir
+
+    config = load_config()
+    source = source or config.agents.defaults.session_store
+    if source == to:
+        console.print(f"[red]Source and target are both {to}[/red]")
+        raise typer.Exit(1)
+
+    sessions_dir = ensure_dir(config.workspace_path / "sessions")
+    try:
+        src = make_store(source, sessions_dir, tail_messages=0)
+        dst = make_store(to, sessions_dir, tail_messages=0)
+    except ValueError as e:
+        console.print(f"[red]{e}[/red]")
+        raise typer.Exit(1)
+
+    copied = migrate_sessions(src, dst)
+    src.close()
+    dst.close()
+    console.print(f"[green]✓[/green] Copied {copied} session(s) from {source} to {to}")
+    if config.agents.defaults.session_store != to:
+        console.print(f'Set "sessionStore": "{to}" under agents.defaults to use it')
+
+
+@sessions_app.command("archive")
+def sessions_archive(
+    days: int = typer.Option(None, "--days", "-d", help="Archive sessions idle this many days (default: config)"),
+):
+    """Compress idle sessions into the cold-storage tier."""
+    from nanobot.config.loader import load_config
+
+    config = load_config()
+    days = config.agents.defaults.session_archive_days if days is None else days
+    if days <= 0:
+        console.print("[yellow]Archiving is disabled (sessionArchiveDays is 0); pass --days[/yellow]")
+        raise typer.Exit(1)
+
+    sessions = _make_session_manager(config)
+    archived, reclaimed = sessions.archive_idle(days)
+    sessions.close()
+    console.print(f"[green]✓[/green] Archived {archived} session(s) idle over {days} day(s), reclaimed {reclaimed:,} bytes")
+
+
 # ============================================================================
 # Cron Commands
 # ============================================================================
@@ -955,6 +1301,11 @@ def status():
     console.print(f"Config: {config_path} {'[green]✓[/green]' if config_path.exists() else '[red]✗[/red]'}")
     console.print(f"Workspace: {workspace} {'[green]✓[/green]' if workspace.exists() else '[red]✗[/red]'}")
 
+    if workspace.exists():
+        sessions = _make_session_manager(config)
+        console.print(f"Sessions: {sessions.count_sessions()} ({config.agents.defaults.session_store})")
+        sessions.close()
+
     if config_path.exists():
         from nanobot.providers.registry import PROVIDERS
 
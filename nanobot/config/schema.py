@@ -19,6 +19,7 @@ class WhatsAppConfig(Base):
     bridge_url: str = "ws://localhost:3001"
     bridge_token: str = ""  # Shared token for bridge auth (optional, recommended)
     allow_from: list[str] = Field(default_factory=list)  # Allowed phone numbers
+    coalesce_ms: int = 0  # Merge a chat's rapid-fire messages arriving within this quiet window (0 = off)
 
 
 class TelegramConfig(Base):
@@ -27,7 +28,9 @@ class TelegramConfig(Base):
     enabled: bool = False
     token: str = ""  # Bot token from @BotFather
     allow_from: list[str] = Field(default_factory=list)  # Allowed user IDs or usernames
+    coalesce_ms: int = 0  # Merge a chat's rapid-fire messages arriving within this quiet window (0 = off)
     proxy: str | None = None  # HTTP/SOCKS5 proxy URL, e.g. "http://127.0.0.1:7890" or "socks5://127.0.0.1:1080"
+    streaming: bool = False  # Stream replies by editing a draft message in place
 
 
 class FeishuConfig(Base):
@@ -39,6 +42,7 @@ class FeishuConfig(Base):
     encrypt_key: str = ""  # Encrypt Key for event subscription (optional)
     verification_token: str = ""  # Verification Token for event subscription (optional)
     allow_from: list[str] = Field(default_factory=list)  # Allowed user open_ids
+    coalesce_ms: int = 0  # Merge a chat's rapid-fire messages arriving within this quiet window (0 = off)
 
 
 class DingTalkConfig(Base):
@@ -48,6 +52,7 @@ class DingTalkConfig(Base):
     client_id: str = ""  # AppKey
     client_secret: str = ""  # AppSecret
     allow_from: list[str] = Field(default_factory=list)  # Allowed staff_ids
+    coalesce_ms: int = 0  # Merge a chat's rapid-fire messages arriving within this quiet window (0 = off)
 
 
 class DiscordConfig(Base):
@@ -56,8 +61,10 @@ class DiscordConfig(Base):
     enabled: bool = False
     token: str = ""  # Bot token from Discord Developer Portal
     allow_from: list[str] = Field(default_factory=list)  # Allowed user IDs
+    coalesce_ms: int = 0  # Merge a chat's rapid-fire messages arriving within this quiet window (0 = off)
     gateway_url: str = "wss://gateway.discord.gg/?v=10&encoding=json"
     intents: int = 37377  # GUILDS + GUILD_MESSAGES + DIRECT_MESSAGES + MESSAGE_CONTENT
+    streaming: bool = False  # Stream replies by editing a draft message in place
 
 
 class EmailConfig(Base):
@@ -152,7 +159,9 @@ class SlackConfig(Base):
     react_emoji: str = "eyes"
     group_policy: str = "mention"  # "mention", "open", "allowlist"
     group_allow_from: list[str] = Field(default_factory=list)  # Allowed channel IDs if allowlist
+    coalesce_ms: int = 0  # Merge a chat's rapid-fire messages arriving within this quiet window (0 = off)
     dm: SlackDMConfig = Field(default_factory=SlackDMConfig)
+    streaming: bool = False  # Stream replies by editing a draft message in place
 
 
 class QQConfig(Base):
@@ -162,6 +171,7 @@ class QQConfig(Base):
     app_id: str = ""  # 机器人 ID (AppID) from q.qq.com
     secret: str = ""  # 机器人密钥 (AppSecret) from q.qq.com
     allow_from: list[str] = Field(default_factory=list)  # Allowed user openids (empty = public access)
+    coalesce_ms: int = 0  # Merge a chat's rapid-fire messages arriving within this quiet window (0 = off)
 
 
 class ChannelsConfig(Base):
@@ -176,6 +186,9 @@ class ChannelsConfig(Base):
     email: EmailConfig = Field(default_factory=EmailConfig)
     slack: SlackConfig = Field(default_factory=SlackConfig)
     qq: QQConfig = Field(default_factory=QQConfig)
+    outbound_capacity: int = 1000  # Max queued outbound messages per channel (0 = unbounded)
+    outbound_concurrency: int = 1  # Sends in flight per channel; messages to one chat always stay in order
+    outbound_concurrency_per_channel: dict[str, int] = Field(default_factory=dict)  # Overrides, e.g. {"email": 4}
 
 
 class AgentDefaults(Base):
@@ -186,6 +199,16 @@ class AgentDefaults(Base):
     temperature: float = 0.7
     max_tool_iterations: int = 20
     memory_window: int = 50
+    context_window_tokens: int = 0  # Prompt token budget for history windowing (0 = model's window)
+    max_concurrent_consolidations: int = 1  # Memory consolidation jobs in flight (MEMORY.md is shared)
+    session_cache_size: int = 256  # Sessions kept in memory (LRU)
+    session_cache_mb: int = 64  # Approximate memory cap for cached sessions
+    session_store: str = "jsonl"  # Session storage backend: "jsonl" or "sqlite"
+    background_writes: bool = True  # Persist sessions and memory on a writer thread, off the event loop
+    commit_window_ms: int = 10  # Group-commit window for background writes
+    session_archive_days: int = 30  # Compress sessions idle this many days (0 = never)
+    max_concurrent_sessions: int = 4  # Sessions processed in parallel by the gateway
+    max_parallel_tools: int = 4  # Concurrency-safe tool calls run together within one turn
 
 
 class AgentsConfig(Base):
@@ -200,6 +223,10 @@ class ProviderConfig(Base):
     api_key: str = ""
     api_base: str | None = None
     extra_headers: dict[str, str] | None = None  # Custom headers (e.g. APP-Code for AiHubMix)
+    prompt_caching: bool = False  # Custom endpoints only: send prompt_cache_key / cache_control hints
+    extra_api_keys: list[str] = Field(default_factory=list)  # More keys for this provider, used as failover backends
+    rpm: int = 0  # Requests per minute allowed per key; 0 = unlimited
+    tpm: int = 0  # Tokens (prompt + completion) per minute allowed per key; 0 = unlimited
 
 
 class ProvidersConfig(Base):
@@ -228,6 +255,62 @@ class GatewayConfig(Base):
 
     host: str = "0.0.0.0"
     port: int = 18790
+    workers: int = 1  # Agent worker processes; >1 shards sessions across processes via a local socket
+
+
+class BusConfig(Base):
+    """Message bus queue limits and priority lanes."""
+
+    inbound_capacity: int = 1000  # Max queued inbound messages per lane (0 = unbounded)
+    outbound_capacity: int = 1000  # Max queued outbound messages per lane (0 = unbounded)
+    overflow: str = "block"  # Full-lane policy: "block", "drop_oldest" or "reject"
+    lane_weights: dict[str, int] = Field(
+        default_factory=lambda: {"interactive": 4, "system": 2, "scheduled": 1}
+    )  # Weighted round-robin shares of the interactive, system and scheduled lanes
+    channel_lanes: dict[str, str] = Field(default_factory=dict)  # Lane per channel, e.g. {"email": "scheduled"}
+    wal: bool = False  # Gateway: log inbound messages to disk and replay unprocessed ones after a restart
+    wal_segment_mb: int = 4  # Inbound log segment size before rotating to a new file
+    wal_fsync: bool = True  # fsync each inbound log append (off = survives process crashes, not power loss)
+
+
+class RoutingConfig(Base):
+    """LLM failover across API keys and fallback models."""
+
+    fallback_models: list[str] = Field(default_factory=list)  # Tried in order when the primary model's backends fail
+    strategy: str = "failover"  # "failover" (configured order) or "latency" (lowest EWMA latency x error rate)
+    failure_threshold: int = 3  # Consecutive failures that open a backend's circuit
+    cooldown_s: float = 30.0  # Seconds an open circuit is skipped (doubles per failed probe)
+    attempt_timeout_s: float = 0.0  # Give up on a backend after this long (streams: until first token); 0 = never
+
+
+class SchedulerConfig(Base):
+    """Admission and retries for LLM calls (rate limits are per provider: rpm / tpm)."""
+
+    enabled: bool = True
+    max_retries: int = 3  # Retries of a transient failure (429, 5xx, timeout) before giving up
+    backoff_base_s: float = 1.0  # Jittered exponential backoff: up to base * 2^attempt seconds
+    backoff_max_s: float = 30.0  # Cap on a single backoff
+    max_retry_after_s: float = 60.0  # Longer retry-after hints are not waited out (lets routing fail over)
+
+
+class HttpConfig(Base):
+    """Shared HTTP client pools (web tools, transcription, push, Codex)."""
+
+    max_connections: int = 100  # Open connections per client, across all hosts
+    max_keepalive_connections: int = 20  # Idle connections kept for reuse
+    keepalive_expiry: float = 30.0  # Seconds an idle connection is kept
+    timeout: float = 30.0  # Default request timeout in seconds (call sites may override)
+    connect_timeout: float = 10.0
+    http2: bool = False  # Multiplex requests per host over HTTP/2 (needs the h2 package)
+
+
+class TracingConfig(Base):
+    """Request tracing (spans are always kept in memory for /api/traces when enabled)."""
+
+    enabled: bool = True
+    ring_size: int = 2000  # Most recent spans kept in memory
+    sink: str = ""  # Also append spans to a file: "jsonl" or "otlp" (OTLP/JSON lines)
+    path: str = ""  # Sink file (default: <data dir>/traces/spans.jsonl)
 
 
 class WebAuthConfig(Base):
@@ -290,6 +373,11 @@ class Config(BaseSettings):
     channels: ChannelsConfig = Field(default_factory=ChannelsConfig)
     providers: ProvidersConfig = Field(default_factory=ProvidersConfig)
     gateway: GatewayConfig = Field(default_factory=GatewayConfig)
+    bus: BusConfig = Field(default_factory=BusConfig)
+    routing: RoutingConfig = Field(default_factory=RoutingConfig)
+    scheduler: SchedulerConfig = Field(default_factory=SchedulerConfig)
+    tracing: TracingConfig = Field(default_factory=TracingConfig)
+    http: HttpConfig = Field(default_factory=HttpConfig)
     web: WebConfig = Field(default_factory=WebConfig)
     tools: ToolsConfig = Field(default_factory=ToolsConfig)
 
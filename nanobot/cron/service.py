@@ -1,7 +1,6 @@
 """Cron service for scheduling agent tasks."""
 
 import asyncio
-import json
 import time
 import uuid
 from datetime import datetime
@@ -11,6 +10,7 @@ from typing import Any, Callable, Coroutine
 from loguru import logger
 
 from nanobot.cron.types import CronJob, CronJobState, CronPayload, CronSchedule, CronStore
+from nanobot.utils import codec
 
 
 def _now_ms() -> int:
@@ -66,7 +66,7 @@ class CronService:
         
         if self.store_path.exists():
             try:
-                data = json.loads(self.store_path.read_text())
+                data = codec.loads(self.store_path.read_bytes())
                 jobs = []
                 for j in data.get("jobs", []):
                     jobs.append(CronJob(
@@ -148,7 +148,7 @@ class CronService:
             ]
         }
         
-        self.store_path.write_text(json.dumps(data, indent=2))
+        self.store_path.write_bytes(codec.dumpb(data, indent=True))
     
     async def start(self) -> None:
         """Start the cron service."""
@@ -1,8 +1,12 @@
 """Base LLM provider interface."""
 
+import email.utils
+import time
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from typing import Any
+from typing import Any, AsyncIterator
+
+import json_repair
 
 
 @dataclass
@@ -21,6 +25,8 @@ class LLMResponse:
     finish_reason: str = "stop"
     usage: dict[str, int] = field(default_factory=dict)
     reasoning_content: str | None = None  # Kimi, DeepSeek-R1 etc.
+    status_code: int | None = None  # HTTP status of a failed call, when known
+    retry_after: float | None = None  # Seconds the provider asked us to wait before retrying
     
     @property
     def has_tool_calls(self) -> bool:
@@ -28,6 +34,91 @@ class LLMResponse:
         return len(self.tool_calls) > 0
 
 
+@dataclass
+class LLMStreamChunk:
+    """One increment of a streamed completion.
+
+    Text arrives in ``content`` deltas; the last chunk carries the fully
+    assembled ``response`` (content, tool calls, usage, finish reason).
+    """
+    content: str = ""
+    response: LLMResponse | None = None
+
+
+def error_response(e: Exception, prefix: str = "Error calling LLM") -> LLMResponse:
+    """LLMResponse for a failed call, keeping its HTTP status and any retry-after hint."""
+    status = getattr(e, "status_code", None)
+    try:
+        headers = getattr(e, "litellm_response_headers", None) or getattr(getattr(e, "response", None), "headers", None)
+    except Exception:  # some SDK exceptions raise when no response is attached
+        headers = None
+    return LLMResponse(
+        content=f"{prefix}: {e}",
+        finish_reason="error",
+        status_code=status if isinstance(status, int) else None,
+        retry_after=_retry_after(headers),
+    )
+
+
+def _retry_after(headers: Any) -> float | None:
+    """Seconds from retry-after-ms / retry-after (delta seconds or an HTTP date)."""
+    if not headers:
+        return None
+    try:
+        if (ms := headers.get("retry-after-ms")) is not None:
+            return max(0.0, float(ms) / 1000)
+        value = headers.get("retry-after")
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def _field(obj: Any, key: str) -> Any:
+    """Read a field from an SDK object or a plain dict."""
+    return obj.get(key) if isinstance(obj, dict) else getattr(obj, key, None)
+
+
+class ToolCallAssembler:
+    """Assemble OpenAI-style streamed ``delta.tool_calls`` fragments into requests."""
+
+    def __init__(self) -> None:
+        self._calls: dict[int, dict[str, Any]] = {}
+
+    def add(self, deltas: Any) -> None:
+        """Merge a chunk's tool-call deltas (objects or dicts) into the buffers."""
+        for d in deltas or []:
+            index = _field(d, "index")
+            buf = self._calls.setdefault(
+                index if index is not None else len(self._calls),
+                {"id": None, "name": "", "arguments": ""},
+            )
+            if _field(d, "id"):
+                buf["id"] = _field(d, "id")
+            fn = _field(d, "function")
+            if fn is None:
+                continue
+            buf["name"] += _field(fn, "name") or ""
+            buf["arguments"] += _field(fn, "arguments") or ""
+
+    def build(self) -> list[ToolCallRequest]:
+        """Return the assembled tool calls in index order."""
+        calls = []
+        for index in sorted(self._calls):
+            buf = self._calls[index]
+            args = json_repair.loads(buf["arguments"]) if buf["arguments"] else {}
+            calls.append(ToolCallRequest(
+                id=buf["id"] or f"call_{index}",
+                name=buf["name"],
+                arguments=args if isinstance(args, dict) else {},
+            ))
+        return calls
+
+
 class LLMProvider(ABC):
     """
     Abstract base class for LLM providers.
@@ -64,6 +155,31 @@ class LLMProvider(ABC):
         """
         pass
     
+    async def chat_stream(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> AsyncIterator[LLMStreamChunk]:
+        """
+        Stream a chat completion.
+        
+        Yields text deltas as they arrive, then a final chunk whose
+        ``response`` holds the assembled result. Providers without native
+        streaming fall back to a single chunk from ``chat``.
+        """
+        response = await self.chat(
+            messages=messages, tools=tools, model=model,
+            max_tokens=max_tokens, temperature=temperature,
+        )
+        yield LLMStreamChunk(content=response.content or "", response=response)
+    
+    def get_context_window(self, model: str | None = None) -> int | None:
+        """Maximum input tokens for a model, or None if unknown."""
+        return None
+    
     @abstractmethod
     def get_default_model(self) -> str:
         """Get the default model for this provider."""
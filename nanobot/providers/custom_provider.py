@@ -2,31 +2,76 @@
 
 from __future__ import annotations
 
-from typing import Any
+from typing import Any, AsyncIterator
 
 import json_repair
 from openai import AsyncOpenAI
 
-from nanobot.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+from nanobot.providers.base import (
+    LLMProvider, LLMResponse, LLMStreamChunk, ToolCallAssembler, ToolCallRequest, error_response,
+)
+from nanobot.providers.prompt_cache import add_cache_breakpoints, prompt_cache_key
+from nanobot.providers.registry import find_by_model
 
 
 class CustomProvider(LLMProvider):
 
-    def __init__(self, api_key: str = "no-key", api_base: str = "http://localhost:8000/v1", default_model: str = "default"):
+    def __init__(self, api_key: str = "no-key", api_base: str = "http://localhost:8000/v1", default_model: str = "default",
+                 prompt_caching: bool = False):
         super().__init__(api_key, api_base)
         self.default_model = default_model
+        self.prompt_caching = prompt_caching  # opt-in: unknown request fields break strict servers
         self._client = AsyncOpenAI(api_key=api_key, base_url=api_base)
 
-    async def chat(self, messages: list[dict[str, Any]], tools: list[dict[str, Any]] | None = None,
-                   model: str | None = None, max_tokens: int = 4096, temperature: float = 0.7) -> LLMResponse:
+    def _build_kwargs(self, messages: list[dict[str, Any]], tools: list[dict[str, Any]] | None,
+                      model: str | None, max_tokens: int, temperature: float) -> dict[str, Any]:
         kwargs: dict[str, Any] = {"model": model or self.default_model, "messages": messages,
                                   "max_tokens": max(1, max_tokens), "temperature": temperature}
+        if self.prompt_caching:
+            spec = find_by_model(kwargs["model"])
+            if spec and spec.supports_cache_control:
+                kwargs["messages"], tools = add_cache_breakpoints(messages, tools)
+            else:
+                kwargs["extra_body"] = {"prompt_cache_key": prompt_cache_key(messages)}
         if tools:
             kwargs.update(tools=tools, tool_choice="auto")
+        return kwargs
+
+    async def chat(self, messages: list[dict[str, Any]], tools: list[dict[str, Any]] | None = None,
+                   model: str | None = None, max_tokens: int = 4096, temperature: float = 0.7) -> LLMResponse:
+        kwargs = self._build_kwargs(messages, tools, model, max_tokens, temperature)
         try:
             return self._parse(await self._client.chat.completions.create(**kwargs))
         except Exception as e:
-            return LLMResponse(content=f"Error: {e}", finish_reason="error")
+            return error_response(e, prefix="Error")
+
+    async def chat_stream(self, messages: list[dict[str, Any]], tools: list[dict[str, Any]] | None = None,
+                          model: str | None = None, max_tokens: int = 4096,
+                          temperature: float = 0.7) -> AsyncIterator[LLMStreamChunk]:
+        kwargs = self._build_kwargs(messages, tools, model, max_tokens, temperature)
+        kwargs.update(stream=True, stream_options={"include_usage": True})
+        content, reasoning, finish_reason, usage = "", "", "stop", {}
+        assembler = ToolCallAssembler()
+        try:
+            async for chunk in await self._client.chat.completions.create(**kwargs):
+                if chunk.usage:
+                    usage = self._usage(chunk.usage)
+                if not chunk.choices:
+                    continue
+                choice, delta = chunk.choices[0], chunk.choices[0].delta
+                finish_reason = choice.finish_reason or finish_reason
+                reasoning += getattr(delta, "reasoning_content", None) or ""
+                assembler.add(delta.tool_calls)
+                if delta.content:
+                    content += delta.content
+                    yield LLMStreamChunk(content=delta.content)
+        except Exception as e:
+            yield LLMStreamChunk(response=error_response(e, prefix="Error"))
+            return
+        yield LLMStreamChunk(response=LLMResponse(
+            content=content or None, tool_calls=assembler.build(), finish_reason=finish_reason,
+            usage=usage, reasoning_content=reasoning or None,
+        ))
 
     def _parse(self, response: Any) -> LLMResponse:
         choice = response.choices[0]
@@ -39,9 +84,15 @@ class CustomProvider(LLMProvider):
         u = response.usage
         return LLMResponse(
             content=msg.content, tool_calls=tool_calls, finish_reason=choice.finish_reason or "stop",
-            usage={"prompt_tokens": u.prompt_tokens, "completion_tokens": u.completion_tokens, "total_tokens": u.total_tokens} if u else {},
+            usage=self._usage(u) if u else {},
             reasoning_content=getattr(msg, "reasoning_content", None),
         )
 
+    @staticmethod
+    def _usage(u: Any) -> dict[str, int]:
+        details = getattr(u, "prompt_tokens_details", None)
+        return {"prompt_tokens": u.prompt_tokens, "completion_tokens": u.completion_tokens, "total_tokens": u.total_tokens,
+                "cached_tokens": getattr(details, "cached_tokens", None) or 0}
+
     def get_default_model(self) -> str:
         return self.default_model
@@ -3,12 +3,15 @@
 import json
 import json_repair
 import os
-from typing import Any
+from typing import Any, AsyncIterator
 
 import litellm
 from litellm import acompletion
 
-from nanobot.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+from nanobot.providers.base import (
+    LLMProvider, LLMResponse, LLMStreamChunk, ToolCallAssembler, ToolCallRequest, error_response,
+)
+from nanobot.providers.prompt_cache import add_cache_breakpoints, prompt_cache_key
 from nanobot.providers.registry import find_by_model, find_gateway
 
 
@@ -32,6 +35,7 @@ class LiteLLMProvider(LLMProvider):
         super().__init__(api_key, api_base)
         self.default_model = default_model
         self.extra_headers = extra_headers or {}
+        self._context_windows: dict[str, int | None] = {}
         
         # Detect gateway / local deployment.
         # provider_name (from config key) is the primary signal;
@@ -42,8 +46,8 @@ class LiteLLMProvider(LLMProvider):
         if api_key:
             self._setup_env(api_key, api_base, default_model)
         
-        if api_base:
-            litellm.api_base = api_base
+        # api_base is passed per call (see _build_kwargs), not set on the litellm
+        # module, so several providers with different endpoints can coexist
         
         # Disable LiteLLM logging noise
         litellm.suppress_debug_info = True
@@ -103,28 +107,17 @@ class LiteLLMProvider(LLMProvider):
                     kwargs.update(overrides)
                     return
     
-    async def chat(
+    def _build_kwargs(
         self,
         messages: list[dict[str, Any]],
-        tools: list[dict[str, Any]] | None = None,
-        model: str | None = None,
-        max_tokens: int = 4096,
-        temperature: float = 0.7,
-    ) -> LLMResponse:
-        """
-        Send a chat completion request via LiteLLM.
-        
-        Args:
-            messages: List of message dicts with 'role' and 'content'.
-            tools: Optional list of tool definitions in OpenAI format.
-            model: Model identifier (e.g., 'anthropic/claude-sonnet-4-5').
-            max_tokens: Maximum tokens in response.
-            temperature: Sampling temperature.
-        
-        Returns:
-            LLMResponse with content and/or tool calls.
-        """
-        model = self._resolve_model(model or self.default_model)
+        tools: list[dict[str, Any]] | None,
+        model: str | None,
+        max_tokens: int,
+        temperature: float,
+    ) -> dict[str, Any]:
+        """Build the acompletion() arguments shared by chat and chat_stream."""
+        original_model = model or self.default_model
+        model = self._resolve_model(original_model)
         
         # Clamp max_tokens to at least 1 — negative or zero values cause
         # LiteLLM to reject the request with "max_tokens must be at least 1".
@@ -140,6 +133,13 @@ class LiteLLMProvider(LLMProvider):
         # Apply model-specific overrides (e.g. kimi-k2.5 temperature)
         self._apply_model_overrides(model, kwargs)
         
+        # Provider-side prompt caching
+        spec = find_by_model(original_model)
+        if spec and spec.supports_cache_control and (not self._gateway or self._gateway.supports_cache_control):
+            kwargs["messages"], tools = add_cache_breakpoints(messages, tools)
+        elif spec and spec.supports_prompt_cache_key and not self._gateway:
+            kwargs["prompt_cache_key"] = prompt_cache_key(messages)
+        
         # Pass api_key directly — more reliable than env vars alone
         if self.api_key:
             kwargs["api_key"] = self.api_key
@@ -156,15 +156,85 @@ class LiteLLMProvider(LLMProvider):
             kwargs["tools"] = tools
             kwargs["tool_choice"] = "auto"
         
+        return kwargs
+    
+    async def chat(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> LLMResponse:
+        """
+        Send a chat completion request via LiteLLM.
+        
+        Args:
+            messages: List of message dicts with 'role' and 'content'.
+            tools: Optional list of tool definitions in OpenAI format.
+            model: Model identifier (e.g., 'anthropic/claude-sonnet-4-5').
+            max_tokens: Maximum tokens in response.
+            temperature: Sampling temperature.
+        
+        Returns:
+            LLMResponse with content and/or tool calls.
+        """
+        kwargs = self._build_kwargs(messages, tools, model, max_tokens, temperature)
+        
         try:
             response = await acompletion(**kwargs)
             return self._parse_response(response)
         except Exception as e:
             # Return error as content for graceful handling
-            return LLMResponse(
-                content=f"Error calling LLM: {str(e)}",
-                finish_reason="error",
-            )
+            return error_response(e)
+    
+    async def chat_stream(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> AsyncIterator[LLMStreamChunk]:
+        """Stream a chat completion via LiteLLM, assembling tool calls incrementally."""
+        kwargs = self._build_kwargs(messages, tools, model, max_tokens, temperature)
+        kwargs["stream"] = True
+        kwargs["stream_options"] = {"include_usage": True}
+        
+        content = ""
+        reasoning = ""
+        assembler = ToolCallAssembler()
+        finish_reason = "stop"
+        usage: dict[str, int] = {}
+        try:
+            stream = await acompletion(**kwargs)
+            async for chunk in stream:
+                if getattr(chunk, "usage", None):
+                    usage = self._parse_usage(chunk.usage)
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                delta = choice.delta
+                if choice.finish_reason:
+                    finish_reason = choice.finish_reason
+                if getattr(delta, "reasoning_content", None):
+                    reasoning += delta.reasoning_content
+                if getattr(delta, "tool_calls", None):
+                    assembler.add(delta.tool_calls)
+                if delta.content:
+                    content += delta.content
+                    yield LLMStreamChunk(content=delta.content)
+        except Exception as e:
+            yield LLMStreamChunk(response=error_response(e))
+            return
+        
+        yield LLMStreamChunk(response=LLMResponse(
+            content=content or None,
+            tool_calls=assembler.build(),
+            finish_reason=finish_reason,
+            usage=usage,
+            reasoning_content=reasoning or None,
+        ))
     
     def _parse_response(self, response: Any) -> LLMResponse:
         """Parse LiteLLM response into our standard format."""
@@ -187,11 +257,7 @@ class LiteLLMProvider(LLMProvider):
         
         usage = {}
         if hasattr(response, "usage") and response.usage:
-            usage = {
-                "prompt_tokens": response.usage.prompt_tokens,
-                "completion_tokens": response.usage.completion_tokens,
-                "total_tokens": response.usage.total_tokens,
-            }
+            usage = self._parse_usage(response.usage)
         
         reasoning_content = getattr(message, "reasoning_content", None)
         
@@ -203,6 +269,30 @@ class LiteLLMProvider(LLMProvider):
             reasoning_content=reasoning_content,
         )
     
+    @staticmethod
+    def _parse_usage(usage: Any) -> dict[str, int]:
+        """Extract token counts (including prompt-cache hits) from a LiteLLM usage object."""
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", None) or getattr(usage, "cache_read_input_tokens", None)
+        return {
+            "prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens,
+            "total_tokens": usage.total_tokens,
+            "cached_tokens": cached or 0,
+            "cache_creation_tokens": getattr(usage, "cache_creation_input_tokens", None) or 0,
+        }
+    
+    def get_context_window(self, model: str | None = None) -> int | None:
+        """Look up the model's max input tokens in LiteLLM's model map."""
+        model = self._resolve_model(model or self.default_model)
+        if model not in self._context_windows:
+            try:
+                info = litellm.get_model_info(model)
+                self._context_windows[model] = info.get("max_input_tokens") or info.get("max_tokens")
+            except Exception:
+                self._context_windows[model] = None
+        return self._context_windows[model]
+    
     def get_default_model(self) -> str:
         """Get the default model."""
         return self.default_model
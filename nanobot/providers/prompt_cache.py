@@ -0,0 +1,80 @@
+"""Helpers for provider-side prompt caching.
+
+Two mechanisms are supported:
+
+- OpenAI-style ``prompt_cache_key``: a routing hint so requests sharing a
+  prefix land on the same cache. Derived from the system prompt, which
+  ContextBuilder keeps byte-stable for a session.
+- Anthropic-style ``cache_control`` breakpoints: explicit markers on the
+  tool list, the system prompt and the latest message, so every request in
+  a tool-call loop (and the next turn) reads the previous prefix from cache.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any
+
+_EPHEMERAL = {"type": "ephemeral"}
+
+
+def prompt_cache_key(messages: list[dict[str, Any]]) -> str:
+    """Stable cache routing key: a hash of the leading system message(s)."""
+    prefix = []
+    for msg in messages:
+        if msg.get("role") != "system":
+            break
+        prefix.append(msg.get("content"))
+    raw = json.dumps(prefix, ensure_ascii=True, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _mark(content: Any) -> list[dict[str, Any]] | None:
+    """Return content as text blocks with a breakpoint on the last one."""
+    if isinstance(content, str):
+        if not content:
+            return None
+        return [{"type": "text", "text": content, "cache_control": _EPHEMERAL}]
+    if isinstance(content, list) and content:
+        blocks = [dict(b) if isinstance(b, dict) else b for b in content]
+        if isinstance(blocks[-1], dict):
+            blocks[-1]["cache_control"] = _EPHEMERAL
+            return blocks
+    return None
+
+
+def add_cache_breakpoints(
+    messages: list[dict[str, Any]],
+    tools: list[dict[str, Any]] | None = None,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]] | None]:
+    """
+    Add cache_control breakpoints without mutating the inputs.
+
+    Marks the last tool definition, the system prompt and the most recent
+    message with content (three of Anthropic's four allowed breakpoints).
+
+    Args:
+        messages: Chat messages in OpenAI format.
+        tools: Optional tool definitions.
+
+    Returns:
+        Tuple of (messages, tools) copies carrying the breakpoints.
+    """
+    messages = list(messages)
+
+    if messages and messages[0].get("role") == "system":
+        marked = _mark(messages[0].get("content"))
+        if marked:
+            messages[0] = {**messages[0], "content": marked}
+
+    for i in range(len(messages) - 1, 0, -1):
+        marked = _mark(messages[i].get("content"))
+        if marked:
+            messages[i] = {**messages[i], "content": marked}
+            break
+
+    if tools:
+        tools = [*tools[:-1], {**tools[-1], "cache_control": _EPHEMERAL}]
+
+    return messages, tools
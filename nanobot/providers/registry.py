@@ -57,6 +57,10 @@ class ProviderSpec:
     # Direct providers bypass LiteLLM entirely (e.g., CustomProvider)
     is_direct: bool = False
 
+    # provider-side prompt caching (see providers/prompt_cache.py)
+    supports_cache_control: bool = False     # honours Anthropic-style cache_control breakpoints
+    supports_prompt_cache_key: bool = False  # accepts OpenAI's prompt_cache_key routing hint
+
     @property
     def label(self) -> str:
         return self.display_name or self.name.title()
@@ -97,6 +101,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         default_api_base="https://openrouter.ai/api/v1",
         strip_model_prefix=False,
         model_overrides=(),
+        supports_cache_control=True,        # forwarded to Anthropic/Gemini models
     ),
 
     # AiHubMix: global gateway, OpenAI-compatible interface.
@@ -155,6 +160,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         default_api_base="",
         strip_model_prefix=False,
         model_overrides=(),
+        supports_cache_control=True,
     ),
 
     # OpenAI: LiteLLM recognizes "gpt-*" natively, no prefix needed.
@@ -173,6 +179,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         default_api_base="",
         strip_model_prefix=False,
         model_overrides=(),
+        supports_prompt_cache_key=True,
     ),
 
     # OpenAI Codex: uses OAuth, not API key.
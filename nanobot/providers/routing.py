@@ -0,0 +1,248 @@
+"""Failover and latency-aware routing across several LLM backends."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator
+
+from loguru import logger
+
+from nanobot.providers.base import LLMProvider, LLMResponse, LLMStreamChunk, error_response
+
+ROUTING_STRATEGIES = ("failover", "latency")
+
+_EWMA_ALPHA = 0.3
+_MAX_COOLDOWN_FACTOR = 8  # open circuits back off up to this multiple of the base cooldown
+# The request itself was refused (malformed, too long, content policy): every backend would refuse it
+_REQUEST_ERRORS = {400, 413, 422}
+
+
+@dataclass
+class Backend:
+    """One provider (and optionally a fixed model) that a request can be routed to."""
+
+    name: str
+    provider: LLMProvider
+    model: str | None = None  # None = use the model the caller asked for
+    latency_ms: float | None = None  # EWMA of successful call latency
+    error_rate: float = 0.0  # EWMA of failures (0..1)
+    requests: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    open_until: float = 0.0  # circuit open (skipped) until this monotonic time
+    cooldown: float = 0.0
+    probing: bool = False  # half-open: one trial request in flight
+    last_error: str = field(default="", repr=False)
+
+    def state(self, now: float, threshold: int) -> str:
+        if self.open_until > now:
+            return "open"
+        return "half_open" if self.consecutive_failures >= threshold else "closed"
+
+
+class RoutingProvider(LLMProvider):
+    """
+    Routes each LLM call to the healthiest of several backends.
+
+    Backends are providers for the primary model, its extra API keys and
+    fallback models, in configured order. Each tracks an EWMA of latency
+    and error rate. With the "failover" strategy a request goes to the
+    first backend whose circuit is closed; with "latency" to the one with
+    the best latency weighted by error rate. If the call fails (providers
+    report errors as finish_reason "error"), or exceeds attempt_timeout,
+    the next candidate is tried, so an outage costs a retry rather than a
+    failed turn. Errors about the request itself (HTTP 400, 413, 422) are
+    returned as they are: other backends would refuse it too.
+
+    After failure_threshold consecutive failures a backend's circuit opens
+    for cooldown seconds (doubling on each failed probe); once it expires
+    a single request probes it, and a success closes the circuit. When
+    every circuit is open the least recently failed backends are tried
+    anyway rather than failing outright.
+    """
+
+    def __init__(
+        self,
+        backends: list[Backend],
+        strategy: str = "failover",
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+        attempt_timeout: float = 0.0,
+    ):
+        if not backends:
+            raise ValueError("RoutingProvider needs at least one backend")
+        if strategy not in ROUTING_STRATEGIES:
+            raise ValueError(f"Unknown routing strategy {strategy!r} (expected one of {', '.join(ROUTING_STRATEGIES)})")
+        primary = backends[0].provider
+        super().__init__(primary.api_key, primary.api_base)
+        self.backends = backends
+        self.strategy = strategy
+        self.failure_threshold = max(1, failure_threshold)
+        self.base_cooldown = cooldown
+        self.attempt_timeout = attempt_timeout  # seconds, 0 = no limit
+
+    # ---- selection --------------------------------------------------------
+
+    def _score(self, backend: Backend) -> float:
+        latency = backend.latency_ms if backend.latency_ms is not None else 0.0  # untried: give it a chance
+        return latency * (1 + 4 * backend.error_rate)
+
+    def _candidates(self) -> list[Backend]:
+        """Backends to try, in order; open circuits (and busy probes) come last."""
+        now = time.monotonic()
+        usable, probes, blocked = [], [], []
+        for backend in self.backends:
+            state = backend.state(now, self.failure_threshold)
+            if state == "closed":
+                usable.append(backend)
+            elif state == "half_open" and not backend.probing:
+                (usable if self.strategy == "failover" else probes).append(backend)
+            else:
+                blocked.append(backend)
+        if self.strategy == "latency":
+            # Probes go first so a recovered backend is noticed; a failed probe just falls through
+            usable = probes + sorted(usable, key=self._score)
+        blocked.sort(key=lambda b: b.open_until)
+        return usable + blocked
+
+    # ---- bookkeeping ------------------------------------------------------
+
+    def _record(self, backend: Backend, ok: bool, elapsed_ms: float, error: str = "") -> None:
+        backend.requests += 1
+        backend.probing = False
+        backend.error_rate += _EWMA_ALPHA * ((0.0 if ok else 1.0) - backend.error_rate)
+        if ok:
+            backend.latency_ms = elapsed_ms if backend.latency_ms is None else (
+                backend.latency_ms + _EWMA_ALPHA * (elapsed_ms - backend.latency_ms)
+            )
+            if backend.consecutive_failures >= self.failure_threshold:
+                logger.info(f"LLM backend {backend.name} recovered, closing its circuit")
+            backend.consecutive_failures = 0
+            backend.cooldown = 0.0
+            return
+        backend.failures += 1
+        backend.consecutive_failures += 1
+        backend.last_error = error[:200]
+        if backend.consecutive_failures >= self.failure_threshold:
+            backend.cooldown = min(
+                (backend.cooldown * 2) or self.base_cooldown,
+                self.base_cooldown * _MAX_COOLDOWN_FACTOR,
+            )
+            backend.open_until = time.monotonic() + backend.cooldown
+            logger.warning(
+                f"LLM backend {backend.name} failed {backend.consecutive_failures} times in a row, "
+                f"skipping it for {backend.cooldown:.0f}s: {backend.last_error}"
+            )
+
+    def _begin(self, backend: Backend) -> None:
+        if backend.state(time.monotonic(), self.failure_threshold) == "half_open":
+            backend.probing = True
+
+    # ---- LLMProvider ------------------------------------------------------
+
+    async def chat(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> LLMResponse:
+        response = LLMResponse(content="Error: no LLM backend available", finish_reason="error")
+        for backend in self._candidates():
+            self._begin(backend)
+            start = time.monotonic()
+            try:
+                async with asyncio.timeout(self.attempt_timeout or None):
+                    response = await backend.provider.chat(
+                        messages=messages, tools=tools, model=backend.model or model,
+                        max_tokens=max_tokens, temperature=temperature,
+                    )
+            except TimeoutError:
+                response = LLMResponse(content=f"Error: {backend.name} timed out", finish_reason="error")
+            except Exception as e:
+                response = error_response(e)
+            finally:
+                backend.probing = False  # also when cancelled, or the backend is never probed again
+            if response.status_code in _REQUEST_ERRORS:
+                return response  # not the backend's fault: no failover, no circuit accounting
+            elapsed = (time.monotonic() - start) * 1000
+            ok = response.finish_reason != "error"
+            self._record(backend, ok, elapsed, response.content or "")
+            if ok:
+                return response
+            logger.warning(f"LLM backend {backend.name} failed, trying the next one: {(response.content or '')[:200]}")
+        return response
+
+    async def chat_stream(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> AsyncIterator[LLMStreamChunk]:
+        """Stream from the best backend; fails over only until the first delta has been yielded."""
+        final: LLMResponse | None = None
+        for backend in self._candidates():
+            self._begin(backend)
+            start = time.monotonic()
+            streamed = False
+            final = None
+            stream = backend.provider.chat_stream(
+                messages=messages, tools=tools, model=backend.model or model,
+                max_tokens=max_tokens, temperature=temperature,
+            )
+            try:
+                # The attempt timeout bounds the wait for the first chunk only
+                async with asyncio.timeout(self.attempt_timeout or None):
+                    chunk = await anext(stream, None)
+                while chunk is not None:
+                    if chunk.response is not None:
+                        final = chunk.response
+                        if final.finish_reason == "error" and not streamed:
+                            break  # nothing shown yet: fail over silently
+                    streamed = streamed or bool(chunk.content)
+                    yield chunk
+                    chunk = await anext(stream, None)
+            except TimeoutError:
+                final = LLMResponse(content=f"Error: {backend.name} timed out", finish_reason="error")
+            except Exception as e:
+                if streamed:
+                    raise
+                final = error_response(e)
+            finally:
+                backend.probing = False
+                await stream.aclose()
+            final = final or LLMResponse(content="Error: stream ended without a response", finish_reason="error")
+            if final.status_code in _REQUEST_ERRORS and not streamed:
+                break
+            ok = final.finish_reason != "error"
+            self._record(backend, ok, (time.monotonic() - start) * 1000, final.content or "")
+            if ok or streamed:
+                return
+            logger.warning(f"LLM backend {backend.name} failed, trying the next one: {(final.content or '')[:200]}")
+        yield LLMStreamChunk(response=final)
+
+    def get_context_window(self, model: str | None = None) -> int | None:
+        return self.backends[0].provider.get_context_window(model)
+
+    def get_default_model(self) -> str:
+        return self.backends[0].provider.get_default_model()
+
+    def stats(self) -> dict[str, Any]:
+        """Health of each backend, in configured order."""
+        now = time.monotonic()
+        return {
+            backend.name: {
+                "state": backend.state(now, self.failure_threshold),
+                "latency_ms": round(backend.latency_ms, 1) if backend.latency_ms is not None else None,
+                "error_rate": round(backend.error_rate, 3),
+                "requests": backend.requests,
+                "failures": backend.failures,
+                "last_error": backend.last_error,
+            }
+            for backend in self.backends
+        }
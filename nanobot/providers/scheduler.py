@@ -0,0 +1,282 @@
+"""Rate-limit-aware admission and retries in front of an LLM provider."""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import random
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Iterator
+
+from loguru import logger
+
+from nanobot.providers.base import LLMProvider, LLMResponse, LLMStreamChunk
+from nanobot.utils.helpers import estimate_tokens
+
+# Same names as the bus lanes, plus "background" for housekeeping such as
+# memory consolidation; lower value = admitted first
+PRIORITIES = {"interactive": 0, "system": 1, "scheduled": 2, "background": 3}
+
+_priority: ContextVar[str] = ContextVar("nanobot_llm_priority", default="interactive")
+
+TRANSIENT_STATUS = {408, 409, 425, 429, 500, 502, 503, 504, 529}
+# Providers report failures as text; match what transient ones say when no status survived
+_TRANSIENT_TEXT = re.compile(
+    r"rate.?limit|too many requests|overloaded|timed? ?out|timeout|temporarily|"
+    r"connection (?:error|reset|refused)|APIConnectionError|ServiceUnavailable|InternalServerError",
+    re.IGNORECASE,
+)
+
+
+@contextmanager
+def llm_priority(name: str) -> Iterator[None]:
+    """Run LLM calls made inside the block (and tasks started from it) at a priority."""
+    token = _priority.set(name if name in PRIORITIES else "interactive")
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def is_transient(response: LLMResponse) -> bool:
+    if response.finish_reason != "error":
+        return False
+    if response.status_code is not None:
+        return response.status_code in TRANSIENT_STATUS
+    return bool(_TRANSIENT_TEXT.search(response.content or ""))
+
+
+class TokenBucket:
+    """Per-minute budget refilled continuously (capacity = one minute's worth; 0 = unlimited)."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self._rate = per_minute / 60.0
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def delay(self, amount: float) -> float:
+        """Seconds until amount is available (requests larger than capacity wait for a full bucket)."""
+        if not self.capacity:
+            return 0.0
+        self._refill()
+        missing = min(amount, self.capacity) - self.level
+        return missing / self._rate if missing > 0 else 0.0
+
+    def take(self, amount: float) -> None:
+        if self.capacity:
+            self._refill()
+            self.level -= min(amount, self.capacity)
+
+    def refund(self, amount: float) -> None:
+        if self.capacity:
+            self.level = min(self.capacity, self.level + amount)
+
+
+class ScheduledProvider(LLMProvider):
+    """
+    Admission scheduler and retry policy for one provider (one API key).
+
+    Calls are admitted against token buckets for requests and tokens per
+    minute. A request reserves its estimated prompt tokens plus
+    max_tokens, and the difference from the reported usage is refunded.
+    Waiting calls are admitted strictly by priority (see llm_priority),
+    then arrival order, so interactive turns overtake consolidation and
+    cron work queued behind a rate limit.
+
+    Transient failures (429, 5xx, timeouts) are retried with full-jitter
+    exponential backoff. A retry-after hint from the provider is used
+    instead of the backoff and also pauses every queued call. A hint
+    longer than max_retry_after is not waited out: the error is returned,
+    so a RoutingProvider in front can fail over. Streams are retried only
+    while nothing has been yielded.
+    """
+
+    def __init__(
+        self,
+        provider: LLMProvider,
+        rpm: int = 0,
+        tpm: int = 0,
+        max_retries: int = 3,
+        backoff_base: float = 1.0,
+        backoff_max: float = 30.0,
+        max_retry_after: float = 60.0,
+    ):
+        super().__init__(provider.api_key, provider.api_base)
+        self.provider = provider
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_retry_after = max_retry_after
+        self._waiting: list[list] = []  # heap of [priority, seq]
+        self._seq = itertools.count()
+        self._changed: asyncio.Future | None = None
+        self._paused_until = 0.0
+        self._stats = {"calls": 0, "retries": 0, "throttled": 0, "wait_ms_total": 0.0, "wait_ms_max": 0.0}
+
+    # ---- admission --------------------------------------------------------
+
+    def _notify(self) -> None:
+        if self._changed is not None and not self._changed.done():
+            self._changed.set_result(None)
+        self._changed = None
+
+    async def _wait_for_change(self, timeout: float | None) -> None:
+        if self._changed is None:
+            self._changed = asyncio.get_running_loop().create_future()
+        # asyncio.wait leaves the shared future alone when it times out
+        await asyncio.wait({self._changed}, timeout=timeout)
+
+    async def _admit(self, tokens: int) -> None:
+        """Wait until this call is first in line and the buckets allow it, then take its share."""
+        entry = [PRIORITIES[_priority.get()], next(self._seq)]
+        heapq.heappush(self._waiting, entry)
+        start = time.monotonic()
+        try:
+            while True:
+                delay = None
+                if self._waiting[0] is entry:
+                    delay = max(
+                        self._paused_until - time.monotonic(),
+                        self.requests.delay(1),
+                        self.tokens.delay(tokens),
+                    )
+                    if delay <= 0:
+                        break
+                await self._wait_for_change(delay)
+        except BaseException:
+            self._waiting.remove(entry)
+            heapq.heapify(self._waiting)
+            self._notify()
+            raise
+        heapq.heappop(self._waiting)
+        self.requests.take(1)
+        self.tokens.take(tokens)
+        self._notify()  # the next in line may be admissible too
+        waited = (time.monotonic() - start) * 1000
+        self._stats["wait_ms_total"] += waited
+        self._stats["wait_ms_max"] = max(self._stats["wait_ms_max"], waited)
+
+    def _settle(self, reserved: int, response: LLMResponse) -> None:
+        """Refund the unused part of a reservation once actual usage is known."""
+        usage = response.usage
+        used = usage.get("total_tokens") or (usage.get("prompt_tokens", 0) + usage.get("completion_tokens", 0))
+        if used:
+            self.tokens.refund(reserved - used)
+            self._notify()
+
+    @staticmethod
+    def _estimate(messages: list[dict[str, Any]], max_tokens: int) -> int:
+        prompt = sum(estimate_tokens(m["content"]) for m in messages if isinstance(m.get("content"), str))
+        return prompt + max(1, max_tokens)
+
+    # ---- retries ----------------------------------------------------------
+
+    def _retry_delay(self, attempt: int, response: LLMResponse) -> float | None:
+        """Seconds to wait before retrying, or None to give up and return the error."""
+        if attempt >= self.max_retries or not is_transient(response):
+            return None
+        if response.retry_after is not None:
+            if response.retry_after > self.max_retry_after:
+                return None
+            self._paused_until = max(self._paused_until, time.monotonic() + response.retry_after)
+            return response.retry_after
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _note_failure(self, response: LLMResponse, delay: float) -> None:
+        self._stats["retries"] += 1
+        if response.status_code == 429:
+            self._stats["throttled"] += 1
+        logger.warning(f"Transient LLM error, retrying in {delay:.1f}s: {(response.content or '')[:200]}")
+
+    # ---- LLMProvider ------------------------------------------------------
+
+    async def chat(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> LLMResponse:
+        reserved = self._estimate(messages, max_tokens)
+        attempt = 0
+        while True:
+            await self._admit(reserved)
+            self._stats["calls"] += 1
+            response = await self.provider.chat(
+                messages=messages, tools=tools, model=model, max_tokens=max_tokens, temperature=temperature,
+            )
+            self._settle(reserved, response)
+            delay = self._retry_delay(attempt, response)
+            if delay is None:
+                return response
+            self._note_failure(response, delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def chat_stream(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> AsyncIterator[LLMStreamChunk]:
+        reserved = self._estimate(messages, max_tokens)
+        attempt = 0
+        while True:
+            await self._admit(reserved)
+            self._stats["calls"] += 1
+            streamed = False
+            final = None
+            async for chunk in self.provider.chat_stream(
+                messages=messages, tools=tools, model=model, max_tokens=max_tokens, temperature=temperature,
+            ):
+                if chunk.response is not None:
+                    final = chunk.response
+                    self._settle(reserved, final)
+                    if not streamed and final.finish_reason == "error":
+                        break  # held back: may be retried
+                streamed = streamed or bool(chunk.content)
+                yield chunk
+            if final is None or final.finish_reason != "error" or streamed:
+                return
+            delay = self._retry_delay(attempt, final)
+            if delay is None:
+                yield LLMStreamChunk(response=final)
+                return
+            self._note_failure(final, delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def get_context_window(self, model: str | None = None) -> int | None:
+        return self.provider.get_context_window(model)
+
+    def get_default_model(self) -> str:
+        return self.provider.get_default_model()
+
+    def stats(self) -> dict[str, Any]:
+        calls = self._stats["calls"]
+        return {
+            "waiting": len(self._waiting),
+            "calls": calls,
+            "retries": self._stats["retries"],
+            "throttled": self._stats["throttled"],
+            "wait_ms_avg": round(self._stats["wait_ms_total"] / calls, 2) if calls else 0.0,
+            "wait_ms_max": round(self._stats["wait_ms_max"], 2),
+            "requests_available": round(self.requests.level, 1) if self.requests.capacity else None,
+            "tokens_available": round(self.tokens.level) if self.tokens.capacity else None,
+            "paused_s": round(max(0.0, self._paused_until - time.monotonic()), 1),
+        }
@@ -1,5 +1,7 @@
 """Session management module."""
 
-from nanobot.session.manager import SessionManager, Session
+from nanobot.session.base import Session, SessionStore
+from nanobot.session.catalog import SessionCatalog
+from nanobot.session.manager import SessionManager
 
-__all__ = ["SessionManager", "Session"]
+__all__ = ["SessionManager", "Session", "SessionStore", "SessionCatalog"]
@@ -0,0 +1,206 @@
+"""Session model and the storage backend interface."""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+from nanobot.utils import codec
+from nanobot.utils.helpers import estimate_tokens
+
+# Per-message framing overhead (role, separators) added to content estimates
+_MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def message_tokens(msg: dict[str, Any]) -> int:
+    """Estimated prompt tokens of a stored message, cached in its "tokens" field."""
+    if "tokens" not in msg:
+        content = msg.get("content") or ""
+        if not isinstance(content, str):
+            content = codec.dumps(content)
+        if msg.get("tool_calls"):
+            content += codec.dumps(msg["tool_calls"])
+        msg["tokens"] = estimate_tokens(content) + _MESSAGE_OVERHEAD_TOKENS
+    return msg["tokens"]
+
+
+@dataclass
+class Session:
+    """
+    A conversation session.
+
+    Stores messages in JSONL format for easy reading and persistence.
+
+    Important: Messages are append-only for LLM cache efficiency.
+    The consolidation process writes summaries to MEMORY.md/HISTORY.md
+    but does NOT modify the messages list or get_history() output.
+    """
+
+    key: str  # channel:chat_id
+    messages: list[dict[str, Any]] = field(default_factory=list)
+    created_at: datetime = field(default_factory=datetime.now)
+    updated_at: datetime = field(default_factory=datetime.now)
+    metadata: dict[str, Any] = field(default_factory=dict)
+    last_consolidated: int = 0  # Number of messages already consolidated to files
+    # Persistence bookkeeping (owned by SessionManager)
+    _persisted: int = field(default=0, repr=False, compare=False)  # Messages already on disk
+    _trailers: int = field(default=0, repr=False, compare=False)  # Metadata lines appended since last rewrite
+    _rewrite: bool = field(default=False, repr=False, compare=False)  # Next save must rewrite the file
+    _base: int = field(default=0, repr=False, compare=False)  # Older messages left on disk by a tail-only load
+    # Reads messages [start, end) that a tail-only load left on disk
+    _loader: Callable[[int, int], list[dict[str, Any]]] | None = field(default=None, repr=False, compare=False)
+    
+    def add_message(self, role: str, content: str, **kwargs: Any) -> None:
+        """Add a message to the session."""
+        msg = {
+            "role": role,
+            "content": content,
+            "timestamp": datetime.now().isoformat(),
+            **kwargs
+        }
+        message_tokens(msg)
+        self.messages.append(msg)
+        self.updated_at = datetime.now()
+    
+    @property
+    def message_count(self) -> int:
+        """Total number of messages, including older ones not loaded yet."""
+        return self._base + len(self.messages)
+    
+    def load_all(self) -> None:
+        """Materialize the older messages a tail-only load left on disk."""
+        self.load_older(self._base)
+
+    def load_older(self, count: int) -> None:
+        """Materialize up to count of the newest messages still left on disk."""
+        if not self._base or self._loader is None or count <= 0:
+            return
+        start = max(0, self._base - count)
+        older = self._loader(start, self._base)
+        self.messages[:0] = older
+        self._persisted += len(older)
+        self._base = start
+        if not start:
+            self._loader = None
+    
+    def messages_from(self, start: int) -> list[dict[str, Any]]:
+        """Messages from absolute index start onward, loading older ones if needed."""
+        if start < self._base:
+            self.load_all()
+        return self.messages[max(0, start - self._base):]
+    
+    def get_history(self, max_messages: int = 500, max_tokens: int | None = None) -> list[dict[str, Any]]:
+        """
+        Get recent messages in LLM format, preserving tool metadata.
+
+        Args:
+            max_messages: Hard cap on the number of messages.
+            max_tokens: Optional token budget; the oldest messages are dropped
+                first until the remainder fits.
+        """
+        # The loaded tail may not cover the window: page in older messages, doubling
+        # the loaded range each step, until the message cap or token budget is met
+        while self._base and len(self.messages) < max_messages:
+            if max_tokens is not None and sum(message_tokens(m) for m in self.messages) > max_tokens:
+                break
+            missing = max_messages - len(self.messages)
+            self.load_older(missing if max_tokens is None else min(missing, max(1, len(self.messages))))
+
+        recent = self.messages[-max_messages:]
+        if max_tokens is not None:
+            used = 0
+            start = len(recent)
+            while start > 0:
+                used += message_tokens(recent[start - 1])
+                if used > max_tokens:
+                    break
+                start -= 1
+            recent = recent[start:]
+
+        out: list[dict[str, Any]] = []
+        for m in recent:
+            entry: dict[str, Any] = {"role": m["role"], "content": m.get("content", "")}
+            for k in ("tool_calls", "tool_call_id", "name"):
+                if k in m:
+                    entry[k] = m[k]
+            out.append(entry)
+        return out
+    
+    def clear(self) -> None:
+        """Clear all messages and reset session to initial state."""
+        self.messages = []
+        self.last_consolidated = 0
+        self.updated_at = datetime.now()
+        self._rewrite = True
+        self._base = 0
+        self._loader = None
+
+
+class SessionStore(ABC):
+    """
+    Storage backend for sessions.
+
+    SessionManager owns caching and delegates persistence here. A store
+    tracks what it has written through the session's bookkeeping fields
+    (_persisted, _rewrite, _base) so each write only persists new state.
+    """
+
+    @abstractmethod
+    def load(self, key: str) -> Session | None:
+        """Load a session, or None if it does not exist."""
+        pass
+
+    @abstractmethod
+    def write(self, session: Session) -> None:
+        """Persist a session's unsaved messages and metadata."""
+        pass
+
+    @abstractmethod
+    def list(
+        self,
+        limit: int | None = None,
+        offset: int = 0,
+        sort: str = "updated_at",
+        descending: bool = True,
+    ) -> list[dict[str, Any]]:
+        """List session info dicts (key, timestamps, message count, bytes)."""
+        pass
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of stored sessions."""
+        pass
+
+    def write_many(self, sessions: list[Session]) -> None:
+        """Persist several sessions (in one transaction where the backend has them)."""
+        for session in sessions:
+            self.write(session)
+
+    def sync(self, sessions: list[Session]) -> None:
+        """Make earlier writes of these sessions durable (fsync)."""
+        pass
+
+    def archive(self, cutoff: datetime, is_active: Callable[[str], bool]) -> tuple[int, int]:
+        """
+        Move sessions idle since before cutoff to compressed cold storage.
+
+        Returns:
+            (sessions archived, bytes reclaimed); backends without a cold
+            tier archive nothing.
+        """
+        return 0, 0
+
+    def adopt(self, key: str, path: Path) -> Session | None:
+        """Take over a legacy JSONL session file and load it."""
+        return None
+
+    def flush(self) -> None:
+        """Write out any batched state."""
+        pass
+
+    def close(self) -> None:
+        """Flush and release resources."""
+        self.flush()
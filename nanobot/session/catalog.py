@@ -0,0 +1,108 @@
+"""Session catalog: a SQLite index of session files for fast listing."""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any
+
+_COLUMNS = ("key", "path", "created_at", "updated_at", "message_count", "bytes", "last_consolidated")
+_SORTABLE = {"key", "created_at", "updated_at", "message_count", "bytes"}
+
+
+class SessionCatalog:
+    """
+    Index of sessions keyed by their exact session key.
+
+    One row per session file with its timestamps, message count, file size
+    and consolidation offset. SessionManager upserts a row in the same
+    critical section as each file write, so listing, sorting and paging
+    never have to open session files.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self.created = not db_path.exists()  # a new catalog must be backfilled from the files
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " key TEXT PRIMARY KEY,"
+                " path TEXT NOT NULL,"
+                " created_at TEXT,"
+                " updated_at TEXT,"
+                " message_count INTEGER NOT NULL DEFAULT 0,"
+                " bytes INTEGER NOT NULL DEFAULT 0,"
+                " last_consolidated INTEGER NOT NULL DEFAULT 0)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_updated ON sessions(updated_at)")
+
+    def upsert(self, entries: list[dict[str, Any]]) -> None:
+        """Insert or replace rows in a single transaction."""
+        rows = [tuple(e.get(c) for c in _COLUMNS) for e in entries]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO sessions ({', '.join(_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(_COLUMNS))})",
+                rows,
+            )
+
+    def remove(self, key: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM sessions WHERE key = ?", (key,))
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM sessions WHERE key = ?", (key,)
+            ).fetchone()
+        return dict(zip(_COLUMNS, row)) if row else None
+
+    def idle(self, before: str) -> list[dict[str, Any]]:
+        """Rows of plain (not yet archived) session files last updated before the given time."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM sessions "
+                "WHERE updated_at < ? AND path NOT LIKE '%.gz' ORDER BY updated_at",
+                (before,),
+            ).fetchall()
+        return [dict(zip(_COLUMNS, row)) for row in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def list(
+        self,
+        limit: int | None = None,
+        offset: int = 0,
+        sort: str = "updated_at",
+        descending: bool = True,
+    ) -> list[dict[str, Any]]:
+        """
+        List catalog rows.
+
+        Args:
+            limit: Maximum rows to return (None = all).
+            offset: Rows to skip, for paging.
+            sort: Column to sort by (key, created_at, updated_at, message_count, bytes).
+            descending: Sort direction.
+        """
+        if sort not in _SORTABLE:
+            raise ValueError(f"Cannot sort sessions by {sort!r}")
+        direction = "DESC" if descending else "ASC"
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM sessions "
+                f"ORDER BY {sort} {direction}, key LIMIT ? OFFSET ?",
+                (-1 if limit is None else limit, offset),
+            ).fetchall()
+        return [dict(zip(_COLUMNS, row)) for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
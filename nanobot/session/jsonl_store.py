@@ -0,0 +1,514 @@
+"""JSONL session store: one append-only file per session."""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import os
+import re
+import shutil
+import threading
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable
+
+from loguru import logger
+
+from nanobot.session.base import Session, SessionStore
+from nanobot.session.catalog import SessionCatalog
+from nanobot.utils import codec
+from nanobot.utils.helpers import safe_filename
+
+# Bytes read per step when scanning a session file backwards
+_TAIL_CHUNK = 64 * 1024
+
+# Matches metadata lines in both compact and stdlib-spaced files
+_METADATA_MARK = re.compile(rb'"_type":\s?"metadata"')
+
+
+def read_session_file(path: Path, key: str) -> Session:
+    """Read a whole JSONL session file (metadata lines plus message records)."""
+    messages = []
+    metadata = {}
+    created_at = None
+    last_consolidated = 0
+    metadata_lines = 0
+
+    with open(path, "rb") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+
+            try:
+                data = codec.loads(line)
+            except codec.JSONDecodeError:
+                # A torn append from a crash; everything before it is intact
+                logger.warning(f"Skipping corrupt line in session {key}")
+                continue
+
+            if data.get("_type") == "metadata":
+                metadata_lines += 1
+                metadata = data.get("metadata", {})
+                created_at = datetime.fromisoformat(data["created_at"]) if data.get("created_at") else None
+                last_consolidated = data.get("last_consolidated", 0)
+            else:
+                messages.append(data)
+
+    return Session(
+        key=key,
+        messages=messages,
+        created_at=created_at or datetime.now(),
+        metadata=metadata,
+        last_consolidated=last_consolidated,
+        _persisted=len(messages),
+        _trailers=max(0, metadata_lines - 1),
+    )
+
+
+class JsonlSessionStore(SessionStore):
+    """
+    Stores each session as a JSONL file in the sessions directory.
+
+    A file is a metadata line, then one line per message. Each write appends
+    only the new messages plus a metadata trailer line (the last one wins on
+    load). Files are rewritten after clear(), and compacted in the
+    background once compact_after trailers have accumulated.
+
+    Loading reads only the newest tail_messages records (and everything
+    after last_consolidated) by scanning the file backwards from its last
+    metadata line; older messages are read on demand via Session.load_all().
+
+    A SessionCatalog (catalog.db) indexes every file and is updated with
+    each write, so listing never opens session files.
+
+    Sessions idle past a cutoff can be archived to gzip-framed JSONL
+    (<name>.jsonl.gz); loading or writing an archived session restores the
+    plain file first, so the cold tier is transparent to callers.
+    """
+
+    def __init__(self, sessions_dir: Path, compact_after: int = 64, tail_messages: int = 200):
+        self.sessions_dir = sessions_dir
+        self.compact_after = compact_after
+        self.tail_messages = tail_messages  # 0 = always load whole files
+        # Per-session file locks (appends vs compaction); reentrant because a rewrite
+        # materializes older messages, which reads the file under the same lock
+        self._locks: dict[str, threading.RLock] = {}
+        self._compacting: set[str] = set()
+        self.catalog = SessionCatalog(self.sessions_dir / "catalog.db")
+        if self.catalog.created:
+            self.rebuild_catalog()
+
+    def _get_session_path(self, key: str) -> Path:
+        """Get the file path for a session."""
+        safe_key = safe_filename(key.replace(":", "_"))
+        return self.sessions_dir / f"{safe_key}.jsonl"
+
+    def adopt(self, key: str, path: Path) -> Session | None:
+        """Move a legacy session file into the sessions directory."""
+        shutil.move(str(path), str(self._get_session_path(key)))
+        logger.info(f"Migrated session {key} from legacy path")
+        return self.load(key)
+
+    @staticmethod
+    def _archive_path(path: Path) -> Path:
+        return path.with_name(path.name + ".gz")
+
+    def load(self, key: str) -> Session | None:
+        """Load a session from disk, restoring it from the archive if needed."""
+        path = self._get_session_path(key)
+
+        try:
+            with self._lock(key):
+                if not self._thaw(key, path):
+                    return None
+                if self.tail_messages > 0:
+                    tail = self._read_tail(path)
+                    if tail is not None:
+                        meta, messages, base, metadata_lines = tail
+                        return Session(
+                            key=key,
+                            messages=messages,
+                            created_at=datetime.fromisoformat(meta["created_at"]) if meta.get("created_at") else datetime.now(),
+                            metadata=meta.get("metadata", {}),
+                            last_consolidated=meta.get("last_consolidated", 0),
+                            _persisted=len(messages),
+                            _trailers=max(0, metadata_lines - 1),
+                            _base=base,
+                            _loader=partial(self._read_range, key) if base else None,
+                        )
+
+                return read_session_file(path, key)
+        except Exception as e:
+            logger.warning(f"Failed to load session {key}: {e}")
+            return None
+
+    def _thaw(self, key: str, path: Path) -> bool:
+        """
+        Restore an archived session file (caller holds the lock).
+
+        Returns:
+            True if the plain file exists afterwards.
+        """
+        if path.exists():
+            return True
+        archived = self._archive_path(path)
+        if not archived.exists():
+            return False
+        tmp = path.with_suffix(".jsonl.tmp")
+        with gzip.open(archived, "rb") as src, open(tmp, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.replace(tmp, path)
+        archived.unlink()
+        row = self.catalog.get(key)
+        if row:
+            self.catalog.upsert([{**row, "path": path.name, "bytes": path.stat().st_size}])
+        logger.info(f"Restored archived session {key}")
+        return True
+
+    def archive(self, cutoff: datetime, is_active: Callable[[str], bool]) -> tuple[int, int]:
+        """
+        Compress sessions whose last update is older than cutoff.
+
+        Args:
+            cutoff: Sessions updated before this are archived.
+            is_active: Returns True for keys held in memory; those are skipped.
+
+        Returns:
+            (sessions archived, bytes reclaimed).
+        """
+        archived = reclaimed = 0
+        for row in self.catalog.idle(cutoff.isoformat()):
+            key = row["key"]
+            path = self.sessions_dir / row["path"]
+            try:
+                with self._lock(key):
+                    if is_active(key) or not path.exists():
+                        continue
+                    target = self._archive_path(path)
+                    tmp = target.with_suffix(".tmp")
+                    with open(path, "rb") as src, gzip.open(tmp, "wb") as dst:
+                        shutil.copyfileobj(src, dst)
+                    before = path.stat().st_size
+                    os.replace(tmp, target)
+                    path.unlink()
+                    after = target.stat().st_size
+                    self.catalog.upsert([{**row, "path": target.name, "bytes": after}])
+            except Exception as e:
+                logger.warning(f"Failed to archive session {key}: {e}")
+                continue
+            archived += 1
+            reclaimed += before - after
+        return archived, reclaimed
+
+    def _read_tail(self, path: Path) -> tuple[dict[str, Any], list[dict[str, Any]], int, int] | None:
+        """
+        Read the newest message records by scanning a session file backwards.
+
+        Returns:
+            (latest metadata, records oldest-first, count of older messages
+            left unread, metadata lines seen), or None for files written
+            before metadata lines carried a message_count.
+        """
+        records: list[dict[str, Any]] = []
+        meta: dict[str, Any] | None = None
+        need: int | None = None
+        total = 0
+        metadata_lines = 0
+        complete = True
+
+        with open(path, "rb") as f:
+            pos = f.seek(0, os.SEEK_END)
+            rest = b""
+            while pos > 0 and complete:
+                step = min(_TAIL_CHUNK, pos)
+                pos -= step
+                f.seek(pos)
+                lines = (f.read(step) + rest).split(b"\n")
+                rest = lines.pop(0) if pos > 0 else b""
+                for raw in reversed(lines):
+                    if need is not None and len(records) >= need:
+                        complete = False
+                        break
+                    raw = raw.strip()
+                    if not raw:
+                        continue
+                    try:
+                        data = codec.loads(raw)
+                    except codec.JSONDecodeError:
+                        continue  # torn append
+                    if data.get("_type") != "metadata":
+                        records.append(data)
+                        continue
+                    metadata_lines += 1
+                    if meta is None:
+                        if "message_count" not in data:
+                            return None
+                        meta = data
+                        # Messages after the last trailer come from an append whose trailer was torn
+                        total = data["message_count"] + len(records)
+                        unconsolidated = total - data.get("last_consolidated", 0)
+                        need = min(total, max(self.tail_messages, unconsolidated))
+
+        if meta is None:
+            return None
+        records.reverse()
+        base = 0 if complete else max(0, total - len(records))
+        return meta, records, base, metadata_lines
+
+    def _read_range(self, key: str, start: int, end: int) -> list[dict[str, Any]]:
+        """Read message records [start, end) of a session file."""
+        path = self._get_session_path(key)
+        with self._lock(key):
+            self._thaw(key, path)
+        messages: list[dict[str, Any]] = []
+        index = 0
+        with open(path, "rb") as f:
+            for line in f:
+                if index >= end:
+                    break
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    data = codec.loads(line)
+                except codec.JSONDecodeError:
+                    continue
+                if data.get("_type") != "metadata":
+                    if index >= start:
+                        messages.append(data)
+                    index += 1
+        return messages
+    
+    @staticmethod
+    def _metadata_line(session: Session, message_count: int) -> dict[str, Any]:
+        return {
+            "_type": "metadata",
+            "key": session.key,
+            "created_at": session.created_at.isoformat(),
+            "updated_at": session.updated_at.isoformat(),
+            "metadata": session.metadata,
+            "last_consolidated": session.last_consolidated,
+            "message_count": message_count,
+        }
+
+    def _lock(self, key: str) -> threading.RLock:
+        return self._locks.setdefault(key, threading.RLock())
+
+    def write(self, session: Session) -> None:
+        """
+        Append new messages and a metadata trailer, so a turn costs O(new
+        messages) I/O; falls back to a full rewrite after clear().
+        """
+        path = self._get_session_path(session.key)
+
+        with self._lock(session.key):
+            self._thaw(session.key, path)
+            if session._rewrite or session._persisted > len(session.messages) or not path.exists():
+                self._rewrite_file(path, session)
+            else:
+                # Messages may still be appended by the event loop while a writer thread saves
+                end = len(session.messages)
+                lines = [codec.dumpb(m) for m in session.messages[session._persisted:end]]
+                lines.append(codec.dumpb(self._metadata_line(session, session._base + end)))
+                with open(path, "a+b") as f:
+                    if f.seek(0, os.SEEK_END) > 0:
+                        f.seek(-1, os.SEEK_END)
+                        if f.read(1) != b"\n":
+                            lines.insert(0, b"")  # end a torn line left by a crash, don't extend it
+                    f.write(b"\n".join(lines) + b"\n")
+                    size = f.tell()
+                session._persisted = end
+                session._trailers += 1
+                self._update_catalog(session, path, session._base + end, size)
+
+        if session._trailers >= self.compact_after:
+            self._schedule_compaction(session)
+
+    def sync(self, sessions: list[Session]) -> None:
+        """fsync each session file, then the directory (for rewrites and new files)."""
+        for session in sessions:
+            path = self._get_session_path(session.key)
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except FileNotFoundError:
+                continue
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        if sessions and hasattr(os, "O_DIRECTORY"):
+            fd = os.open(self.sessions_dir, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def _rewrite_file(self, path: Path, session: Session) -> None:
+        """Atomically rewrite a session file as header + messages + trailer (caller holds the lock)."""
+        session.load_all()
+        current = session.messages
+        messages = list(current)
+        tmp = path.with_suffix(".jsonl.tmp")
+        meta = codec.dumpb(self._metadata_line(session, len(messages))) + b"\n"
+        with open(tmp, "wb") as f:
+            f.write(meta)
+            for msg in messages:
+                f.write(codec.dumpb(msg) + b"\n")
+            if messages:
+                f.write(meta)  # trailer, so a tail load stops here instead of scanning to the header
+            size = f.tell()
+        os.replace(tmp, path)
+        self._update_catalog(session, path, len(messages), size)
+        session._persisted = len(messages)
+        session._trailers = 0
+        if session.messages is current:  # clear() since the snapshot still needs a rewrite
+            session._rewrite = False
+
+    def compact(self, session: Session) -> None:
+        """
+        Rewrite a session file without its accumulated metadata trailers.
+
+        Works on the file's own message lines, so a tail-loaded session is
+        not materialized; a single trailer is kept for tail-only loads.
+        """
+        try:
+            path = self._get_session_path(session.key)
+            with self._lock(session.key):
+                if not path.exists():
+                    return  # archived since the compaction was scheduled
+                records: list[bytes] = []
+                with open(path, "rb") as f:
+                    for raw in f:
+                        raw = raw.strip()
+                        if not raw:
+                            continue
+                        try:
+                            data = codec.loads(raw)
+                        except codec.JSONDecodeError:
+                            continue
+                        if data.get("_type") != "metadata":
+                            records.append(raw)
+                meta = codec.dumpb(self._metadata_line(session, len(records)))
+                data = b"\n".join([meta, *records, meta]) + b"\n"
+                tmp = path.with_suffix(".jsonl.tmp")
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+                session._trailers = 0
+                self._update_catalog(session, path, len(records), len(data))
+            logger.debug(f"Compacted session {session.key}")
+        except Exception as e:
+            logger.warning(f"Failed to compact session {session.key}: {e}")
+        finally:
+            self._compacting.discard(session.key)
+
+    def _schedule_compaction(self, session: Session) -> None:
+        """Compact in a worker thread when an event loop is running, else inline."""
+        if session.key in self._compacting:
+            return
+        self._compacting.add(session.key)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.compact(session)
+            return
+        loop.run_in_executor(None, self.compact, session)
+    
+    def _update_catalog(self, session: Session, path: Path, message_count: int, size: int) -> None:
+        """Record a session file's state in the catalog (caller holds the file lock)."""
+        try:
+            self.catalog.upsert([{
+                "key": session.key,
+                "path": path.name,
+                "created_at": session.created_at.isoformat(),
+                "updated_at": session.updated_at.isoformat(),
+                "message_count": message_count,
+                "bytes": size,
+                "last_consolidated": session.last_consolidated,
+            }])
+        except Exception as e:
+            logger.warning(f"Failed to update session catalog for {session.key}: {e}")
+
+    def list(
+        self,
+        limit: int | None = None,
+        offset: int = 0,
+        sort: str = "updated_at",
+        descending: bool = True,
+    ) -> list[dict[str, Any]]:
+        sessions = self.catalog.list(limit=limit, offset=offset, sort=sort, descending=descending)
+        for info in sessions:
+            info["path"] = str(self.sessions_dir / info["path"])
+        return sessions
+
+    def count(self) -> int:
+        return self.catalog.count()
+
+    def close(self) -> None:
+        self.catalog.close()
+
+    def rebuild_catalog(self) -> int:
+        """
+        Re-index every session file on disk (first run, or after external edits).
+
+        Returns:
+            Number of sessions indexed.
+        """
+        entries = []
+        paths = [*self.sessions_dir.glob("*.jsonl"), *self.sessions_dir.glob("*.jsonl.gz")]
+        for path in paths:
+            try:
+                entry = self._scan_file(path)
+            except Exception as e:
+                logger.warning(f"Skipping unreadable session file {path.name}: {e}")
+                continue
+            if entry:
+                entries.append(entry)
+        self.catalog.upsert(entries)
+        if entries:
+            logger.info(f"Indexed {len(entries)} session(s) in the catalog")
+        return len(entries)
+
+    def _scan_file(self, path: Path) -> dict[str, Any] | None:
+        """Build a catalog row from a session file's header and latest trailer."""
+        opener = gzip.open if path.suffix == ".gz" else open
+        with opener(path, "rb") as f:
+            first_line = f.readline().strip()
+            if not first_line:
+                return None
+            header = codec.loads(first_line)
+            if header.get("_type") != "metadata":
+                return None
+            data = self._last_trailer(f) or header
+            message_count = data.get("message_count")
+            if message_count is None:
+                # Written before trailers carried counts: count the records
+                f.seek(0)
+                message_count = sum(1 for raw in f if raw.strip() and not _METADATA_MARK.search(raw))
+        return {
+            # Files written before metadata carried the key fall back to the lossy stem mapping
+            "key": data.get("key") or header.get("key") or path.name.split(".")[0].replace("_", ":"),
+            "path": path.name,
+            "created_at": header.get("created_at"),
+            "updated_at": data.get("updated_at") or header.get("updated_at"),
+            "message_count": message_count,
+            "bytes": path.stat().st_size,
+            "last_consolidated": data.get("last_consolidated", 0),
+        }
+
+    @staticmethod
+    def _last_trailer(f: Any, window: int = 4096) -> dict[str, Any] | None:
+        """Find the last metadata line within the tail of an open binary file."""
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - window))
+        for raw in reversed(f.read().splitlines()):
+            if not _METADATA_MARK.search(raw):
+                continue
+            try:
+                return codec.loads(raw)
+            except codec.JSONDecodeError:
+                continue
+        return None
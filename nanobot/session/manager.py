@@ -1,83 +1,118 @@
 """Session management for conversation history."""
 
-import json
+import asyncio
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime, timedelta
 from pathlib import Path
-from dataclasses import dataclass, field
-from datetime import datetime
-from typing import Any
+from typing import Any, Callable
 
 from loguru import logger
 
+from nanobot.session.base import Session, SessionStore, message_tokens
 from nanobot.utils.helpers import ensure_dir, safe_filename
+from nanobot.utils.writer import GroupCommitWriter
 
+__all__ = ["Session", "SessionManager", "make_store", "message_tokens", "migrate_sessions"]
 
-@dataclass
-class Session:
+STORE_BACKENDS = ("jsonl", "sqlite")
+
+
+def make_store(
+    backend: str,
+    sessions_dir: Path,
+    compact_after: int = 64,
+    tail_messages: int = 200,
+) -> SessionStore:
+    """
+    Create a session store.
+
+    Args:
+        backend: "jsonl" (one append-only file per session) or "sqlite"
+            (a single WAL-mode database with one row per message).
+        sessions_dir: Directory holding the session data.
+        compact_after: JSONL only: metadata trailers before a file is compacted.
+        tail_messages: Newest messages read on load; older ones load on demand.
     """
-    A conversation session.
+    if backend == "jsonl":
+        from nanobot.session.jsonl_store import JsonlSessionStore
+        return JsonlSessionStore(sessions_dir, compact_after=compact_after, tail_messages=tail_messages)
+    if backend == "sqlite":
+        from nanobot.session.sqlite_store import SqliteSessionStore
+        return SqliteSessionStore(sessions_dir / "sessions.db", tail_messages=tail_messages)
+    raise ValueError(f"Unknown session store {backend!r} (expected one of {', '.join(STORE_BACKENDS)})")
 
-    Stores messages in JSONL format for easy reading and persistence.
 
-    Important: Messages are append-only for LLM cache efficiency.
-    The consolidation process writes summaries to MEMORY.md/HISTORY.md
-    but does NOT modify the messages list or get_history() output.
+def migrate_sessions(source: SessionStore, target: SessionStore) -> int:
     """
+    Copy every session from one store into another.
 
-    key: str  # channel:chat_id
-    messages: list[dict[str, Any]] = field(default_factory=list)
-    created_at: datetime = field(default_factory=datetime.now)
-    updated_at: datetime = field(default_factory=datetime.now)
-    metadata: dict[str, Any] = field(default_factory=dict)
-    last_consolidated: int = 0  # Number of messages already consolidated to files
-    
-    def add_message(self, role: str, content: str, **kwargs: Any) -> None:
-        """Add a message to the session."""
-        msg = {
-            "role": role,
-            "content": content,
-            "timestamp": datetime.now().isoformat(),
-            **kwargs
-        }
-        self.messages.append(msg)
-        self.updated_at = datetime.now()
-    
-    def get_history(self, max_messages: int = 500) -> list[dict[str, Any]]:
-        """Get recent messages in LLM format, preserving tool metadata."""
-        out: list[dict[str, Any]] = []
-        for m in self.messages[-max_messages:]:
-            entry: dict[str, Any] = {"role": m["role"], "content": m.get("content", "")}
-            for k in ("tool_calls", "tool_call_id", "name"):
-                if k in m:
-                    entry[k] = m[k]
-            out.append(entry)
-        return out
-    
-    def clear(self) -> None:
-        """Clear all messages and reset session to initial state."""
-        self.messages = []
-        self.last_consolidated = 0
-        self.updated_at = datetime.now()
+    Returns:
+        Number of sessions copied.
+    """
+    copied = 0
+    for info in source.list():
+        session = source.load(info["key"])
+        if session is None:
+            continue
+        session.load_all()
+        session._persisted = 0
+        session._rewrite = True
+        target.write(session)
+        copied += 1
+    target.flush()
+    return copied
 
 
 class SessionManager:
     """
     Manages conversation sessions.
 
-    Sessions are stored as JSONL files in the sessions directory.
+    Persistence is delegated to a SessionStore (JSONL files by default, or
+    SQLite); the manager owns caching and the one-time legacy migration.
+
+    Loaded sessions live in an LRU cache bounded by count and approximate
+    bytes. Evicted sessions are flushed first and stay reachable through a
+    weak map while still referenced (e.g. by an in-flight turn), so a key
+    never has two live Session objects.
+
+    With a GroupCommitWriter, saves are handed to its background thread,
+    which batches dirty sessions and syncs once per commit window; save()
+    returns a Future to await when durability matters.
     """
 
-    def __init__(self, workspace: Path):
+    def __init__(
+        self,
+        workspace: Path,
+        compact_after: int = 64,
+        max_cached: int = 256,
+        max_cache_bytes: int = 64 * 1024 * 1024,
+        tail_messages: int = 200,
+        backend: str = "jsonl",
+        writer: GroupCommitWriter | None = None,
+    ):
         self.workspace = workspace
         self.sessions_dir = ensure_dir(self.workspace / "sessions")
         # Legacy paths for migration (both upstream ~/.nanobot and our ~/.pocketbot)
         self.legacy_sessions_dir = Path.home() / ".nanobot" / "sessions"
         self._pocketbot_legacy_dir = Path.home() / ".pocketbot" / "sessions"
-        self._cache: dict[str, Session] = {}
-    
-    def _get_session_path(self, key: str) -> Path:
-        """Get the file path for a session."""
-        safe_key = safe_filename(key.replace(":", "_"))
-        return self.sessions_dir / f"{safe_key}.jsonl"
+        self.store = make_store(backend, self.sessions_dir, compact_after=compact_after, tail_messages=tail_messages)
+        self.writer = writer
+        self._queued: dict[str, int] = {}  # session key -> saves handed to the writer, not yet committed
+        self._queued_lock = threading.Lock()
+        self._cache: OrderedDict[str, Session] = OrderedDict()
+        self._cache_bytes: dict[str, int] = {}
+        self._total_bytes = 0
+        self._evicted: weakref.WeakValueDictionary[str, Session] = weakref.WeakValueDictionary()
+        self.max_cached = max(1, max_cached)
+        self.max_cache_bytes = max_cache_bytes
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_evictions = 0
+        self.archived_sessions = 0
+        self.bytes_reclaimed = 0
 
     def _get_legacy_session_path(self, key: str) -> Path:
         """Legacy global session path (~/.nanobot/sessions/)."""
@@ -94,107 +129,185 @@ class SessionManager:
         Returns:
             The session.
         """
-        if key in self._cache:
-            return self._cache[key]
+        session = self._cache.get(key)
+        if session is not None:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            return session
         
-        session = self._load(key)
+        self.cache_misses += 1
+        session = self._evicted.pop(key, None) or self._load(key)
         if session is None:
             session = Session(key=key)
         
-        self._cache[key] = session
+        self._admit(session)
         return session
     
+    def _admit(self, session: Session) -> None:
+        """Insert or refresh a session in the LRU cache, then enforce the limits."""
+        key = session.key
+        size = self._approx_bytes(session)
+        self._total_bytes += size - self._cache_bytes.get(key, 0)
+        self._cache_bytes[key] = size
+        self._cache[key] = session
+        self._cache.move_to_end(key)
+        
+        while len(self._cache) > 1 and (
+            len(self._cache) > self.max_cached or self._total_bytes > self.max_cache_bytes
+        ):
+            old_key, old = next(iter(self._cache.items()))
+            if old_key == key:
+                break
+            if old._rewrite or old._persisted < len(old.messages):
+                self._persist(old)  # flush before dropping
+            self._drop(old_key)
+            self._evicted[old_key] = old
+            self.cache_evictions += 1
+    
+    def _drop(self, key: str) -> None:
+        self._cache.pop(key, None)
+        self._total_bytes -= self._cache_bytes.pop(key, 0)
+    
+    @staticmethod
+    def _approx_bytes(session: Session) -> int:
+        """Approximate in-memory size (~4 bytes per estimated token, plus overhead)."""
+        return 512 + 4 * sum(message_tokens(m) for m in session.messages)
+    
+    def cache_stats(self) -> dict[str, int]:
+        """Cache occupancy and hit/miss/eviction counters."""
+        return {
+            "sessions": len(self._cache),
+            "bytes": self._total_bytes,
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "evictions": self.cache_evictions,
+        }
+    
     def _load(self, key: str) -> Session | None:
-        """Load a session from disk."""
-        path = self._get_session_path(key)
-        if not path.exists():
+        """Load a session from the store, adopting a legacy file if there is one."""
+        if self.writer and self._queued.get(key):
+            self.writer.flush()  # read-your-writes (e.g. a clear() saved just before invalidate())
+        session = self.store.load(key)
+        if session is None:
             legacy_path = self._get_legacy_session_path(key)
             if legacy_path.exists():
-                import shutil
-                shutil.move(str(legacy_path), str(path))
-                logger.info(f"Migrated session {key} from legacy path")
-
-        if not path.exists():
-            return None
-
-        try:
-            messages = []
-            metadata = {}
-            created_at = None
-            last_consolidated = 0
-
-            with open(path) as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-
-                    data = json.loads(line)
-
-                    if data.get("_type") == "metadata":
-                        metadata = data.get("metadata", {})
-                        created_at = datetime.fromisoformat(data["created_at"]) if data.get("created_at") else None
-                        last_consolidated = data.get("last_consolidated", 0)
-                    else:
-                        messages.append(data)
-
-            return Session(
-                key=key,
-                messages=messages,
-                created_at=created_at or datetime.now(),
-                metadata=metadata,
-                last_consolidated=last_consolidated
-            )
-        except Exception as e:
-            logger.warning(f"Failed to load session {key}: {e}")
-            return None
-    
-    def save(self, session: Session) -> None:
-        """Save a session to disk."""
-        path = self._get_session_path(session.key)
-
-        with open(path, "w") as f:
-            metadata_line = {
-                "_type": "metadata",
-                "created_at": session.created_at.isoformat(),
-                "updated_at": session.updated_at.isoformat(),
-                "metadata": session.metadata,
-                "last_consolidated": session.last_consolidated
-            }
-            f.write(json.dumps(metadata_line) + "\n")
-            for msg in session.messages:
-                f.write(json.dumps(msg) + "\n")
-
-        self._cache[session.key] = session
+                try:
+                    session = self.store.adopt(key, legacy_path)
+                except Exception as e:
+                    logger.warning(f"Failed to migrate legacy session {key}: {e}")
+        return session
+
+    def save(self, session: Session) -> Future:
+        """
+        Persist a session's new messages and metadata.
+
+        Returns:
+            Future resolved once the write is durable (already done without
+            a writer); await it with asyncio.wrap_future() if needed.
+        """
+        future = self._persist(session)
+        self._admit(session)
+        return future
+
+    def _persist(self, session: Session) -> Future:
+        if self.writer is not None:
+            key = session.key
+            with self._queued_lock:
+                self._queued[key] = self._queued.get(key, 0) + 1
+            future = self.writer.submit(self._commit, session, key=key)
+            future.add_done_callback(lambda _: self._unqueue(key))
+            return future
+        future: Future = Future()
+        self.store.write(session)
+        future.set_result(None)
+        return future
+
+    def _unqueue(self, key: str) -> None:
+        with self._queued_lock:
+            left = self._queued.pop(key, 1) - 1
+            if left > 0:
+                self._queued[key] = left
+
+    def _commit(self, sessions: list[Session]) -> None:
+        """Writer-thread batch: write every dirty session, then sync once."""
+        self.store.write_many(sessions)
+        self.store.sync(sessions)
     
     def invalidate(self, key: str) -> None:
-        """Remove a session from the in-memory cache."""
-        self._cache.pop(key, None)
+        """Remove a session from the in-memory cache (unsaved changes are discarded)."""
+        self._drop(key)
+        self._evicted.pop(key, None)
     
-    def list_sessions(self) -> list[dict[str, Any]]:
+    def list_sessions(
+        self,
+        limit: int | None = None,
+        offset: int = 0,
+        sort: str = "updated_at",
+        descending: bool = True,
+    ) -> list[dict[str, Any]]:
         """
-        List all sessions.
+        List sessions.
+        
+        Args:
+            limit: Maximum number of sessions (None = all).
+            offset: Sessions to skip, for paging.
+            sort: Field to sort by (key, created_at, updated_at, message_count, bytes).
+            descending: Sort direction.
         
         Returns:
             List of session info dicts.
         """
-        sessions = []
-        
-        for path in self.sessions_dir.glob("*.jsonl"):
+        return self.store.list(limit=limit, offset=offset, sort=sort, descending=descending)
+
+    def archive_idle(self, max_idle_days: float, owns: Callable[[str], bool] | None = None) -> tuple[int, int]:
+        """
+        Move sessions idle for max_idle_days to the store's compressed cold tier.
+
+        Sessions held in memory or with queued writes are skipped; archived
+        sessions are restored transparently when loaded again.
+
+        Args:
+            max_idle_days: Idle time after which a session is archived.
+            owns: When several processes share the sessions directory, the
+                keys this process writes; other keys are left alone, as
+                only their owner knows whether they are in use.
+
+        Returns:
+            (sessions archived, bytes reclaimed).
+        """
+        cutoff = datetime.now() - timedelta(days=max_idle_days)
+        is_active = self._is_active if owns is None else (lambda key: not owns(key) or self._is_active(key))
+        archived, reclaimed = self.store.archive(cutoff, is_active)
+        self.archived_sessions += archived
+        self.bytes_reclaimed += reclaimed
+        if archived:
+            logger.info(f"Archived {archived} idle session(s), reclaimed {reclaimed} bytes")
+        return archived, reclaimed
+
+    def _is_active(self, key: str) -> bool:
+        return key in self._cache or key in self._evicted or bool(self._queued.get(key))
+
+    async def run_archiver(
+        self, max_idle_days: float, interval_s: float = 3600, owns: Callable[[str], bool] | None = None,
+    ) -> None:
+        """Archive idle sessions every interval_s seconds, off the event loop (runs until cancelled)."""
+        while True:
             try:
-                # Read just the metadata line
-                with open(path) as f:
-                    first_line = f.readline().strip()
-                    if first_line:
-                        data = json.loads(first_line)
-                        if data.get("_type") == "metadata":
-                            sessions.append({
-                                "key": path.stem.replace("_", ":"),
-                                "created_at": data.get("created_at"),
-                                "updated_at": data.get("updated_at"),
-                                "path": str(path)
-                            })
-            except Exception:
-                continue
-        
-        return sorted(sessions, key=lambda x: x.get("updated_at", ""), reverse=True)
+                await asyncio.to_thread(self.archive_idle, max_idle_days, owns)
+            except Exception as e:
+                logger.warning(f"Session archiver failed: {e}")
+            await asyncio.sleep(interval_s)
+
+    def archive_stats(self) -> dict[str, int]:
+        """Sessions archived and bytes reclaimed by this process."""
+        return {"sessions": self.archived_sessions, "bytes_reclaimed": self.bytes_reclaimed}
+
+    def count_sessions(self) -> int:
+        """Number of stored sessions."""
+        return self.store.count()
+
+    def close(self) -> None:
+        """Drain the writer, flush batched writes and close the store."""
+        if self.writer is not None:
+            self.writer.close()
+        self.store.close()
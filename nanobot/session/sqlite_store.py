@@ -0,0 +1,222 @@
+"""SQLite session store: one WAL-mode database, one row per message."""
+
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import threading
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+from nanobot.session.base import Session, SessionStore
+from nanobot.session.jsonl_store import read_session_file
+from nanobot.utils import codec
+
+_LIST_COLUMNS = ("key", "created_at", "updated_at", "message_count", "bytes", "last_consolidated")
+_SORTABLE = {"key", "created_at", "updated_at", "message_count", "bytes"}
+
+_UPSERT = (
+    "INSERT INTO sessions (key, created_at, updated_at, metadata, last_consolidated, message_count, bytes) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(key) DO UPDATE SET "
+    "updated_at = excluded.updated_at, metadata = excluded.metadata, "
+    "last_consolidated = excluded.last_consolidated, message_count = excluded.message_count, "
+)
+
+
+class SqliteSessionStore(SessionStore):
+    """
+    Stores all sessions in a single SQLite database in WAL mode.
+
+    Messages are rows keyed by (session, seq), where seq is the message's
+    index in the conversation; a sessions table holds metadata and counts.
+    Writes issued while an event loop is running are batched and committed
+    once per loop tick in a single transaction, so a crash never leaves a
+    half-written turn behind. Commits are fully synchronous, so each batch
+    costs one fsync.
+    """
+
+    def __init__(self, db_path: Path, tail_messages: int = 200):
+        self.db_path = db_path
+        self.tail_messages = tail_messages  # 0 = always load whole sessions
+        self._lock = threading.RLock()  # load_all() may read while a flush holds the lock
+        self._pending: dict[str, Session] = {}
+        self._flush_scheduled = False
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " key TEXT PRIMARY KEY,"
+                " created_at TEXT,"
+                " updated_at TEXT,"
+                " metadata TEXT NOT NULL DEFAULT '{}',"
+                " last_consolidated INTEGER NOT NULL DEFAULT 0,"
+                " message_count INTEGER NOT NULL DEFAULT 0,"
+                " bytes INTEGER NOT NULL DEFAULT 0)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_updated ON sessions(updated_at)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS messages ("
+                " session TEXT NOT NULL,"
+                " seq INTEGER NOT NULL,"
+                " data TEXT NOT NULL,"
+                " PRIMARY KEY (session, seq)) WITHOUT ROWID"
+            )
+
+    def load(self, key: str) -> Session | None:
+        if key in self._pending:
+            self.flush()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT created_at, updated_at, metadata, last_consolidated, message_count "
+                "FROM sessions WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            created_at, updated_at, metadata, last_consolidated, count = row
+            need = count
+            if self.tail_messages > 0:
+                need = min(count, max(self.tail_messages, count - last_consolidated))
+            base = count - need
+            messages = [
+                codec.loads(data) for (data,) in self._conn.execute(
+                    "SELECT data FROM messages WHERE session = ? AND seq >= ? ORDER BY seq",
+                    (key, base),
+                )
+            ]
+        return Session(
+            key=key,
+            messages=messages,
+            created_at=datetime.fromisoformat(created_at) if created_at else datetime.now(),
+            updated_at=datetime.fromisoformat(updated_at) if updated_at else datetime.now(),
+            metadata=codec.loads(metadata),
+            last_consolidated=last_consolidated,
+            _persisted=len(messages),
+            _base=base,
+            _loader=partial(self._read_range, key) if base else None,
+        )
+
+    def _read_range(self, key: str, start: int, end: int) -> list[dict[str, Any]]:
+        """Read messages [start, end) of a session."""
+        with self._lock:
+            return [
+                codec.loads(data) for (data,) in self._conn.execute(
+                    "SELECT data FROM messages WHERE session = ? AND seq >= ? AND seq < ? ORDER BY seq",
+                    (key, start, end),
+                )
+            ]
+
+    def write(self, session: Session) -> None:
+        """Queue a session for the next flush (this loop tick, or now without a loop)."""
+        self._pending[session.key] = session
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            loop.call_soon(self.flush)
+
+    def write_many(self, sessions: list[Session]) -> None:
+        for session in sessions:
+            self._pending[session.key] = session
+        self.flush()
+
+    def flush(self) -> None:
+        """Commit every queued session in one transaction."""
+        self._flush_scheduled = False
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        done: list[tuple[Session, int, list[dict[str, Any]] | None]] = []
+        try:
+            with self._lock, self._conn:
+                for session in pending.values():
+                    done.append(self._write_rows(session))
+        except Exception as e:
+            logger.error(f"Failed to write {len(pending)} session(s): {e}")
+            for key, session in pending.items():
+                self._pending.setdefault(key, session)  # retried on the next write or flush
+            return
+        # Bookkeeping only advances once the transaction has committed
+        for session, persisted, snapshot in done:
+            session._persisted = persisted
+            if snapshot is not None and session.messages is snapshot:
+                session._rewrite = False
+
+    def _write_rows(self, session: Session) -> tuple[Session, int, list[dict[str, Any]] | None]:
+        """Write one session's rows (inside the flush transaction)."""
+        key = session.key
+        snapshot = None
+        if session._rewrite or session._persisted > len(session.messages):
+            session.load_all()
+            snapshot = session.messages
+            messages = list(snapshot)
+            start = 0
+            self._conn.execute("DELETE FROM messages WHERE session = ?", (key,))
+        else:
+            messages = session.messages[session._persisted:]
+            start = session._base + session._persisted
+        rows = [(key, start + i, codec.dumps(m)) for i, m in enumerate(messages)]
+        self._conn.executemany("INSERT OR REPLACE INTO messages (session, seq, data) VALUES (?, ?, ?)", rows)
+        size = sum(len(data) for _, _, data in rows)
+        self._conn.execute(
+            _UPSERT + ("bytes = excluded.bytes" if snapshot is not None else "bytes = bytes + excluded.bytes"),
+            (
+                key,
+                session.created_at.isoformat(),
+                session.updated_at.isoformat(),
+                codec.dumps(session.metadata),
+                session.last_consolidated,
+                start + len(messages),
+                size,
+            ),
+        )
+        return session, start + len(messages) - session._base, snapshot
+
+    def adopt(self, key: str, path: Path) -> Session | None:
+        """Import a legacy JSONL session file, then remove it."""
+        session = read_session_file(path, key)
+        session._persisted = 0
+        session._rewrite = True
+        self._pending[key] = session
+        self.flush()
+        path.unlink()
+        logger.info(f"Migrated session {key} from legacy path")
+        return session
+
+    def list(
+        self,
+        limit: int | None = None,
+        offset: int = 0,
+        sort: str = "updated_at",
+        descending: bool = True,
+    ) -> list[dict[str, Any]]:
+        if sort not in _SORTABLE:
+            raise ValueError(f"Cannot sort sessions by {sort!r}")
+        self.flush()
+        direction = "DESC" if descending else "ASC"
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(_LIST_COLUMNS)} FROM sessions "
+                f"ORDER BY {sort} {direction}, key LIMIT ? OFFSET ?",
+                (-1 if limit is None else limit, offset),
+            ).fetchall()
+        return [dict(zip(_LIST_COLUMNS, row)) for row in rows]
+
+    def count(self) -> int:
+        self.flush()
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def close(self) -> None:
+        self.flush()
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,56 @@
+"""JSON codec: orjson when installed, the stdlib json module otherwise."""
+
+import json
+from typing import Any, Callable
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+# orjson.JSONDecodeError subclasses this, so one except clause covers both backends
+JSONDecodeError = json.JSONDecodeError
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+
+def dumpb(obj: Any, indent: bool = False, default: Callable[[Any], Any] | None = None) -> bytes:
+    """
+    Serialize to UTF-8 JSON bytes.
+
+    Output is compact (no spaces after separators) and not ASCII-escaped,
+    whichever backend is in use; indent=True pretty-prints with two spaces.
+    default converts objects JSON cannot represent, as in json.dumps.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=default, option=_OPTIONS | (orjson.OPT_INDENT_2 if indent else 0))
+        except TypeError:
+            pass  # e.g. integers wider than 64 bits or lone surrogates: let the stdlib handle it
+    # Lone surrogates become \udXXX escapes, which is what JSON expects anyway
+    return _std_dumps(obj, indent, default).encode("utf-8", "backslashreplace")
+
+
+def dumps(obj: Any, indent: bool = False, default: Callable[[Any], Any] | None = None) -> str:
+    """Serialize to a JSON string (see dumpb for the output format)."""
+    if orjson is not None:
+        return dumpb(obj, indent, default).decode()
+    return _std_dumps(obj, indent, default)
+
+
+def loads(data: str | bytes | bytearray) -> Any:
+    """Parse JSON from a string or UTF-8 bytes. Raises JSONDecodeError on bad input."""
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass  # stdlib-only inputs (NaN, lone surrogates); truly bad input raises below
+    return json.loads(data)
+
+
+def _std_dumps(obj: Any, indent: bool, default: Callable[[Any], Any] | None = None) -> str:
+    if indent:
+        return json.dumps(obj, ensure_ascii=False, indent=2, default=default)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=default)
@@ -45,6 +45,20 @@ def get_skills_path(workspace: Path | None = None) -> Path:
     return ensure_dir(ws / "skills")
 
 
+def file_signature(path: Path) -> tuple[int, int] | None:
+    """Get (mtime_ns, size) of a path for cheap change detection, or None if missing."""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def estimate_tokens(text: str) -> int:
+    """Fast token estimate (~4 UTF-8 bytes per token), no tokenizer needed."""
+    return len(text.encode("utf-8")) // 4 + 1
+
+
 def timestamp() -> str:
     """Get current timestamp in ISO format."""
     return datetime.now().isoformat()
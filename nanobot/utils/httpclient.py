@@ -0,0 +1,130 @@
+"""Process-wide pooled HTTP clients."""
+
+from __future__ import annotations
+
+import asyncio
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Any
+
+import httpx
+from loguru import logger
+
+
+class _RejectCookies(DefaultCookiePolicy):
+    """Keep shared clients stateless: a Set-Cookie from one caller must not reach another."""
+
+    def set_ok(self, cookie, request) -> bool:
+        return False
+
+
+class HttpClients:
+    """
+    Registry of shared httpx.AsyncClients, one per named profile.
+
+    Call sites ask for a client by name instead of opening their own, so
+    connections are kept alive and reused: each client pools connections
+    per origin (scheme, host, port), bounded by the configured limits, and
+    with HTTP/2 enabled requests to one host are multiplexed over a single
+    connection. Profiles exist for settings httpx fixes per client, such as
+    redirect limits and TLS verification. Clients never store cookies, as
+    one client serves every session and user.
+
+    Clients are bound to the event loop they were created on; if a new
+    loop starts (e.g. a second asyncio.run()), fresh clients are created.
+    """
+
+    def __init__(self) -> None:
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._requests: dict[str, dict[str, int]] = {}
+        self.configure()
+
+    def configure(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 30.0,
+        connect_timeout: float = 10.0,
+        http2: bool = False,
+    ) -> None:
+        """Set pool limits and defaults; applies to clients created afterwards."""
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("HTTP/2 requested but the h2 package is not installed, using HTTP/1.1")
+                http2 = False
+        self.http2 = http2
+
+    def get(self, name: str = "default", **client_kwargs: Any) -> httpx.AsyncClient:
+        """
+        The shared client for a profile, created on first use.
+
+        client_kwargs (e.g. follow_redirects, max_redirects, verify) only
+        take effect when the profile's client is created, so a profile
+        name must always be used with the same settings.
+        """
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._clients = {}  # the old loop's connections cannot be reused
+            self._loop = loop
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            counts = self._requests.setdefault(name, {})
+
+            async def _count(request: httpx.Request) -> None:
+                host = request.url.host
+                counts[host] = counts.get(host, 0) + 1
+
+            client = httpx.AsyncClient(
+                limits=self.limits,
+                timeout=self.timeout,
+                http2=self.http2,
+                event_hooks={"request": [_count]},
+                cookies=CookieJar(policy=_RejectCookies()),
+                **client_kwargs,
+            )
+            self._clients[name] = client
+        return client
+
+    async def aclose(self) -> None:
+        """Close every pooled connection (at shutdown)."""
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.debug(f"Error closing HTTP client: {e}")
+
+    def stats(self) -> dict[str, Any]:
+        """Requests and open connections per profile and host."""
+        result: dict[str, Any] = {}
+        for name, counts in self._requests.items():
+            connections: dict[str, dict[str, int]] = {}
+            client = self._clients.get(name)
+            # httpcore exposes the pool's connections; their origin is best-effort
+            pool = getattr(getattr(client, "_transport", None), "_pool", None)
+            for conn in getattr(pool, "connections", []):
+                origin = getattr(conn, "_origin", None)
+                host = origin.host.decode() if origin is not None else "?"
+                state = connections.setdefault(host, {"active": 0, "idle": 0})
+                state["idle" if conn.is_idle() else "active"] += 1
+            result[name] = {
+                "requests": sum(counts.values()),
+                "hosts": {
+                    host: {"requests": n, **connections.get(host, {"active": 0, "idle": 0})}
+                    for host, n in counts.items()
+                },
+                "http2": self.http2,
+            }
+        return result
+
+
+http_clients = HttpClients()
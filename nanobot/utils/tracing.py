@@ -0,0 +1,235 @@
+"""Request tracing: spans through the bus, agent loop, LLM calls, tools and channel sends."""
+
+from __future__ import annotations
+
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator
+
+from loguru import logger
+
+from nanobot.utils import codec
+
+SINK_FORMATS = ("jsonl", "otlp")
+
+# Metadata key carrying {"trace_id", "span_id"} on bus messages, so a trace
+# survives queues, the inbound log and worker processes
+TRACE_KEY = "_trace"
+
+_current: ContextVar["Span | None"] = ContextVar("nanobot_span", default=None)
+
+
+def _new_id(nbytes: int) -> str:
+    return os.urandom(nbytes).hex()
+
+
+@dataclass
+class Span:
+    """One timed operation within a trace (times are epoch seconds)."""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    start: float
+    end: float | None = None
+    status: str = "ok"
+    attrs: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration_ms(self) -> float:
+        return round(((self.end or time.time()) - self.start) * 1000, 3)
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+    def context(self) -> dict[str, str]:
+        """Trace context to attach to a message (see TRACE_KEY)."""
+        return {"trace_id": self.trace_id, "span_id": self.span_id}
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "attrs": self.attrs,
+        }
+
+    def to_otlp(self) -> dict[str, Any]:
+        """The span in OTLP/JSON form (as written by the collector's file exporter)."""
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(int(self.start * 1e9)),
+            "endTimeUnixNano": str(int((self.end or self.start) * 1e9)),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in self.attrs.items()],
+            "status": {"code": 2 if self.status == "error" else 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Tracer:
+    """
+    Records finished spans into an in-memory ring buffer and, optionally,
+    appends them to a file as JSON lines ("jsonl") or OTLP/JSON export
+    requests ("otlp", one per line, readable by an OpenTelemetry collector).
+
+    The current span lives in a context variable, so spans opened inside a
+    turn (LLM calls, tools, subagent tasks) nest under it without being
+    passed around; across the bus the context rides in message metadata.
+    """
+
+    def __init__(self, ring_size: int = 2000):
+        self.enabled = True
+        self._ring: deque[Span] = deque(maxlen=ring_size)
+        self._sink: Any = None
+        self._sink_format = "jsonl"
+
+    def configure(
+        self,
+        enabled: bool = True,
+        ring_size: int = 2000,
+        sink: str = "",
+        path: Path | None = None,
+    ) -> None:
+        """Apply settings; sink "" keeps spans in memory only."""
+        if sink and sink not in SINK_FORMATS:
+            raise ValueError(f"Unknown trace sink {sink!r} (expected one of {', '.join(SINK_FORMATS)})")
+        self.close()
+        self.enabled = enabled
+        self._ring = deque(self._ring, maxlen=ring_size)
+        self._sink_format = sink or "jsonl"
+        if enabled and sink and path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._sink = open(path, "ab")
+            logger.info(f"Writing {sink} traces to {path}")
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        trace_id: str | None = None,
+        parent_id: str | None = None,
+        **attrs: Any,
+    ) -> Iterator[Span]:
+        """
+        Time a block as a span.
+
+        The parent is the current span unless trace_id/parent_id are given
+        (to continue a trace carried in message metadata); with neither, a
+        new trace starts. Exceptions mark the span as an error and propagate.
+        """
+        current = _current.get()
+        if trace_id is None and current is not None:
+            trace_id, parent_id = current.trace_id, current.span_id
+        span = Span(
+            name=name,
+            trace_id=trace_id or _new_id(16),
+            span_id=_new_id(8),
+            parent_id=parent_id,
+            start=time.time(),
+            attrs=attrs,
+        )
+        token = _current.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.status = "error"
+            span.attrs["error"] = str(e)[:200]
+            raise
+        finally:
+            _current.reset(token)
+            span.end = time.time()
+            self._export(span)
+
+    def record(
+        self,
+        name: str,
+        start: float,
+        end: float | None = None,
+        trace_id: str | None = None,
+        parent_id: str | None = None,
+        **attrs: Any,
+    ) -> Span:
+        """Record a span after the fact (e.g. time a message spent queued)."""
+        span = Span(
+            name=name,
+            trace_id=trace_id or _new_id(16),
+            span_id=_new_id(8),
+            parent_id=parent_id,
+            start=start,
+            end=end or time.time(),
+            attrs=attrs,
+        )
+        self._export(span)
+        return span
+
+    def _export(self, span: Span) -> None:
+        if not self.enabled:
+            return
+        self._ring.append(span)
+        if self._sink is None:
+            return
+        if self._sink_format == "otlp":
+            record = {"resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": "nanobot"}}]},
+                "scopeSpans": [{"scope": {"name": "nanobot"}, "spans": [span.to_otlp()]}],
+            }]}
+        else:
+            record = span.to_dict()
+        try:
+            self._sink.write(codec.dumpb(record, default=str) + b"\n")
+            self._sink.flush()
+        except OSError as e:
+            logger.warning(f"Trace sink write failed, disabling it: {e}")
+            self.close()
+
+    def recent(self, limit: int = 200, trace_id: str | None = None) -> list[dict[str, Any]]:
+        """Finished spans, newest first, optionally for one trace only."""
+        spans = []
+        for span in reversed(self._ring):
+            if trace_id is None or span.trace_id == trace_id:
+                spans.append(span.to_dict())
+                if len(spans) >= limit:
+                    break
+        return spans
+
+    def close(self) -> None:
+        if self._sink is not None:
+            self._sink.close()
+            self._sink = None
+
+
+tracer = Tracer()
+
+
+def span(name: str, trace_id: str | None = None, parent_id: str | None = None, **attrs: Any):
+    """Time a block as a span on the process-wide tracer (see Tracer.span)."""
+    return tracer.span(name, trace_id=trace_id, parent_id=parent_id, **attrs)
+
+
+def current_span() -> Span | None:
+    return _current.get()
@@ -0,0 +1,133 @@
+"""Background group-commit writer for file and database persistence."""
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable
+
+from loguru import logger
+
+# Commit function: persists one batch of items (oldest first) and makes it durable
+CommitFn = Callable[[list[Any]], None]
+
+
+class GroupCommitWriter:
+    """
+    Dedicated writer thread that persists queued items in groups.
+
+    Items are submitted with a commit function. The thread waits one commit
+    window after the first item arrives, then hands every queued item to
+    its commit function in a single call, so a burst of saves costs one
+    write pass and one fsync per store instead of one each. Items submitted
+    with the same key are coalesced (the latest wins), which suits "write
+    the current state of X" jobs such as session saves.
+
+    submit() returns a concurrent Future that resolves once the batch is
+    durable; async callers can await it with asyncio.wrap_future().
+    """
+
+    def __init__(self, commit_window: float = 0.01):
+        self.commit_window = commit_window
+        self._cond = threading.Condition()
+        # commit fn -> {key: (item, futures)}, in submission order
+        self._queue: dict[CommitFn, dict[Any, tuple[Any, list[Future]]]] = {}
+        self._busy = False
+        self._closed = False
+        self._thread: threading.Thread | None = None
+        self.commits = 0
+        self.items = 0
+
+    def submit(self, commit: CommitFn, item: Any, key: Any = None) -> Future:
+        """
+        Queue an item for the next group commit.
+
+        Args:
+            commit: Function that persists a batch of items.
+            item: The item to persist.
+            key: Coalescing key; a queued item with the same key and commit
+                function is replaced. None never coalesces.
+
+        Returns:
+            Future resolved (or failed) when the item's batch is committed.
+        """
+        future: Future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Writer is closed")
+            batch = self._queue.setdefault(commit, {})
+            slot = object() if key is None else key
+            futures = batch[slot][1] if slot in batch else []
+            futures.append(future)
+            batch[slot] = (item, futures)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="nanobot-writer", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+        return future
+
+    def pending(self) -> int:
+        """Items queued or being committed."""
+        with self._cond:
+            return sum(len(batch) for batch in self._queue.values()) + int(self._busy)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return  # closed and drained
+                if self.commit_window > 0:
+                    # Let the group fill up; close() cuts the window short
+                    self._cond.wait_for(lambda: self._closed, timeout=self.commit_window)
+                queue, self._queue = self._queue, {}
+                self._busy = True
+            try:
+                for commit, batch in queue.items():
+                    self._commit(commit, batch)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _commit(self, commit: CommitFn, batch: dict[Any, tuple[Any, list[Future]]]) -> None:
+        error: BaseException | None = None
+        try:
+            commit([item for item, _ in batch.values()])
+        except Exception as e:
+            error = e
+            logger.error(f"Background write of {len(batch)} item(s) failed: {e}")
+        self.commits += 1
+        self.items += len(batch)
+        for _, futures in batch.values():
+            for future in futures:
+                if error is None:
+                    future.set_result(None)
+                else:
+                    future.set_exception(error)
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Block until everything queued so far is committed. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._queue or self._busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self) -> None:
+        """Commit everything still queued and stop the thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+
+    def stats(self) -> dict[str, int]:
+        """Queue depth and commit counters."""
+        return {"pending": self.pending(), "commits": self.commits, "items": self.items}
@@ -3,10 +3,10 @@
 from __future__ import annotations
 
 import asyncio
-import json
 import secrets
 import time
 import uuid
+from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import Any
 
@@ -19,6 +19,10 @@ from starlette.types import ASGIApp
 
 from nanobot.bus.events import InboundMessage
 from nanobot.bus.queue import MessageBus
+from nanobot.providers.routing import RoutingProvider
+from nanobot.providers.scheduler import ScheduledProvider
+from nanobot.utils import codec, tracing
+from nanobot.utils.httpclient import http_clients
 
 
 STATIC_DIR = Path(__file__).parent / "static"
@@ -68,7 +72,12 @@ def create_app(
     Returns:
         Configured FastAPI application.
     """
-    app = FastAPI(title="pocketbot", docs_url="/api/docs")
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        yield
+        await http_clients.aclose()  # pooled connections belong to the server's event loop
+
+    app = FastAPI(title="pocketbot", docs_url="/api/docs", lifespan=lifespan)
 
     # Security headers on every response
     app.add_middleware(SecureHeadersMiddleware)
@@ -151,8 +160,37 @@ def create_app(
             "auth_enabled": config.web.auth.enabled if config else False,
             "host": config.web.host if config else "unknown",
             "port": config.web.port if config else 0,
+            "token_usage": agent_loop.token_usage if agent_loop else {},
+            "consolidation": agent_loop.consolidator.metrics() if agent_loop else {},
+            "session_cache": agent_loop.sessions.cache_stats() if agent_loop else {},
+            "writer": agent_loop.sessions.writer.stats() if agent_loop and agent_loop.sessions.writer else {},
+            "session_archive": agent_loop.sessions.archive_stats() if agent_loop else {},
+            "bus": bus.stats(),
+            "http": http_clients.stats(),
+            "llm_routing": agent_loop.provider.stats() if isinstance(getattr(agent_loop, "provider", None), RoutingProvider) else {},
+            "llm_scheduler": _scheduler_stats(getattr(agent_loop, "provider", None)),
         }
 
+    @app.get("/api/sessions", dependencies=[auth_dep])
+    async def api_sessions(limit: int = 50, offset: int = 0, sort: str = "updated_at", order: str = "desc"):
+        """List sessions from the session catalog, one page at a time."""
+        if not agent_loop:
+            return {"total": 0, "sessions": []}
+        sessions = agent_loop.sessions
+        try:
+            page = sessions.list_sessions(
+                limit=max(0, min(limit, 500)), offset=max(0, offset),
+                sort=sort, descending=order != "asc",
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"total": sessions.count_sessions(), "sessions": page}
+
+    @app.get("/api/traces", dependencies=[auth_dep])
+    async def api_traces(limit: int = 200, trace_id: str | None = None):
+        """Recent spans from the in-memory trace buffer, newest first."""
+        return {"spans": tracing.tracer.recent(limit=max(1, min(limit, 5000)), trace_id=trace_id)}
+
     @app.get("/api/config", dependencies=[auth_dep])
     async def api_config():
         """Get safe (non-secret) configuration info."""
@@ -359,7 +397,6 @@ def create_app(
         """Send push notification to all registered Expo tokens."""
         if not push_tokens:
             return
-        import httpx
         messages = [
             {
                 "to": tok,
@@ -370,15 +407,14 @@ def create_app(
             for tok in push_tokens
         ]
         try:
-            async with httpx.AsyncClient() as client:
-                await client.post(
-                    "https://exp.host/--/api/v2/push/send",
-                    json=messages,
-                    headers={
-                        "Content-Type": "application/json",
-                    },
-                    timeout=10.0,
-                )
+            await http_clients.get().post(
+                "https://exp.host/--/api/v2/push/send",
+                json=messages,
+                headers={
+                    "Content-Type": "application/json",
+                },
+                timeout=10.0,
+            )
         except Exception as e:
             logger.warning(f"Push notification failed: {e}")
 
@@ -407,7 +443,7 @@ def create_app(
 
         try:
             # Send welcome
-            await ws.send_json({
+            await _send_json(ws, {
                 "type": "connected",
                 "session_id": ws_id,
             })
@@ -425,22 +461,41 @@ def create_app(
                     await ws.close(code=1001, reason="Idle timeout")
                     break
                 try:
-                    data = json.loads(raw)
-                except json.JSONDecodeError:
+                    data = codec.loads(raw)
+                except codec.JSONDecodeError:
                     data = {"content": raw}
 
                 msg_type = data.get("type", "message")
                 content = data.get("content", "").strip()
 
                 if msg_type == "ping":
-                    await ws.send_json({"type": "pong"})
+                    await _send_json(ws, {"type": "pong"})
                     continue
 
                 if not content:
                     continue
 
                 # Send typing indicator
-                await ws.send_json({"type": "typing", "status": True})
+                await _send_json(ws, {"type": "typing", "status": True})
+
+                streamed = False
+
+                async def _on_stream(delta: str) -> None:
+                    nonlocal streamed
+                    streamed = True
+                    await _send_json(ws, {"type": "delta", "content": delta})
+
+                async def _on_progress(text: str) -> None:
+                    # Seal the streamed draft of an iteration that ended in tool calls
+                    nonlocal streamed
+                    if streamed:
+                        streamed = False
+                        await _send_json(ws, {
+                            "type": "message",
+                            "role": "assistant",
+                            "content": text,
+                            "timestamp": _timestamp(),
+                        })
 
                 try:
                     if agent_loop:
@@ -449,6 +504,8 @@ def create_app(
                             session_key=session_key,
                             channel="web",
                             chat_id=ws_id,
+                            on_progress=_on_progress,
+                            on_stream=_on_stream,
                         )
                     else:
                         # Fallback: publish to bus and wait
@@ -456,7 +513,7 @@ def create_app(
                             bus, content, session_key, ws_id, pending
                         )
 
-                    await ws.send_json({
+                    await _send_json(ws, {
                         "type": "message",
                         "role": "assistant",
                         "content": response_text or "",
@@ -471,12 +528,12 @@ def create_app(
                     )
                 except Exception as e:
                     logger.error(f"Error processing web message: {e}")
-                    await ws.send_json({
+                    await _send_json(ws, {
                         "type": "error",
                         "content": f"Error: {str(e)}",
                     })
                 finally:
-                    await ws.send_json({"type": "typing", "status": False})
+                    await _send_json(ws, {"type": "typing", "status": False})
 
         except WebSocketDisconnect:
             logger.info(f"WebSocket disconnected: {ws_id}")
@@ -530,6 +587,22 @@ def _get_version() -> str:
         return "unknown"
 
 
+def _scheduler_stats(provider: Any) -> dict[str, Any]:
+    """Admission queue and rate-limit state of each scheduled backend."""
+    if isinstance(provider, ScheduledProvider):
+        return {"default": provider.stats()}
+    if isinstance(provider, RoutingProvider):
+        return {
+            b.name: b.provider.stats() for b in provider.backends if isinstance(b.provider, ScheduledProvider)
+        }
+    return {}
+
+
+async def _send_json(ws: WebSocket, payload: dict[str, Any]) -> None:
+    """Send a JSON text frame encoded with the shared codec."""
+    await ws.send_text(codec.dumps(payload))
+
+
 def _timestamp() -> str:
     from datetime import datetime, timezone
     return datetime.now(timezone.utc).isoformat()
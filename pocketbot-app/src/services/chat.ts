@@ -1,7 +1,9 @@
 /**
  * WebSocket chat service — mirrors the Web UI /ws/chat protocol.
  *
- * Server message types: connected, message, typing, error, pong
+ * Server message types: connected, message, delta, typing, error, pong
+ * ("delta" frames stream partial assistant text; the final "message" carries
+ * the complete reply, so clients may ignore deltas.)
  * Client message types: { type: "message", content: "..." } | { type: "ping" }
  */
 
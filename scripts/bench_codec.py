@@ -0,0 +1,97 @@
+"""
+Per-turn JSON serialization cost: stdlib json vs nanobot.utils.codec.
+
+A turn is modelled on what the agent actually encodes: the session records
+appended for a tool-using exchange (user message, assistant tool call,
+tool result, final answer) plus their metadata trailer, reloading those
+records, and the WebSocket frames streamed to the web UI.
+
+Usage: python scripts/bench_codec.py [--turns N]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from nanobot.utils import codec  # noqa: E402
+
+
+def make_turn(i: int) -> tuple[list[dict], dict, list[dict]]:
+    """Session records, metadata trailer and WebSocket frames for one turn."""
+    ts = "2026-01-01T12:00:00.000000"
+    page = ("Lorem ipsum dolor sit amet, consectetur adipiscing elit. Ünïcödé → ✓ " * 60).strip()
+    records = [
+        {"role": "user", "content": f"Summarise the release notes for version {i}", "timestamp": ts, "tokens": 14},
+        {
+            "role": "assistant",
+            "content": "",
+            "tool_calls": [{
+                "id": f"call_{i}",
+                "type": "function",
+                "function": {"name": "web_fetch", "arguments": json.dumps({"url": f"https://example.com/{i}"})},
+            }],
+            "timestamp": ts,
+            "tokens": 30,
+        },
+        {"role": "tool", "tool_call_id": f"call_{i}", "name": "web_fetch", "content": page, "timestamp": ts},
+        {"role": "assistant", "content": "Here is the summary:\n" + page[:800], "timestamp": ts, "tokens": 210},
+    ]
+    trailer = {
+        "_type": "metadata",
+        "key": "web:abcd1234",
+        "created_at": ts,
+        "updated_at": ts,
+        "metadata": {"channel": "web"},
+        "last_consolidated": i,
+        "message_count": 4 * (i + 1),
+    }
+    frames = [{"type": "typing", "status": True}]
+    frames += [{"type": "delta", "content": word + " "} for word in page[:800].split()]
+    frames += [
+        {"type": "message", "role": "assistant", "content": records[-1]["content"], "timestamp": ts},
+        {"type": "typing", "status": False},
+    ]
+    return records, trailer, frames
+
+
+def run(dumps, loads, turns: list) -> float:
+    """Seconds spent encoding and decoding every turn."""
+    start = time.perf_counter()
+    for records, trailer, frames in turns:
+        lines = [dumps(r) for r in records]
+        lines.append(dumps(trailer))
+        for line in lines:
+            loads(line)
+        for frame in frames:
+            dumps(frame)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--turns", type=int, default=2000)
+    args = parser.parse_args()
+
+    turns = [make_turn(i) for i in range(args.turns)]
+    candidates = {
+        "stdlib json": (json.dumps, json.loads),
+        f"codec ({codec.BACKEND})": (codec.dumpb, codec.loads),
+    }
+    results = {}
+    for name, (dumps, loads) in candidates.items():
+        run(dumps, loads, turns[:100])  # warm up
+        results[name] = min(run(dumps, loads, turns) for _ in range(3))
+
+    baseline = results["stdlib json"]
+    print(f"{args.turns} turns, best of 3")
+    for name, seconds in results.items():
+        per_turn = seconds / args.turns * 1e6
+        print(f"  {name:<16} {per_turn:8.1f} us/turn  ({baseline / seconds:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+"""Tests for nanobot.agent.loop — inbound dispatch and the agent iteration loop."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from typing import Any
+
+import pytest
+
+from nanobot.agent.loop import AgentLoop
+from nanobot.bus.events import InboundMessage
+from nanobot.bus.queue import MessageBus
+from nanobot.providers.base import LLMProvider, LLMResponse, LLMStreamChunk, ToolCallAssembler
+
+
+class SlowEchoProvider(LLMProvider):
+    """Provider that echoes the last user message after a fixed delay."""
+
+    def __init__(self, delay: float = 0.05):
+        super().__init__()
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.seen: list[str] = []
+
+    async def chat(self, messages: list[dict[str, Any]], tools=None, model=None,
+                   max_tokens: int = 4096, temperature: float = 0.7) -> LLMResponse:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        # Strip the current-time line ContextBuilder puts ahead of the user text
+        text = messages[-1]["content"].split("\n\n", 1)[-1]
+        self.seen.append(text)
+        return LLMResponse(content=f"echo: {text}")
+
+    def get_default_model(self) -> str:
+        return "test-model"
+
+
+class StreamingProvider(LLMProvider):
+    """Provider that streams a fixed reply word by word."""
+
+    def __init__(self, reply: str = "hello streaming world"):
+        super().__init__()
+        self.reply = reply
+
+    async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7):
+        return LLMResponse(content=self.reply)
+
+    async def chat_stream(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7):
+        words = self.reply.split(" ")
+        for i, word in enumerate(words):
+            yield LLMStreamChunk(content=word if i == 0 else " " + word)
+        yield LLMStreamChunk(response=LLMResponse(content=self.reply))
+
+    def get_default_model(self) -> str:
+        return "test-model"
+
+
+def _make_loop(tmp_path, provider: LLMProvider, **kwargs: Any) -> AgentLoop:
+    return AgentLoop(bus=MessageBus(), provider=provider, workspace=tmp_path, **kwargs)
+
+
+def _msg(chat_id: str, content: str, channel: str = "telegram") -> InboundMessage:
+    return InboundMessage(channel=channel, sender_id="u", chat_id=chat_id, content=content)
+
+
+async def _collect(bus: MessageBus, n: int, timeout: float = 5.0) -> list:
+    return [await asyncio.wait_for(bus.consume_outbound(), timeout) for _ in range(n)]
+
+
+# ---------------------------------------------------------------------------
+# Per-session lanes
+# ---------------------------------------------------------------------------
+
+class TestSessionLanes:
+    @pytest.mark.asyncio
+    async def test_different_sessions_run_concurrently(self, tmp_path):
+        provider = SlowEchoProvider(delay=0.1)
+        loop = _make_loop(tmp_path, provider, max_concurrent_sessions=4)
+        for i in range(4):
+            loop._dispatch(_msg(str(i), f"hi {i}"))
+
+        out = await _collect(loop.bus, 4)
+        assert len(out) == 4
+        assert provider.max_in_flight == 4
+
+    @pytest.mark.asyncio
+    async def test_same_session_is_strictly_ordered(self, tmp_path):
+        provider = SlowEchoProvider(delay=0.01)
+        loop = _make_loop(tmp_path, provider, max_concurrent_sessions=4)
+        for i in range(5):
+            loop._dispatch(_msg("42", f"m{i}"))
+
+        out = await _collect(loop.bus, 5)
+        assert [o.content for o in out] == [f"echo: m{i}" for i in range(5)]
+        assert provider.max_in_flight == 1
+        history = loop.sessions.get_or_create("telegram:42").messages
+        assert [m["content"] for m in history if m["role"] == "user"] == [f"m{i}" for i in range(5)]
+
+    @pytest.mark.asyncio
+    async def test_global_limit_caps_parallel_sessions(self, tmp_path):
+        provider = SlowEchoProvider(delay=0.05)
+        loop = _make_loop(tmp_path, provider, max_concurrent_sessions=2)
+        for i in range(6):
+            loop._dispatch(_msg(str(i), "x"))
+
+        await _collect(loop.bus, 6)
+        assert provider.max_in_flight == 2
+
+    @pytest.mark.asyncio
+    async def test_lane_is_released_when_drained(self, tmp_path):
+        loop = _make_loop(tmp_path, SlowEchoProvider(delay=0))
+        loop._dispatch(_msg("1", "x"))
+        assert loop.active_sessions == 1
+        await _collect(loop.bus, 1)
+        await asyncio.sleep(0)
+        assert loop.active_sessions == 0
+
+    @pytest.mark.asyncio
+    async def test_run_blocks_until_stopped(self, tmp_path):
+        loop = _make_loop(tmp_path, SlowEchoProvider(delay=0))
+        runner = asyncio.create_task(loop.run())
+        await loop.bus.publish_inbound(_msg("1", "hi"))
+        [reply] = await _collect(loop.bus, 1)
+        assert reply.content == "echo: hi"
+        assert not runner.done()
+
+        loop.stop()
+        await asyncio.wait_for(runner, 0.5)  # woken by stop(), not by a poll timeout
+
+    @pytest.mark.asyncio
+    async def test_interactive_message_overtakes_scheduled_backlog(self, tmp_path):
+        provider = SlowEchoProvider(delay=0.02)
+        loop = _make_loop(tmp_path, provider, max_concurrent_sessions=1)
+        for i in range(5):
+            msg = _msg(f"cron{i}", f"job {i}")
+            msg.metadata["lane"] = "scheduled"
+            await loop.bus.publish_inbound(msg)
+        runner = asyncio.create_task(loop.run())
+        await asyncio.sleep(0.01)
+        assert loop.bus.inbound.depth("scheduled") == 4  # the backlog waits on the bus, not in session lanes
+        await loop.bus.publish_inbound(_msg("1", "hello"))
+
+        await _collect(loop.bus, 6)
+        assert provider.seen[:2] == ["job 0", "hello"]
+        loop.stop()
+        await asyncio.wait_for(runner, 0.5)
+
+    @pytest.mark.asyncio
+    async def test_session_backlog_does_not_block_other_sessions(self, tmp_path):
+        provider = SlowEchoProvider(delay=0.05)
+        loop = _make_loop(tmp_path, provider, max_concurrent_sessions=2)
+        for chat_id, text in (("a", "a1"), ("a", "a2"), ("a", "a3"), ("b", "b1")):
+            await loop.bus.publish_inbound(_msg(chat_id, text))
+        runner = asyncio.create_task(loop.run())
+
+        await _collect(loop.bus, 4)
+        assert set(provider.seen[:2]) == {"a1", "b1"}
+        assert provider.seen[2:] == ["a2", "a3"]
+        loop.stop()
+        await asyncio.wait_for(runner, 0.5)
+
+    @pytest.mark.asyncio
+    async def test_processed_messages_are_acknowledged(self, tmp_path):
+        from nanobot.bus.wal import InboundLog
+        wal = InboundLog(tmp_path / "inbound", fsync=False)
+        loop = AgentLoop(bus=MessageBus(wal=wal), provider=SlowEchoProvider(delay=0), workspace=tmp_path)
+        await loop.bus.publish_inbound(_msg("1", "hi"))
+        loop._dispatch(await loop.bus.consume_inbound())
+        await _collect(loop.bus, 1)
+        await asyncio.sleep(0)
+        assert wal.pending() == []
+
+    def test_system_message_shares_origin_lane(self):
+        system = InboundMessage(channel="system", sender_id="subagent",
+                                chat_id="telegram:42", content="done")
+        assert AgentLoop._lane_key(system) == _msg("42", "x").session_key
+
+    @pytest.mark.asyncio
+    async def test_tool_context_is_isolated_per_session(self, tmp_path):
+        loop = _make_loop(tmp_path, SlowEchoProvider(delay=0))
+        tool = loop.tools.get("message")
+        seen: dict[str, tuple[str, str]] = {}
+
+        async def lane(chat_id: str) -> None:
+            loop._set_tool_context("telegram", chat_id)
+            await asyncio.sleep(0.01)
+            seen[chat_id] = tool._context.get()
+
+        await asyncio.gather(asyncio.create_task(lane("a")), asyncio.create_task(lane("b")))
+        assert seen == {"a": ("telegram", "a"), "b": ("telegram", "b")}
+
+
+# ---------------------------------------------------------------------------
+# Inbound coalescing
+# ---------------------------------------------------------------------------
+
+class TestCoalescing:
+    @pytest.mark.asyncio
+    async def test_rapid_messages_become_one_turn(self, tmp_path):
+        loop = _make_loop(tmp_path, SlowEchoProvider(delay=0), coalesce_windows={"telegram": 0.05})
+        for text in ("hey", "are you there", "quick question"):
+            loop._dispatch(_msg("1", text))
+            await asyncio.sleep(0.01)
+        [reply] = await _collect(loop.bus, 1)
+        assert reply.content == "echo: hey\nare you there\nquick question"
+        await asyncio.sleep(0.1)
+        assert loop.bus.outbound_size == 0
+
+    @pytest.mark.asyncio
+    async def test_coalescing_with_saturated_session_cap(self, tmp_path):
+        provider = SlowEchoProvider(delay=0)
+        loop = _make_loop(tmp_path, provider, max_concurrent_sessions=1, coalesce_windows={"telegram": 0.1})
+        runner = asyncio.create_task(loop.run())
+        await loop.bus.publish_inbound(_msg("1", "hey"))
+        await asyncio.sleep(0.02)
+        await loop.bus.publish_inbound(_msg("2", "other chat", channel="whatsapp"))
+        for text in ("are you there", "quick question"):
+            await asyncio.sleep(0.03)
+            await loop.bus.publish_inbound(_msg("1", text))
+
+        await _collect(loop.bus, 2)
+        # The waiting lane holds no slot, and its follow-ups still reach it
+        assert provider.seen == ["other chat", "hey\nare you there\nquick question"]
+        loop.stop()
+        await asyncio.wait_for(runner, 0.5)
+
+    @pytest.mark.asyncio
+    async def test_uncoalesced_channel_keeps_separate_turns(self, tmp_path):
+        loop = _make_loop(tmp_path, SlowEchoProvider(delay=0), coalesce_windows={"whatsapp": 0.05})
+        loop._dispatch(_msg("1", "a"))
+        loop._dispatch(_msg("1", "b"))
+        replies = await _collect(loop.bus, 2)
+        assert [r.content for r in replies] == ["echo: a", "echo: b"]
+
+    def test_commands_and_other_senders_are_not_merged(self):
+        lane = deque([
+            _msg("1", "hi"),
+            _msg("1", "there"),
+            _msg("1", "/new"),
+            _msg("1", "after"),
+        ])
+        merged = AgentLoop._take_coalesced(lane)
+        assert merged.content == "hi\nthere"
+        assert merged.metadata["coalesced"] == 2
+        assert AgentLoop._take_coalesced(lane).content == "/new"
+        other = InboundMessage(channel="telegram", sender_id="v", chat_id="1", content="x")
+        lane.append(other)
+        assert AgentLoop._take_coalesced(lane).content == "after"
+
+    def test_merge_combines_media_and_metadata(self):
+        first = InboundMessage(channel="telegram", sender_id="u", chat_id="1", content="look",
+                               media=["a.jpg"], metadata={"message_id": 1, "username": "u"})
+        second = InboundMessage(channel="telegram", sender_id="u", chat_id="1", content="",
+                                media=["b.jpg"], metadata={"message_id": 2})
+        merged = InboundMessage.merge([first, second])
+        assert merged.content == "look"
+        assert merged.media == ["a.jpg", "b.jpg"]
+        assert merged.metadata == {"message_id": 2, "username": "u", "coalesced": 2}
+        assert merged.timestamp == first.timestamp
+
+
+# ---------------------------------------------------------------------------
+# Streaming
+# ---------------------------------------------------------------------------
+
+class TestStreaming:
+    @pytest.mark.asyncio
+    async def test_process_direct_forwards_deltas(self, tmp_path):
+        loop = _make_loop(tmp_path, StreamingProvider())
+        deltas: list[str] = []
+
+        async def on_stream(delta: str) -> None:
+            deltas.append(delta)
+
+        result = await loop.process_direct("hi", on_stream=on_stream)
+        assert result == "hello streaming world"
+        assert deltas == ["hello", " streaming", " world"]
+
+    @pytest.mark.asyncio
+    async def test_default_chat_stream_yields_single_chunk(self):
+        provider = SlowEchoProvider(delay=0)
+        chunks = [c async for c in provider.chat_stream([{"role": "user", "content": "x"}])]
+        assert len(chunks) == 1
+        assert chunks[0].content == "echo: x"
+        assert chunks[0].response.content == "echo: x"
+
+    @pytest.mark.asyncio
+    async def test_stream_channel_gets_drafts_then_final_edit(self, tmp_path):
+        loop = _make_loop(tmp_path, StreamingProvider(), stream_channels={"telegram"}, stream_interval=0)
+        loop._dispatch(_msg("1", "hi"))
+
+        out = await _collect(loop.bus, 4)
+        drafts, final = out[:-1], out[-1]
+        assert [d.content for d in drafts] == ["hello", "hello streaming", "hello streaming world"]
+        assert all(d.metadata["_stream"]["final"] is False for d in drafts)
+        assert final.content == "hello streaming world"
+        assert final.metadata["_stream"] == {"id": drafts[0].metadata["_stream"]["id"], "final": True}
+
+    @pytest.mark.asyncio
+    async def test_non_stream_channel_is_unchanged(self, tmp_path):
+        loop = _make_loop(tmp_path, StreamingProvider())
+        loop._dispatch(_msg("1", "hi"))
+
+        out = await _collect(loop.bus, 1)
+        assert out[0].content == "hello streaming world"
+        assert "_stream" not in out[0].metadata
+
+
+class TestToolCallAssembler:
+    def test_assembles_fragments_by_index(self):
+        asm = ToolCallAssembler()
+        asm.add([{"index": 0, "id": "call_a", "function": {"name": "read_", "arguments": '{"pa'}}])
+        asm.add([{"index": 1, "id": "call_b", "function": {"name": "list_dir", "arguments": "{}"}}])
+        asm.add([{"index": 0, "function": {"name": "file", "arguments": 'th": "x"}'}}])
+
+        calls = asm.build()
+        assert [(c.id, c.name, c.arguments) for c in calls] == [
+            ("call_a", "read_file", {"path": "x"}),
+            ("call_b", "list_dir", {}),
+        ]
+
+    def test_missing_id_gets_fallback(self):
+        asm = ToolCallAssembler()
+        asm.add([{"index": 0, "function": {"name": "t", "arguments": ""}}])
+        assert asm.build()[0].id == "call_0"
+
+
+# ---------------------------------------------------------------------------
+# Token-budgeted history
+# ---------------------------------------------------------------------------
+
+class TestHistoryBudget:
+    def test_budget_subtracts_fixed_prompt_parts(self, tmp_path):
+        loop = _make_loop(tmp_path, SlowEchoProvider(delay=0), context_window_tokens=50_000, max_tokens=1000)
+        small = loop._history_budget("hi")
+        assert 0 < small < 45_000 - 1000
+        assert loop._history_budget("z" * 8000) == small - 2000
+
+    @pytest.mark.asyncio
+    async def test_oversized_old_turn_is_dropped(self, tmp_path):
+        provider = SlowEchoProvider(delay=0)
+        seen: list[list[dict]] = []
+        original = provider.chat
+
+        async def capture(messages, **kwargs):
+            seen.append(messages)
+            return await original(messages, **kwargs)
+
+        provider.chat = capture
+        loop = _make_loop(tmp_path, provider, context_window_tokens=20_000, max_tokens=1000)
+        session = loop.sessions.get_or_create("cli:direct")
+        session.add_message("user", "log " * 40_000)
+        session.add_message("assistant", "noted")
+
+        await loop.process_direct("next")
+        contents = [m["content"] for m in seen[0][1:-1]]
+        assert contents == ["noted"]
@@ -0,0 +1,208 @@
+"""Tests for nanobot.bus.queue — bounded lanes and weighted scheduling."""
+
+import asyncio
+
+import pytest
+
+from nanobot.bus.events import InboundMessage, OutboundMessage
+from nanobot.bus.queue import LaneQueue, MessageBus
+from nanobot.bus.wal import InboundLog
+
+
+def _msg(channel="telegram", chat_id="1", content="hi", **metadata):
+    return InboundMessage(channel=channel, sender_id="u", chat_id=chat_id, content=content, metadata=metadata)
+
+
+class TestLaneQueue:
+    def test_weighted_round_robin(self):
+        q = LaneQueue(weights={"interactive": 2, "system": 1, "scheduled": 1})
+        for i in range(4):
+            q.put_nowait(f"i{i}", "interactive")
+            q.put_nowait(f"s{i}", "scheduled")
+        # Interactive gets two of every three slots while both lanes are busy
+        assert [q.get_nowait() for _ in range(8)] == ["i0", "s0", "i1", "i2", "s1", "i3", "s2", "s3"]
+
+    @pytest.mark.asyncio
+    async def test_take_where_and_next_put(self):
+        q = LaneQueue()
+        q.put_nowait("a1", "scheduled")
+        q.put_nowait("b1", "interactive")
+        q.put_nowait("a2", "interactive")
+        arrived = q.next_put()
+        assert q.take_where(lambda item: item.startswith("a")) == ["a1", "a2"]
+        assert q.qsize() == 1
+        assert not arrived.is_set()
+        q.put_nowait("c1")
+        assert arrived.is_set()
+
+    def test_lane_order_is_fifo(self):
+        q = LaneQueue()
+        for i in range(5):
+            q.put_nowait(i, "system")
+        assert [q.get_nowait() for _ in range(5)] == [0, 1, 2, 3, 4]
+
+    def test_drop_oldest(self):
+        q = LaneQueue(maxsize=2, overflow="drop_oldest")
+        for i in range(4):
+            assert q.put_nowait(i)
+        assert [q.get_nowait() for _ in range(2)] == [2, 3]
+        assert q.stats()["interactive"]["dropped"] == 2
+
+    def test_reject(self):
+        q = LaneQueue(maxsize=1, overflow="reject")
+        assert q.put_nowait("a")
+        assert not q.put_nowait("b")
+        assert q.put_nowait("c", "scheduled")  # lanes are bounded separately
+        assert q.stats()["interactive"]["rejected"] == 1
+
+    @pytest.mark.asyncio
+    async def test_block_waits_for_room(self):
+        q = LaneQueue(maxsize=1)
+        await q.put("a")
+        blocked = asyncio.create_task(q.put("b"))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+        assert await q.get() == "a"
+        assert await asyncio.wait_for(blocked, 1)
+        assert await q.get() == "b"
+
+    @pytest.mark.asyncio
+    async def test_stats_track_wait(self):
+        q = LaneQueue()
+        q.put_nowait("x", "scheduled")
+        await asyncio.sleep(0.02)
+        await q.get()
+        stats = q.stats()["scheduled"]
+        assert stats["dequeued"] == 1 and stats["depth"] == 0
+        assert stats["wait_ms_max"] >= 15
+
+    def test_unknown_policy(self):
+        with pytest.raises(ValueError):
+            LaneQueue(overflow="spill")
+
+
+class TestMessageBusLanes:
+    def test_lane_classification(self):
+        bus = MessageBus(channel_lanes={"email": "scheduled"})
+        assert bus.lane_of(_msg()) == "interactive"
+        assert bus.lane_of(_msg(channel="system", chat_id="telegram:1")) == "system"
+        assert bus.lane_of(_msg(channel="email")) == "scheduled"
+        assert bus.lane_of(OutboundMessage(channel="telegram", chat_id="1", content="", metadata={"lane": "scheduled"})) == "scheduled"
+
+    def test_unknown_channel_lane(self):
+        with pytest.raises(ValueError):
+            MessageBus(channel_lanes={"email": "bulk"})
+
+    @pytest.mark.asyncio
+    async def test_interactive_overtakes_backlog(self):
+        bus = MessageBus(channel_lanes={"mochat": "scheduled"})
+        for i in range(50):
+            await bus.publish_inbound(_msg(channel="mochat", content=f"bulk{i}"))
+        await bus.publish_inbound(_msg(content="human"))
+        first = [(await bus.consume_inbound()).content for _ in range(2)]
+        assert "human" in first
+
+    @pytest.mark.asyncio
+    async def test_rejected_publish_returns_false(self):
+        bus = MessageBus(inbound_capacity=1, overflow="reject")
+        assert await bus.publish_inbound(_msg())
+        assert not await bus.publish_inbound(_msg())
+        assert bus.stats()["inbound"]["interactive"]["rejected"] == 1
+
+    @pytest.mark.asyncio
+    async def test_dispatch_outbound_stops_without_polling(self):
+        bus = MessageBus()
+        received = []
+
+        async def deliver(msg):
+            received.append(msg.content)
+
+        bus.subscribe_outbound("telegram", deliver)
+        dispatcher = asyncio.create_task(bus.dispatch_outbound())
+        await bus.publish_outbound(OutboundMessage(channel="telegram", chat_id="1", content="hi"))
+        await asyncio.sleep(0.01)
+        assert received == ["hi"]
+
+        bus.stop()
+        await asyncio.wait_for(dispatcher, 0.5)
+
+
+class TestInboundLog:
+    def test_unacked_messages_survive_reopen(self, tmp_path):
+        wal = InboundLog(tmp_path, fsync=False)
+        seqs = [wal.append(_msg(content=f"m{i}")) for i in range(3)]
+        wal.ack(seqs[1])
+        wal.close()
+
+        reopened = InboundLog(tmp_path, fsync=False)
+        assert [(seq, m.content) for seq, m in reopened.pending()] == [(1, "m0"), (3, "m2")]
+        assert reopened.append(_msg(content="m3")) == 4
+
+    def test_watermark_advances_over_out_of_order_acks(self, tmp_path):
+        wal = InboundLog(tmp_path, fsync=False)
+        seqs = [wal.append(_msg()) for _ in range(3)]
+        wal.ack(seqs[2])
+        wal.ack(seqs[1])
+        assert wal.stats()["watermark"] == 0
+        wal.ack(seqs[0])
+        assert wal.stats()["watermark"] == 3
+        assert wal.pending() == []
+
+    def test_duplicate_message_ids_are_skipped(self, tmp_path):
+        wal = InboundLog(tmp_path, fsync=False)
+        assert wal.append(_msg(message_id=42)) == 1
+        assert wal.append(_msg(message_id=42)) is None
+        assert wal.append(_msg(chat_id="2", message_id=42)) == 2  # keyed per chat
+        wal.close()
+        assert InboundLog(tmp_path, fsync=False).append(_msg(message_id=42)) is None
+
+    def test_acknowledged_segments_are_deleted(self, tmp_path):
+        wal = InboundLog(tmp_path, segment_bytes=200, fsync=False)
+        seqs = [wal.append(_msg(content="x" * 100)) for _ in range(6)]
+        assert len(list(tmp_path.glob("inbound-*.wal"))) > 1
+        for seq in seqs:
+            wal.ack(seq)
+        assert len(list(tmp_path.glob("inbound-*.wal"))) == 1  # the open segment is kept
+
+    def test_torn_append_is_ignored(self, tmp_path):
+        wal = InboundLog(tmp_path, fsync=False)
+        wal.append(_msg(content="whole"))
+        wal.close()
+        [segment] = tmp_path.glob("inbound-*.wal")
+        with open(segment, "ab") as f:
+            f.write(b'{"seq":2,"key":null,"msg":{"chan')
+        assert [m.content for _, m in InboundLog(tmp_path, fsync=False).pending()] == ["whole"]
+
+
+class TestDurableBus:
+    @pytest.mark.asyncio
+    async def test_replay_after_restart(self, tmp_path):
+        bus = MessageBus(wal=InboundLog(tmp_path, fsync=False))
+        await bus.publish_inbound(_msg(content="done", message_id=1))
+        await bus.publish_inbound(_msg(content="lost", message_id=2))
+        bus.ack_inbound(await bus.consume_inbound())
+        bus.close()
+
+        restarted = MessageBus(wal=InboundLog(tmp_path, fsync=False))
+        assert not await restarted.publish_inbound(_msg(content="lost", message_id=2))  # redelivery
+        assert await restarted.replay_inbound() == 1
+        replayed = await restarted.consume_inbound()
+        assert replayed.content == "lost" and replayed.metadata["replayed"]
+        restarted.ack_inbound(replayed)
+        assert restarted.wal.pending() == []
+
+    @pytest.mark.asyncio
+    async def test_merged_turn_acks_every_message(self, tmp_path):
+        bus = MessageBus(wal=InboundLog(tmp_path, fsync=False))
+        for text in ("a", "b"):
+            await bus.publish_inbound(_msg(content=text))
+        merged = InboundMessage.merge([await bus.consume_inbound(), await bus.consume_inbound()])
+        bus.ack_inbound(merged)
+        assert bus.wal.pending() == []
+
+    @pytest.mark.asyncio
+    async def test_dropped_messages_are_acked(self, tmp_path):
+        bus = MessageBus(inbound_capacity=1, overflow="drop_oldest", wal=InboundLog(tmp_path, fsync=False))
+        await bus.publish_inbound(_msg(content="old"))
+        await bus.publish_inbound(_msg(content="new"))
+        assert [m.content for _, m in bus.wal.pending()] == ["new"]
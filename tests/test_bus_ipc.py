@@ -0,0 +1,147 @@
+"""Tests for nanobot.bus.ipc — sharding the bus across worker processes."""
+
+import asyncio
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from nanobot.bus.events import InboundMessage, OutboundMessage
+from nanobot.bus.ipc import BusBroker, RemoteBus, shard_for
+from nanobot.bus.queue import MessageBus
+from nanobot.bus.wal import InboundLog
+
+
+def _msg(chat_id="1", content="hi", channel="telegram"):
+    return InboundMessage(channel=channel, sender_id="u", chat_id=chat_id, content=content)
+
+
+def _chat_on_shard(shard, workers=2):
+    return next(str(i) for i in range(100) if shard_for(_msg(chat_id=str(i)), workers) == shard)
+
+
+async def _wait_until(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+class TestSharding:
+    def test_shard_is_stable_and_in_range(self):
+        for i in range(50):
+            msg = _msg(chat_id=str(i))
+            assert 0 <= shard_for(msg, 4) < 4
+            assert shard_for(msg, 4) == shard_for(_msg(chat_id=str(i), content="other"), 4)
+
+    def test_system_messages_follow_their_origin_session(self):
+        announce = InboundMessage(channel="system", sender_id="subagent", chat_id="telegram:7", content="done")
+        assert shard_for(announce, 8) == shard_for(_msg(chat_id="7"), 8)
+
+
+class TestBroker:
+    @pytest.fixture
+    def socket_path(self):
+        # Unix socket paths are limited to ~100 bytes, so stay out of pytest's deep tmp dirs
+        with tempfile.TemporaryDirectory(prefix="nb") as d:
+            yield Path(d) / "bus.sock"
+
+    @pytest.mark.asyncio
+    async def test_routes_by_session_and_returns_responses(self, socket_path):
+        bus = MessageBus()
+        broker = BusBroker(bus, socket_path, workers=2, settings={"stream_channels": ["telegram"]})
+        await broker.start()
+        router = asyncio.create_task(broker.run())
+        workers = [RemoteBus(socket_path, shard) for shard in range(2)]
+        for worker in workers:
+            await worker.connect()
+        assert workers[0].settings == {"stream_channels": ["telegram"], "workers": 2}
+
+        chats = [_chat_on_shard(0), _chat_on_shard(1)]
+        for i in range(3):
+            for chat in chats:
+                await bus.publish_inbound(_msg(chat_id=chat, content=f"m{i}"))
+        for shard, worker in enumerate(workers):
+            received = [await asyncio.wait_for(worker.consume_inbound(), 2) for _ in range(3)]
+            assert [m.chat_id for m in received] == [chats[shard]] * 3
+            assert [m.content for m in received] == ["m0", "m1", "m2"]
+
+        await workers[1].publish_outbound(OutboundMessage(channel="telegram", chat_id=chats[1], content="reply"))
+        out = await asyncio.wait_for(bus.consume_outbound(), 2)
+        assert (out.chat_id, out.content) == (chats[1], "reply")
+
+        for worker in workers:
+            worker.close()
+        broker.stop()
+        await router
+
+    @pytest.mark.asyncio
+    async def test_holds_messages_until_worker_connects(self, socket_path):
+        bus = MessageBus()
+        broker = BusBroker(bus, socket_path, workers=2)
+        await broker.start()
+        router = asyncio.create_task(broker.run())
+
+        chat = _chat_on_shard(1)
+        await bus.publish_inbound(_msg(chat_id=chat, content="early"))
+        await _wait_until(lambda: broker.stats()["1"]["held"] == 1)
+
+        worker = RemoteBus(socket_path, 1)
+        await worker.connect()
+        msg = await asyncio.wait_for(worker.consume_inbound(), 2)
+        assert msg.content == "early"
+
+        worker.close()
+        broker.stop()
+        await router
+
+    @pytest.mark.asyncio
+    async def test_acks_reach_the_log_and_unacked_messages_are_resent(self, socket_path, tmp_path):
+        bus = MessageBus(wal=InboundLog(tmp_path / "wal", fsync=False))
+        broker = BusBroker(bus, socket_path, workers=1)
+        await broker.start()
+        router = asyncio.create_task(broker.run())
+        worker = RemoteBus(socket_path, 0)
+        await worker.connect()
+
+        await bus.publish_inbound(_msg(content="a"))
+        await bus.publish_inbound(_msg(content="b"))
+        first = await asyncio.wait_for(worker.consume_inbound(), 2)
+        await asyncio.wait_for(worker.consume_inbound(), 2)
+        worker.ack_inbound(first)
+        await _wait_until(lambda: len(bus.wal.pending()) == 1)
+
+        # The worker dies with "b" unacknowledged; its replacement gets it again
+        worker.close()
+        await _wait_until(lambda: not broker.stats()["0"]["connected"])
+        replacement = RemoteBus(socket_path, 0)
+        await replacement.connect()
+        resent = await asyncio.wait_for(replacement.consume_inbound(), 2)
+        assert resent.content == "b"
+
+        replacement.close()
+        broker.stop()
+        await router
+        bus.close()
+
+    @pytest.mark.asyncio
+    async def test_worker_announcements_are_routed_like_inbound(self, socket_path):
+        bus = MessageBus()
+        broker = BusBroker(bus, socket_path, workers=2)
+        await broker.start()
+        router = asyncio.create_task(broker.run())
+        workers = [RemoteBus(socket_path, shard) for shard in range(2)]
+        for worker in workers:
+            await worker.connect()
+
+        chat = _chat_on_shard(1)
+        await workers[0].publish_inbound(InboundMessage(
+            channel="system", sender_id="subagent", chat_id=f"telegram:{chat}", content="done",
+        ))
+        msg = await asyncio.wait_for(workers[1].consume_inbound(), 2)
+        assert msg.channel == "system" and msg.content == "done"
+
+        for worker in workers:
+            worker.close()
+        broker.stop()
+        await router
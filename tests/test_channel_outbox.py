@@ -0,0 +1,156 @@
+"""Tests for per-channel outbound workers in nanobot.channels.manager."""
+
+import asyncio
+
+import pytest
+
+from nanobot.bus.events import OutboundMessage
+from nanobot.bus.queue import MessageBus
+from nanobot.channels.base import BaseChannel
+from nanobot.channels.manager import ChannelManager, ChannelOutbox
+from nanobot.config.schema import Config
+
+
+class FakeChannel:
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.sent: list[tuple[str, str]] = []
+        self.in_flight = 0
+        self.peak = 0
+
+    async def send(self, msg: OutboundMessage) -> None:
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.fail:
+                raise RuntimeError("platform down")
+            self.sent.append((msg.chat_id, msg.content))
+        finally:
+            self.in_flight -= 1
+
+
+def _out(chat_id: str, content: str, channel: str = "fake") -> OutboundMessage:
+    return OutboundMessage(channel=channel, chat_id=chat_id, content=content)
+
+
+async def _wait_until(condition, timeout: float = 2.0) -> None:
+    async def wait():
+        while not condition():
+            await asyncio.sleep(0.005)
+    await asyncio.wait_for(wait(), timeout)
+
+
+async def _drain(outbox: ChannelOutbox) -> None:
+    await _wait_until(lambda: not outbox.stats()["queued"])
+
+
+class TestChannelOutbox:
+    @pytest.mark.asyncio
+    async def test_per_chat_order_with_concurrency(self):
+        channel = FakeChannel(delay=0.01)
+        outbox = ChannelOutbox("fake", channel, concurrency=2)
+        for i in range(5):
+            outbox.put(_out("a", f"a{i}"))
+            outbox.put(_out("b", f"b{i}"))
+        await _drain(outbox)
+        assert [c for chat, c in channel.sent if chat == "a"] == [f"a{i}" for i in range(5)]
+        assert [c for chat, c in channel.sent if chat == "b"] == [f"b{i}" for i in range(5)]
+        assert channel.peak == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrency_limit(self):
+        channel = FakeChannel(delay=0.01)
+        outbox = ChannelOutbox("fake", channel, concurrency=1)
+        for chat in "abc":
+            outbox.put(_out(chat, "x"))
+        await _drain(outbox)
+        assert channel.peak == 1
+        assert outbox.stats()["sent"] == 3
+
+    @pytest.mark.asyncio
+    async def test_capacity_drops_new_messages(self):
+        channel = FakeChannel(delay=0.05)
+        outbox = ChannelOutbox("fake", channel, capacity=2)
+        assert outbox.put(_out("a", "1"))
+        assert outbox.put(_out("a", "2"))
+        assert not outbox.put(_out("a", "3"))
+        await _drain(outbox)
+        assert outbox.stats()["dropped"] == 1
+        assert [c for _, c in channel.sent] == ["1", "2"]
+
+    @pytest.mark.asyncio
+    async def test_failures_are_counted(self):
+        outbox = ChannelOutbox("fake", FakeChannel(fail=True))
+        outbox.put(_out("a", "1"))
+        outbox.put(_out("a", "2"))
+        await _drain(outbox)
+        assert outbox.stats()["failed"] == 2
+
+    @pytest.mark.asyncio
+    async def test_close_cancels_pending_sends(self):
+        outbox = ChannelOutbox("fake", FakeChannel(delay=10))
+        outbox.put(_out("a", "1"))
+        outbox.put(_out("a", "2"))
+        await asyncio.sleep(0)
+        await outbox.close()
+        assert outbox.stats()["queued"] == 0
+
+
+class TestOutboundDispatch:
+    @pytest.mark.asyncio
+    async def test_slow_channel_does_not_block_others(self):
+        bus = MessageBus()
+        manager = ChannelManager(Config(), bus)
+        slow, fast = FakeChannel(delay=10), FakeChannel()
+        manager.channels = {"slow": slow, "fast": fast}
+        manager.outboxes = {name: ChannelOutbox(name, ch) for name, ch in manager.channels.items()}
+        dispatcher = asyncio.create_task(manager._dispatch_outbound())
+        try:
+            await bus.publish_outbound(_out("1", "stuck", channel="slow"))
+            await bus.publish_outbound(_out("2", "hello", channel="fast"))
+            await _wait_until(lambda: fast.sent, timeout=1)
+            assert fast.sent == [("2", "hello")]
+            assert manager.outboxes["slow"].stats()["queued"] == 1
+        finally:
+            dispatcher.cancel()
+            await asyncio.gather(dispatcher, return_exceptions=True)
+            for outbox in manager.outboxes.values():
+                await outbox.close()
+
+
+class IdleChannel(BaseChannel):
+    name = "idle"
+
+    async def start(self) -> None:
+        self._running = True
+        await self._wait_until_stopped()
+
+    async def stop(self) -> None:
+        self._running = False
+
+    async def send(self, msg: OutboundMessage) -> None:
+        pass
+
+
+class TestChannelStop:
+    @pytest.mark.asyncio
+    async def test_idle_start_returns_on_stop(self):
+        channel = IdleChannel(None, MessageBus())
+        task = asyncio.create_task(channel.start())
+        await asyncio.sleep(0.01)
+        assert channel.is_running and not task.done()
+        await channel.stop()
+        await asyncio.wait_for(task, 0.5)
+        assert not channel.is_running
+
+    @pytest.mark.asyncio
+    async def test_retry_sleep_is_cut_short_by_stop(self):
+        channel = IdleChannel(None, MessageBus())
+        channel._running = True
+        assert await channel._sleep_unless_stopped(0.01) is False
+        sleeper = asyncio.create_task(channel._sleep_unless_stopped(10))
+        await asyncio.sleep(0)
+        await channel.stop()
+        assert await asyncio.wait_for(sleeper, 0.5) is True
@@ -0,0 +1,40 @@
+"""Tests for nanobot.utils.codec — the shared JSON codec."""
+
+import json
+
+import pytest
+
+from nanobot.utils import codec
+
+
+@pytest.fixture(params=["default", "stdlib"])
+def backend(request, monkeypatch):
+    if request.param == "stdlib":
+        monkeypatch.setattr(codec, "orjson", None)
+    return request.param
+
+
+class TestCodec:
+    def test_round_trip(self, backend):
+        obj = {"role": "user", "content": "héllo ✓", "n": [1, 2.5, None, True]}
+        assert codec.loads(codec.dumps(obj)) == obj
+        assert codec.loads(codec.dumpb(obj)) == obj
+
+    def test_output_is_compact_utf8(self, backend):
+        assert codec.dumpb({"a": "é", "b": 1}) == '{"a":"é","b":1}'.encode()
+        assert codec.dumps({"a": "é"}) == '{"a":"é"}'
+
+    def test_indent(self, backend):
+        assert codec.dumps({"a": [1]}, indent=True) == json.dumps({"a": [1]}, indent=2)
+
+    def test_non_string_keys_match_stdlib(self, backend):
+        assert codec.loads(codec.dumps({1: "x"})) == {"1": "x"}
+
+    def test_stdlib_only_values_fall_back(self, backend):
+        assert codec.loads(codec.dumps({"n": 2**70})) == {"n": 2**70}
+        assert codec.loads(codec.dumpb("\ud800")) == "\ud800"
+        assert codec.loads('{"x": NaN}')["x"] != 0
+
+    def test_decode_error(self, backend):
+        with pytest.raises(codec.JSONDecodeError):
+            codec.loads(b'{"torn": ')
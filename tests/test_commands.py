@@ -89,3 +89,42 @@ def test_onboard_existing_workspace_safe_create(mock_paths):
     assert "Created workspace" not in result.stdout
     assert "Created AGENTS.md" in result.stdout
     assert (workspace_dir / "AGENTS.md").exists()
+
+
+def test_make_provider_routes_extra_keys_and_fallbacks():
+    from nanobot.cli.commands import _make_provider
+    from nanobot.config.schema import Config
+    from nanobot.providers.routing import RoutingProvider
+
+    config = Config()
+    config.agents.defaults.model = "anthropic/claude-opus-4-5"
+    config.providers.anthropic.api_key = "k1"
+    config.providers.anthropic.extra_api_keys = ["k2"]
+    config.providers.deepseek.api_key = "d1"
+    config.routing.fallback_models = ["deepseek/deepseek-chat", "groq/llama-3.3-70b"]  # no groq key: skipped
+
+    provider = _make_provider(config)
+    assert isinstance(provider, RoutingProvider)
+    assert [(b.name, b.model, b.provider.api_key) for b in provider.backends] == [
+        ("anthropic:anthropic/claude-opus-4-5", None, "k1"),
+        ("anthropic:anthropic/claude-opus-4-5#2", None, "k2"),
+        ("deepseek:deepseek/deepseek-chat", "deepseek/deepseek-chat", "d1"),
+    ]
+
+
+def test_make_provider_without_routing_is_a_single_provider():
+    from nanobot.cli.commands import _make_provider
+    from nanobot.config.schema import Config
+    from nanobot.providers.litellm_provider import LiteLLMProvider
+    from nanobot.providers.scheduler import ScheduledProvider
+
+    config = Config()
+    config.providers.anthropic.api_key = "k1"
+    config.providers.anthropic.rpm = 50
+    provider = _make_provider(config)
+    assert isinstance(provider, ScheduledProvider)
+    assert isinstance(provider.provider, LiteLLMProvider)
+    assert provider.requests.capacity == 50
+
+    config.scheduler.enabled = False
+    assert isinstance(_make_provider(config), LiteLLMProvider)
@@ -0,0 +1,214 @@
+"""Tests for nanobot.agent.consolidation — the consolidation scheduler."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+
+from nanobot.agent.consolidation import ConsolidationScheduler
+from nanobot.utils.writer import GroupCommitWriter
+
+
+class RecordingRunner:
+    """Runner that records calls and tracks overlap."""
+
+    def __init__(self, delay: float = 0.02):
+        self.delay = delay
+        self.calls: list[tuple[str, list | None]] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.per_key_in_flight: dict[str, int] = {}
+        self.max_per_key = 0
+
+    async def __call__(self, key, archive):
+        self.calls.append((key, archive))
+        self.in_flight += 1
+        self.per_key_in_flight[key] = self.per_key_in_flight.get(key, 0) + 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        self.max_per_key = max(self.max_per_key, self.per_key_in_flight[key])
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+            self.per_key_in_flight[key] -= 1
+
+
+def _scheduler(tmp_path, runner, **kwargs) -> ConsolidationScheduler:
+    kwargs.setdefault("debounce_s", 0.01)
+    kwargs.setdefault("retry_delay_s", 0.01)
+    return ConsolidationScheduler(runner, tmp_path / "queue.json", **kwargs)
+
+
+class TestConsolidationScheduler:
+    @pytest.mark.asyncio
+    async def test_burst_of_triggers_is_coalesced(self, tmp_path):
+        runner = RecordingRunner()
+        sched = _scheduler(tmp_path, runner)
+        for _ in range(10):
+            sched.schedule("s1")
+        await sched.drain()
+        assert runner.calls == [("s1", None)]
+
+    @pytest.mark.asyncio
+    async def test_trigger_during_run_causes_one_follow_up(self, tmp_path):
+        runner = RecordingRunner(delay=0.05)
+        sched = _scheduler(tmp_path, runner)
+        sched.schedule("s1")
+        await asyncio.sleep(0.03)  # job now running
+        sched.schedule("s1")
+        sched.schedule("s1")
+        await sched.drain()
+        assert runner.calls == [("s1", None), ("s1", None)]
+        assert runner.max_per_key == 1
+
+    @pytest.mark.asyncio
+    async def test_steady_triggers_do_not_postpone_forever(self, tmp_path):
+        runner = RecordingRunner(delay=0)
+        sched = _scheduler(tmp_path, runner, debounce_s=0.02)
+        for _ in range(20):  # a trigger every 10ms, well inside the debounce window
+            sched.schedule("s1")
+            await asyncio.sleep(0.01)
+        assert runner.calls  # ran within the bounded wait, not after the burst
+        await sched.drain()
+
+    @pytest.mark.asyncio
+    async def test_global_cap(self, tmp_path):
+        runner = RecordingRunner()
+        sched = _scheduler(tmp_path, runner, max_concurrent=2)
+        for i in range(5):
+            sched.schedule(f"s{i}")
+        await sched.drain()
+        assert len(runner.calls) == 5
+        assert runner.max_in_flight == 2
+
+    @pytest.mark.asyncio
+    async def test_archives_run_before_window(self, tmp_path):
+        runner = RecordingRunner(delay=0)
+        sched = _scheduler(tmp_path, runner)
+        sched.schedule("s1")
+        sched.schedule("s1", archive=[{"role": "user", "content": "a"}])
+        sched.schedule("s1", archive=[{"role": "user", "content": "b"}])
+        await sched.drain()
+        assert [archive and archive[0]["content"] for _, archive in runner.calls] == ["a", "b", None]
+
+    @pytest.mark.asyncio
+    async def test_pending_jobs_are_persisted_and_resumed(self, tmp_path):
+        sched = _scheduler(tmp_path, RecordingRunner(), debounce_s=60)
+        sched.schedule("s1", archive=[{"role": "user", "content": "keep me"}])
+        sched.schedule("s2")
+        saved = json.loads((tmp_path / "queue.json").read_text())
+        assert set(saved["jobs"]) == {"s1", "s2"}
+        for task in list(sched._tasks.values()):
+            task.cancel()  # simulate the process dying
+
+        runner = RecordingRunner(delay=0)
+        restarted = _scheduler(tmp_path, runner)
+        assert restarted.resume() == 2
+        await restarted.drain()
+        assert sorted(key for key, _ in runner.calls) == ["s1", "s2"]
+        assert not (tmp_path / "queue.json").exists()
+
+    @pytest.mark.asyncio
+    async def test_queue_is_written_only_when_it_changes(self, tmp_path):
+        writer = GroupCommitWriter()
+        submitted = []
+        submit = writer.submit
+        writer.submit = lambda commit, item, key=None: submitted.append(item) or submit(commit, item, key)
+        sched = _scheduler(tmp_path, RecordingRunner(delay=0), debounce_s=60, writer=writer)
+        for _ in range(10):
+            sched.schedule("s1")
+        sched.schedule("s1", archive=[{"role": "user", "content": "a"}])
+        assert len(submitted) == 2  # the first trigger and the archive
+        writer.flush()
+        saved = json.loads((tmp_path / "queue.json").read_text())
+        assert saved["jobs"]["s1"]["window"] is True and len(saved["jobs"]["s1"]["archives"]) == 1
+        for task in list(sched._tasks.values()):
+            task.cancel()
+        writer.close()
+
+    @pytest.mark.asyncio
+    async def test_resume_skips_sessions_owned_elsewhere(self, tmp_path):
+        (tmp_path / "queue.json").write_text(json.dumps({"jobs": {
+            "mine": {"window": True, "archives": []},
+            "theirs": {"window": True, "archives": []},
+        }}))
+        runner = RecordingRunner(delay=0)
+        sched = _scheduler(tmp_path, runner, owns=lambda key: key == "mine")
+        assert sched.resume() == 1
+        await sched.drain()
+        assert runner.calls == [("mine", None)]
+
+    @pytest.mark.asyncio
+    async def test_lock_file_serializes_schedulers_with_separate_queues(self, tmp_path):
+        # Two processes' schedulers: own queue files, one MEMORY.md lock
+        runner = RecordingRunner()
+        first = ConsolidationScheduler(runner, tmp_path / "a.json", debounce_s=0.01, lock_path=tmp_path / "lock")
+        second = ConsolidationScheduler(runner, tmp_path / "b.json", debounce_s=0.01, lock_path=tmp_path / "lock")
+        first.schedule("s1")
+        second.schedule("s2")
+        assert (tmp_path / "a.json").exists() and (tmp_path / "b.json").exists()
+        await asyncio.gather(first.drain(), second.drain())
+        assert len(runner.calls) == 2
+        assert runner.max_in_flight == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_job_is_kept_and_retried(self, tmp_path):
+        calls = []
+
+        async def flaky(key, archive):
+            calls.append(archive and archive[0]["content"])
+            if archive and archive[0]["content"] == "b" and calls.count("b") == 1:
+                raise RuntimeError("provider down")
+
+        sched = _scheduler(tmp_path, flaky, retry_delay_s=0.2)
+        sched.schedule("s1", archive=[{"role": "user", "content": "a"}])
+        sched.schedule("s1", archive=[{"role": "user", "content": "b"}])
+        await asyncio.sleep(0.1)  # first attempt failed on "b", retry pending
+        saved = json.loads((tmp_path / "queue.json").read_text())
+        assert [a[0]["content"] for a in saved["jobs"]["s1"]["archives"]] == ["b"]
+        await sched.drain()
+        assert calls == ["a", "b", "b"]  # "a" is not archived twice
+        assert sched.metrics()["failed"] == 1 and sched.metrics()["dropped"] == 0
+        assert not (tmp_path / "queue.json").exists()
+
+    @pytest.mark.asyncio
+    async def test_metrics(self, tmp_path):
+        async def failing(key, archive):
+            raise RuntimeError("boom")
+
+        sched = _scheduler(tmp_path, failing)
+        sched.schedule("s1")
+        assert sched.metrics()["queued"] == 1
+        await sched.drain()
+        metrics = sched.metrics()
+        assert metrics["queued"] == 0
+        assert metrics["failed"] == 3  # every attempt
+        assert metrics["dropped"] == 1
+        assert metrics["recent_jobs"][0]["session"] == "s1"
+        assert metrics["recent_jobs"][0]["ok"] is False
+
+    @pytest.mark.asyncio
+    async def test_failed_llm_call_counts_as_failed_job(self, tmp_path):
+        from nanobot.agent.loop import AgentLoop
+        from nanobot.bus.queue import MessageBus
+        from nanobot.providers.base import LLMProvider, LLMResponse
+
+        class Failing(LLMProvider):
+            async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7):
+                return LLMResponse(content="Error calling LLM: 503", finish_reason="error")
+
+            def get_default_model(self) -> str:
+                return "test-model"
+
+        loop = AgentLoop(bus=MessageBus(), provider=Failing(), workspace=tmp_path,
+                         memory_window=4, consolidation_debounce=0.01)
+        session = loop.sessions.get_or_create("t:1")
+        for i in range(10):
+            session.add_message("user", f"m{i}")
+        loop.consolidator.max_attempts = 1
+        loop.consolidator.schedule("t:1")
+        await loop.consolidator.drain()
+        assert loop.consolidator.metrics()["failed"] == 1
+        assert session.last_consolidated == 0
@@ -0,0 +1,97 @@
+"""Tests for ContextBuilder system prompt caching."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from nanobot.agent.context import ContextBuilder
+
+
+@pytest.fixture
+def builder(tmp_path: Path) -> ContextBuilder:
+    b = ContextBuilder(tmp_path)
+    b.skills.builtin_skills = tmp_path / "no-builtin"
+    return b
+
+
+def _count_builds(builder: ContextBuilder) -> list[int]:
+    calls = [0]
+    original = builder._build_static_prompt
+
+    def counting(skill_names=None):
+        calls[0] += 1
+        return original(skill_names)
+
+    builder._build_static_prompt = counting
+    return calls
+
+
+def _write_skill(workspace: Path, name: str, body: str = "Do things.") -> Path:
+    skill_dir = workspace / "skills" / name
+    skill_dir.mkdir(parents=True, exist_ok=True)
+    path = skill_dir / "SKILL.md"
+    path.write_text(f"---\ndescription: {name} skill\n---\n{body}\n", encoding="utf-8")
+    return path
+
+
+class TestSystemPromptCache:
+    def test_unchanged_inputs_reuse_cached_prompt(self, builder):
+        calls = _count_builds(builder)
+        first = builder.build_system_prompt()
+        second = builder.build_system_prompt()
+        assert calls[0] == 1
+        assert first == second
+
+    def test_bootstrap_edit_invalidates(self, builder, tmp_path):
+        calls = _count_builds(builder)
+        builder.build_system_prompt()
+        (tmp_path / "SOUL.md").write_text("Be kind.", encoding="utf-8")
+
+        prompt = builder.build_system_prompt()
+        assert calls[0] == 2
+        assert "Be kind." in prompt
+
+    def test_memory_write_invalidates(self, builder):
+        builder.build_system_prompt()
+        builder.memory.write_long_term("User likes tea.")
+        assert "User likes tea." in builder.build_system_prompt()
+
+    def test_new_and_edited_skill_invalidates(self, builder, tmp_path):
+        builder.build_system_prompt()
+        path = _write_skill(tmp_path, "alpha")
+        assert "alpha skill" in builder.build_system_prompt()
+
+        path.write_text("---\ndescription: renamed alpha\n---\nLonger body text.\n", encoding="utf-8")
+        assert "renamed alpha" in builder.build_system_prompt()
+
+    def test_required_env_change_invalidates(self, builder, tmp_path, monkeypatch):
+        monkeypatch.delenv("NANOBOT_TEST_KEY", raising=False)
+        skill_dir = tmp_path / "skills" / "needs-env"
+        skill_dir.mkdir(parents=True)
+        (skill_dir / "SKILL.md").write_text(
+            '---\ndescription: env skill\nmetadata: {"nanobot": {"requires": {"env": ["NANOBOT_TEST_KEY"]}}}\n---\nx\n',
+            encoding="utf-8",
+        )
+        assert 'available="false"' in builder.build_system_prompt()
+
+        monkeypatch.setenv("NANOBOT_TEST_KEY", "1")
+        assert 'available="true"' in builder.build_system_prompt()
+
+    def test_system_prompt_has_no_volatile_data(self, builder):
+        assert "Current time" not in builder.build_system_prompt()
+
+
+class TestMessageLayout:
+    def test_prefix_is_byte_stable_between_turns(self, builder):
+        history = [{"role": "user", "content": "a"}, {"role": "assistant", "content": "b"}]
+        first = builder.build_messages(history, "one", channel="telegram", chat_id="1")
+        second = builder.build_messages(history, "two", channel="telegram", chat_id="1")
+        assert first[:-1] == second[:-1]
+        assert "Chat ID: 1" in first[0]["content"]
+
+    def test_current_time_rides_on_user_message(self, builder):
+        messages = builder.build_messages([], "hello")
+        assert messages[-1]["content"].startswith("[Current time: ")
+        assert messages[-1]["content"].endswith("\n\nhello")
@@ -0,0 +1,70 @@
+"""Tests for nanobot.utils.httpclient — shared pooled HTTP clients."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from nanobot.utils.httpclient import HttpClients
+
+
+def _transport() -> httpx.MockTransport:
+    return httpx.MockTransport(lambda request: httpx.Response(200, json={"path": request.url.path}))
+
+
+class TestHttpClients:
+    @pytest.mark.asyncio
+    async def test_profile_client_is_shared(self):
+        clients = HttpClients()
+        first = clients.get("api", transport=_transport())
+        assert clients.get("api") is first
+        assert clients.get("other", transport=_transport()) is not first
+        await clients.aclose()
+        assert first.is_closed
+
+    @pytest.mark.asyncio
+    async def test_configured_limits_and_timeouts_apply(self):
+        clients = HttpClients()
+        clients.configure(timeout=5.0, connect_timeout=2.0, max_connections=7)
+        client = clients.get()
+        assert client.timeout == httpx.Timeout(5.0, connect=2.0)
+        assert client._transport._pool._max_connections == 7
+        await clients.aclose()
+
+    @pytest.mark.asyncio
+    async def test_stats_count_requests_per_host(self):
+        clients = HttpClients()
+        client = clients.get("api", transport=_transport())
+        await client.get("https://a.example/x")
+        await client.get("https://a.example/y")
+        await client.get("https://b.example/z")
+        hosts = clients.stats()["api"]["hosts"]
+        assert {host: s["requests"] for host, s in hosts.items()} == {"a.example": 2, "b.example": 1}
+        assert clients.stats()["api"]["requests"] == 3
+        await clients.aclose()
+
+    @pytest.mark.asyncio
+    async def test_cookies_are_not_shared_between_requests(self):
+        seen = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            seen.append(request.headers.get("cookie"))
+            return httpx.Response(200, headers={"set-cookie": "sid=userA; Path=/"})
+
+        clients = HttpClients()
+        client = clients.get("fetch", transport=httpx.MockTransport(handler))
+        await client.get("https://a.example/login")
+        await client.get("https://a.example/page")
+        assert seen == [None, None]
+        assert not client.cookies
+        await clients.aclose()
+
+    def test_new_event_loop_gets_new_clients(self):
+        clients = HttpClients()
+
+        async def grab():
+            return clients.get("api", transport=_transport())
+
+        first = asyncio.run(grab())
+        second = asyncio.run(grab())
+        assert first is not second
@@ -0,0 +1,154 @@
+"""Tests for nanobot.providers.scheduler — rate limits, retries and priorities."""
+
+import asyncio
+import time
+from typing import Any
+
+import httpx
+import pytest
+
+from nanobot.providers.base import LLMProvider, LLMResponse, LLMStreamChunk, error_response
+from nanobot.providers.scheduler import ScheduledProvider, llm_priority
+
+
+class ScriptedProvider(LLMProvider):
+    """Replies with queued responses (then "ok"), recording the priority of each call."""
+
+    def __init__(self, *responses: LLMResponse):
+        super().__init__()
+        self.responses = list(responses)
+        self.calls: list[str] = []
+
+    async def chat(self, messages: list[dict[str, Any]], tools=None, model=None,
+                   max_tokens: int = 4096, temperature: float = 0.7) -> LLMResponse:
+        self.calls.append(messages[-1]["content"])
+        if self.responses:
+            return self.responses.pop(0)
+        return LLMResponse(content="ok", usage={"total_tokens": 10})
+
+    async def chat_stream(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7):
+        response = await self.chat(messages, tools, model, max_tokens, temperature)
+        if response.finish_reason != "error":
+            yield LLMStreamChunk(content=response.content)
+        yield LLMStreamChunk(response=response)
+
+    def get_default_model(self) -> str:
+        return "model"
+
+
+def _msg(text: str = "hi") -> list[dict[str, Any]]:
+    return [{"role": "user", "content": text}]
+
+
+def _error(status: int | None, retry_after: float | None = None, text: str = "boom") -> LLMResponse:
+    return LLMResponse(content=f"Error calling LLM: {text}", finish_reason="error",
+                       status_code=status, retry_after=retry_after)
+
+
+class TestAdmission:
+    @pytest.mark.asyncio
+    async def test_requests_per_minute_are_enforced(self):
+        inner = ScriptedProvider()
+        sched = ScheduledProvider(inner, rpm=1200)  # one request per 50ms once the bucket is empty
+        sched.requests.level = 0
+        start = time.monotonic()
+        await asyncio.gather(*(sched.chat(_msg()) for _ in range(3)))
+        assert time.monotonic() - start >= 0.12
+        assert len(inner.calls) == 3
+
+    @pytest.mark.asyncio
+    async def test_interactive_calls_overtake_background_ones(self):
+        inner = ScriptedProvider()
+        sched = ScheduledProvider(inner, rpm=1200)
+        sched.requests.level = 0
+
+        async def call(priority: str, text: str):
+            with llm_priority(priority):
+                await sched.chat(_msg(text))
+
+        background = [asyncio.create_task(call("background", f"bg{i}")) for i in range(2)]
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(call("interactive", "chat"))
+        await asyncio.gather(*background, interactive)
+        assert inner.calls[0] == "chat"
+        assert sched.stats()["waiting"] == 0
+
+    @pytest.mark.asyncio
+    async def test_unused_token_reservation_is_refunded(self):
+        sched = ScheduledProvider(ScriptedProvider(), tpm=10_000)
+        await sched.chat(_msg(), max_tokens=4000)
+        assert sched.tokens.level > 9_900  # only the 10 reported tokens stay spent
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_leaves_the_queue(self):
+        sched = ScheduledProvider(ScriptedProvider(), rpm=60)
+        sched.requests.level = 0
+        task = asyncio.create_task(sched.chat(_msg()))
+        await asyncio.sleep(0.01)
+        assert sched.stats()["waiting"] == 1
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert sched.stats()["waiting"] == 0
+
+
+class TestRetries:
+    @pytest.mark.asyncio
+    async def test_rate_limit_is_retried_after_the_hinted_delay(self):
+        inner = ScriptedProvider(_error(429, retry_after=0.05))
+        sched = ScheduledProvider(inner)
+        start = time.monotonic()
+        response = await sched.chat(_msg())
+        assert response.content == "ok"
+        assert time.monotonic() - start >= 0.05
+        assert sched.stats()["retries"] == 1 and sched.stats()["throttled"] == 1
+
+    @pytest.mark.asyncio
+    async def test_client_errors_are_not_retried(self):
+        inner = ScriptedProvider(_error(400))
+        response = await ScheduledProvider(inner).chat(_msg())
+        assert response.status_code == 400
+        assert len(inner.calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_transient_errors_without_status_back_off_and_give_up(self):
+        inner = ScriptedProvider(*[_error(None, text="Connection error") for _ in range(3)])
+        sched = ScheduledProvider(inner, max_retries=2, backoff_base=0.01)
+        response = await sched.chat(_msg())
+        assert response.finish_reason == "error"
+        assert len(inner.calls) == 3
+
+    @pytest.mark.asyncio
+    async def test_long_retry_after_is_returned_for_failover(self):
+        inner = ScriptedProvider(_error(429, retry_after=300))
+        response = await ScheduledProvider(inner, max_retry_after=60).chat(_msg())
+        assert response.status_code == 429
+        assert len(inner.calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_stream_is_retried_before_any_output(self):
+        inner = ScriptedProvider(_error(503, retry_after=0))
+        chunks = [c async for c in ScheduledProvider(inner).chat_stream(_msg())]
+        assert [c.content for c in chunks if c.content] == ["ok"]
+        assert chunks[-1].response.finish_reason == "stop"
+
+
+class TestErrorResponse:
+    def test_status_and_retry_after_are_kept(self):
+        exc = Exception("Too Many Requests")
+        exc.status_code = 429
+        exc.response = httpx.Response(429, headers={"retry-after": "7"})
+        response = error_response(exc)
+        assert (response.finish_reason, response.status_code, response.retry_after) == ("error", 429, 7.0)
+        assert response.content == "Error calling LLM: Too Many Requests"
+
+    def test_retry_after_ms_and_http_dates(self):
+        exc = Exception("slow down")
+        exc.response = httpx.Response(429, headers={"retry-after-ms": "1500"})
+        assert error_response(exc).retry_after == 1.5
+        exc.response = httpx.Response(429, headers={"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"})
+        assert error_response(exc).retry_after == 0.0  # in the past
+
+    def test_plain_exceptions(self):
+        response = error_response(ValueError("bad"), prefix="Error")
+        assert (response.content, response.status_code, response.retry_after) == ("Error: bad", None, None)
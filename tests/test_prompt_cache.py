@@ -0,0 +1,97 @@
+"""Tests for provider prompt caching helpers and their provider wiring."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+from nanobot.providers.custom_provider import CustomProvider
+from nanobot.providers.litellm_provider import LiteLLMProvider
+from nanobot.providers.prompt_cache import add_cache_breakpoints, prompt_cache_key
+
+MESSAGES = [
+    {"role": "system", "content": "You are nanobot."},
+    {"role": "user", "content": "hi"},
+    {"role": "assistant", "content": "hello"},
+    {"role": "user", "content": "what time is it?"},
+]
+TOOLS = [
+    {"type": "function", "function": {"name": "a", "parameters": {}}},
+    {"type": "function", "function": {"name": "b", "parameters": {}}},
+]
+
+
+class TestPromptCacheKey:
+    def test_depends_only_on_system_prefix(self):
+        longer = MESSAGES + [{"role": "assistant", "content": "noon"}]
+        assert prompt_cache_key(MESSAGES) == prompt_cache_key(longer)
+
+    def test_changes_with_system_prompt(self):
+        other = [{"role": "system", "content": "Different."}] + MESSAGES[1:]
+        assert prompt_cache_key(MESSAGES) != prompt_cache_key(other)
+
+
+class TestCacheBreakpoints:
+    def test_marks_system_last_message_and_last_tool(self):
+        messages, tools = add_cache_breakpoints(MESSAGES, TOOLS)
+        assert messages[0]["content"][0]["cache_control"] == {"type": "ephemeral"}
+        assert messages[-1]["content"] == [
+            {"type": "text", "text": "what time is it?", "cache_control": {"type": "ephemeral"}}
+        ]
+        assert messages[1]["content"] == "hi"
+        assert "cache_control" not in tools[0]
+        assert tools[-1]["cache_control"] == {"type": "ephemeral"}
+
+    def test_does_not_mutate_inputs(self):
+        add_cache_breakpoints(MESSAGES, TOOLS)
+        assert MESSAGES[0]["content"] == "You are nanobot."
+        assert "cache_control" not in TOOLS[-1]
+
+    def test_skips_messages_without_content(self):
+        messages = MESSAGES + [{"role": "assistant", "tool_calls": [{"id": "x"}]}]
+        marked, _ = add_cache_breakpoints(messages)
+        assert "content" not in marked[-1]
+        assert isinstance(marked[-2]["content"], list)
+
+
+class TestProviderWiring:
+    def test_anthropic_gets_breakpoints(self):
+        provider = LiteLLMProvider(default_model="anthropic/claude-opus-4-5")
+        kwargs = provider._build_kwargs(MESSAGES, TOOLS, None, 100, 0.7)
+        assert isinstance(kwargs["messages"][0]["content"], list)
+        assert kwargs["tools"][-1]["cache_control"] == {"type": "ephemeral"}
+        assert "prompt_cache_key" not in kwargs
+
+    def test_openai_gets_prompt_cache_key(self):
+        provider = LiteLLMProvider(default_model="gpt-4o")
+        kwargs = provider._build_kwargs(MESSAGES, TOOLS, None, 100, 0.7)
+        assert kwargs["prompt_cache_key"] == prompt_cache_key(MESSAGES)
+        assert kwargs["messages"] is MESSAGES
+
+    def test_other_providers_unchanged(self):
+        provider = LiteLLMProvider(default_model="deepseek/deepseek-chat")
+        kwargs = provider._build_kwargs(MESSAGES, TOOLS, None, 100, 0.7)
+        assert kwargs["messages"] is MESSAGES
+        assert "prompt_cache_key" not in kwargs
+
+    def test_custom_provider_is_opt_in(self):
+        off = CustomProvider(default_model="my-model")._build_kwargs(MESSAGES, None, None, 100, 0.7)
+        on = CustomProvider(default_model="my-model", prompt_caching=True)._build_kwargs(MESSAGES, None, None, 100, 0.7)
+        assert "extra_body" not in off
+        assert on["extra_body"] == {"prompt_cache_key": prompt_cache_key(MESSAGES)}
+
+
+class TestCachedUsage:
+    def test_litellm_reports_cached_tokens(self):
+        usage = SimpleNamespace(
+            prompt_tokens=1000, completion_tokens=10, total_tokens=1010,
+            prompt_tokens_details=SimpleNamespace(cached_tokens=900),
+            cache_creation_input_tokens=50,
+        )
+        parsed = LiteLLMProvider._parse_usage(usage)
+        assert parsed["cached_tokens"] == 900
+        assert parsed["cache_creation_tokens"] == 50
+
+    def test_missing_details_report_zero(self):
+        usage = SimpleNamespace(prompt_tokens=5, completion_tokens=1, total_tokens=6)
+        assert LiteLLMProvider._parse_usage(usage)["cached_tokens"] == 0
+        assert CustomProvider._usage(usage)["cached_tokens"] == 0
@@ -0,0 +1,163 @@
+"""Tests for nanobot.providers.routing — failover, circuit breaking and latency routing."""
+
+import asyncio
+from typing import Any
+
+import pytest
+
+from nanobot.providers.base import LLMProvider, LLMResponse, LLMStreamChunk
+from nanobot.providers.routing import Backend, RoutingProvider
+
+
+class FakeProvider(LLMProvider):
+    """Answers with its name, or fails / stalls on demand."""
+
+    def __init__(self, name: str, fail: bool = False, delay: float = 0.0):
+        super().__init__()
+        self.name = name
+        self.fail = fail
+        self.delay = delay
+        self.calls: list[str | None] = []
+
+    async def chat(self, messages: list[dict[str, Any]], tools=None, model=None,
+                   max_tokens: int = 4096, temperature: float = 0.7) -> LLMResponse:
+        self.calls.append(model)
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            return LLMResponse(content="Error calling LLM: 503", finish_reason="error")
+        return LLMResponse(content=self.name)
+
+    async def chat_stream(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7):
+        response = await self.chat(messages, tools, model, max_tokens, temperature)
+        if response.finish_reason != "error":
+            yield LLMStreamChunk(content=response.content)
+        yield LLMStreamChunk(response=response)
+
+    def get_default_model(self) -> str:
+        return "primary-model"
+
+
+def _router(*providers: FakeProvider, **kwargs: Any) -> RoutingProvider:
+    backends = [Backend(p.name, p, model=None if i == 0 else f"{p.name}-model") for i, p in enumerate(providers)]
+    return RoutingProvider(backends, **kwargs)
+
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+class TestFailover:
+    @pytest.mark.asyncio
+    async def test_failed_call_falls_through_to_next_backend(self):
+        primary, backup = FakeProvider("primary", fail=True), FakeProvider("backup")
+        router = _router(primary, backup)
+        response = await router.chat(MESSAGES, model="primary-model")
+        assert response.content == "backup"
+        assert primary.calls == ["primary-model"]
+        assert backup.calls == ["backup-model"]  # fallbacks use their own model
+
+    @pytest.mark.asyncio
+    async def test_all_backends_failing_returns_last_error(self):
+        router = _router(FakeProvider("a", fail=True), FakeProvider("b", fail=True))
+        response = await router.chat(MESSAGES)
+        assert response.finish_reason == "error"
+
+    @pytest.mark.asyncio
+    async def test_bad_request_is_returned_without_failover(self):
+        class Refusing(FakeProvider):
+            async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7):
+                self.calls.append(model)
+                return LLMResponse(content="Error calling LLM: context too long", finish_reason="error",
+                                   status_code=400)
+
+        primary, backup = Refusing("primary"), FakeProvider("backup")
+        router = _router(primary, backup, failure_threshold=1)
+        for _ in range(2):
+            assert (await router.chat(MESSAGES)).status_code == 400
+        chunks = [chunk async for chunk in router.chat_stream(MESSAGES)]
+        assert chunks[-1].response.status_code == 400
+        assert backup.calls == []
+        assert router.stats()["primary"] == {**router.stats()["primary"], "state": "closed", "failures": 0}
+
+    @pytest.mark.asyncio
+    async def test_circuit_opens_and_skips_failing_backend(self):
+        primary, backup = FakeProvider("primary", fail=True), FakeProvider("backup")
+        router = _router(primary, backup, failure_threshold=2, cooldown=60)
+        for _ in range(4):
+            assert (await router.chat(MESSAGES)).content == "backup"
+        assert len(primary.calls) == 2
+        assert router.stats()["primary"]["state"] == "open"
+
+    @pytest.mark.asyncio
+    async def test_half_open_probe_closes_circuit_on_success(self):
+        primary, backup = FakeProvider("primary", fail=True), FakeProvider("backup")
+        router = _router(primary, backup, failure_threshold=1, cooldown=0.01)
+        await router.chat(MESSAGES)
+        assert router.stats()["primary"]["state"] == "open"
+        await asyncio.sleep(0.02)
+        primary.fail = False
+        assert (await router.chat(MESSAGES)).content == "primary"
+        assert router.stats()["primary"]["state"] == "closed"
+
+    @pytest.mark.asyncio
+    async def test_cancelled_probe_can_be_probed_again(self):
+        primary, backup = FakeProvider("primary", fail=True), FakeProvider("backup")
+        router = _router(primary, backup, failure_threshold=1, cooldown=0.01)
+        await router.chat(MESSAGES)
+        await asyncio.sleep(0.02)
+        primary.fail, primary.delay = False, 1.0
+        probe = asyncio.create_task(router.chat(MESSAGES))
+        await asyncio.sleep(0.01)
+        assert router.backends[0].probing
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        assert not router.backends[0].probing
+        primary.delay = 0.0
+        assert (await router.chat(MESSAGES)).content == "primary"
+
+    @pytest.mark.asyncio
+    async def test_attempt_timeout_fails_over(self):
+        router = _router(FakeProvider("slow", delay=1.0), FakeProvider("fast"), attempt_timeout=0.05)
+        assert (await router.chat(MESSAGES)).content == "fast"
+        assert router.stats()["slow"]["failures"] == 1
+
+
+class TestLatencyRouting:
+    @pytest.mark.asyncio
+    async def test_prefers_lower_latency_backend(self):
+        slow, fast = FakeProvider("slow", delay=0.03), FakeProvider("fast")
+        router = _router(slow, fast, strategy="latency")
+        await router.chat(MESSAGES)  # untried backends score 0, so both get measured
+        await router.chat(MESSAGES)
+        fast.calls.clear()
+        for _ in range(3):
+            assert (await router.chat(MESSAGES)).content == "fast"
+        assert len(fast.calls) == 3
+
+    def test_unknown_strategy_is_rejected(self):
+        with pytest.raises(ValueError):
+            _router(FakeProvider("a"), strategy="random")
+
+
+class TestStreaming:
+    @pytest.mark.asyncio
+    async def test_stream_fails_over_before_first_delta(self):
+        router = _router(FakeProvider("primary", fail=True), FakeProvider("backup"))
+        chunks = [chunk async for chunk in router.chat_stream(MESSAGES)]
+        assert "".join(c.content for c in chunks) == "backup"
+        assert chunks[-1].response.content == "backup"
+
+    @pytest.mark.asyncio
+    async def test_stream_errors_after_output_are_not_retried(self):
+        class Broken(FakeProvider):
+            async def chat_stream(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7):
+                self.calls.append(model)
+                yield LLMStreamChunk(content="partial")
+                yield LLMStreamChunk(response=LLMResponse(content="Error: reset", finish_reason="error"))
+
+        backup = FakeProvider("backup")
+        router = _router(Broken("primary"), backup)
+        chunks = [chunk async for chunk in router.chat_stream(MESSAGES)]
+        assert chunks[0].content == "partial"
+        assert chunks[-1].response.finish_reason == "error"
+        assert backup.calls == []
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import pytest
 
+from nanobot.session.base import message_tokens
 from nanobot.session.manager import Session, SessionManager
 
 
@@ -47,6 +48,32 @@ class TestSession:
         assert len(history) == 3
         assert history[-1]["content"] == "9"
 
+    def test_add_message_caches_token_estimate(self):
+        s = Session(key="k")
+        s.add_message("user", "x" * 400)
+        assert s.messages[0]["tokens"] > 100
+        assert "tokens" not in s.get_history()[0]
+
+    def test_get_history_respects_token_budget(self):
+        s = Session(key="k")
+        s.add_message("user", "y" * 4000)  # ~1000 tokens
+        for i in range(5):
+            s.add_message("user", str(i))
+        history = s.get_history(max_tokens=100)
+        assert [m["content"] for m in history] == ["0", "1", "2", "3", "4"]
+
+    def test_get_history_token_budget_keeps_newest(self):
+        s = Session(key="k")
+        for i in range(10):
+            s.add_message("user", str(i))
+        history = s.get_history(max_tokens=3 * s.messages[0]["tokens"])
+        assert [m["content"] for m in history] == ["7", "8", "9"]
+
+    def test_get_history_estimates_legacy_messages(self):
+        s = Session(key="k", messages=[{"role": "user", "content": "old"}])
+        assert s.get_history(max_tokens=0) == []
+        assert s.messages[0]["tokens"] > 0
+
     def test_get_history_preserves_tool_metadata(self):
         s = Session(key="k")
         tool_calls = [{"id": "tc1", "function": {"name": "search"}}]
@@ -226,3 +253,547 @@ class TestSessionManager:
         # After invalidation, get_or_create creates a fresh session
         s2 = manager.get_or_create("test:inv")
         assert len(s2.messages) == 0
+
+
+# ---------------------------------------------------------------------------
+# Append-only persistence
+# ---------------------------------------------------------------------------
+
+class TestAppendOnlyPersistence:
+    @pytest.fixture
+    def workspace(self, tmp_path):
+        ws = tmp_path / "workspace"
+        ws.mkdir()
+        return ws
+
+    @staticmethod
+    def _lines(manager, key):
+        import json
+        path = manager.store._get_session_path(key)
+        return [json.loads(line) for line in path.read_text().splitlines() if line.strip()]
+
+    def test_save_appends_new_messages_and_trailer(self, workspace):
+        m = SessionManager(workspace)
+        s = m.get_or_create("t:1")
+        s.add_message("user", "a")
+        m.save(s)
+        s.add_message("assistant", "b")
+        s.last_consolidated = 1
+        m.save(s)
+
+        lines = self._lines(m, "t:1")
+        assert [line.get("_type", line.get("content")) for line in lines] == [
+            "metadata", "a", "metadata", "b", "metadata",
+        ]
+
+        reloaded = SessionManager(workspace).get_or_create("t:1")
+        assert [msg["content"] for msg in reloaded.messages] == ["a", "b"]
+        assert reloaded.last_consolidated == 1
+
+    def test_clear_rewrites_file(self, workspace):
+        m = SessionManager(workspace)
+        s = m.get_or_create("t:2")
+        s.add_message("user", "old")
+        m.save(s)
+        s.clear()
+        m.save(s)
+        s.add_message("user", "new")
+        m.save(s)
+
+        reloaded = SessionManager(workspace).get_or_create("t:2")
+        assert [msg["content"] for msg in reloaded.messages] == ["new"]
+
+    def test_compaction_drops_trailers(self, workspace):
+        m = SessionManager(workspace, compact_after=3)
+        s = m.get_or_create("t:3")
+        for i in range(5):
+            s.add_message("user", str(i))
+            m.save(s)
+
+        lines = self._lines(m, "t:3")
+        assert sum(1 for line in lines if line.get("_type") == "metadata") <= 3
+        assert [line["content"] for line in lines if "_type" not in line] == ["0", "1", "2", "3", "4"]
+
+    def test_torn_append_is_skipped_on_load(self, workspace):
+        m = SessionManager(workspace)
+        s = m.get_or_create("t:4")
+        s.add_message("user", "intact")
+        m.save(s)
+        with open(m.store._get_session_path("t:4"), "a") as f:
+            f.write('{"role": "user", "cont')
+
+        reloaded = SessionManager(workspace).get_or_create("t:4")
+        assert [msg["content"] for msg in reloaded.messages] == ["intact"]
+
+    def test_save_after_torn_append_starts_a_new_line(self, workspace):
+        m = SessionManager(workspace)
+        s = m.get_or_create("t:6")
+        s.add_message("user", "intact")
+        m.save(s)
+        with open(m.store._get_session_path("t:6"), "a") as f:
+            f.write('{"role": "user", "cont')
+        s.add_message("user", "after-crash")
+        m.save(s)
+
+        reloaded = SessionManager(workspace).get_or_create("t:6")
+        assert [msg["content"] for msg in reloaded.messages] == ["intact", "after-crash"]
+        assert reloaded.message_count == 2
+
+    def test_list_sessions_reads_latest_trailer(self, workspace):
+        m = SessionManager(workspace)
+        s = m.get_or_create("t:5")
+        s.add_message("user", "a")
+        m.save(s)
+        first = m.list_sessions()[0]["updated_at"]
+        s.add_message("user", "b")
+        m.save(s)
+        assert m.list_sessions()[0]["updated_at"] >= first
+        assert m.list_sessions()[0]["updated_at"] == s.updated_at.isoformat()
+
+
+# ---------------------------------------------------------------------------
+# Bounded LRU cache
+# ---------------------------------------------------------------------------
+
+class TestSessionCache:
+    @pytest.fixture
+    def workspace(self, tmp_path):
+        ws = tmp_path / "workspace"
+        ws.mkdir()
+        return ws
+
+    def test_lru_eviction_flushes_dirty_session(self, workspace):
+        m = SessionManager(workspace, max_cached=2)
+        a = m.get_or_create("c:a")
+        a.add_message("user", "unsaved")
+        m.get_or_create("c:b")
+        m.get_or_create("c:c")  # evicts c:a
+
+        assert "c:a" not in m._cache
+        assert m.cache_stats()["evictions"] == 1
+        reloaded = SessionManager(workspace).get_or_create("c:a")
+        assert [msg["content"] for msg in reloaded.messages] == ["unsaved"]
+
+    def test_hit_refreshes_recency(self, workspace):
+        m = SessionManager(workspace, max_cached=2)
+        m.get_or_create("c:a")
+        m.get_or_create("c:b")
+        m.get_or_create("c:a")
+        m.get_or_create("c:c")  # evicts c:b, not c:a
+        assert list(m._cache) == ["c:a", "c:c"]
+        stats = m.cache_stats()
+        assert (stats["hits"], stats["misses"]) == (1, 3)
+
+    def test_byte_cap(self, workspace):
+        m = SessionManager(workspace, max_cache_bytes=4096)
+        big = m.get_or_create("c:big")
+        big.add_message("user", "x" * 8000)
+        m.save(big)  # over the cap on its own, but the newest entry stays
+        assert list(m._cache) == ["c:big"]
+        m.get_or_create("c:small")
+        assert list(m._cache) == ["c:small"]
+        assert m.cache_stats()["bytes"] <= 4096
+
+    def test_evicted_session_keeps_identity_while_referenced(self, workspace):
+        m = SessionManager(workspace, max_cached=1)
+        a = m.get_or_create("c:a")
+        m.get_or_create("c:b")  # evicts c:a, still held by this test
+        assert m.get_or_create("c:a") is a
+
+    def test_invalidate_discards_weak_entry(self, workspace):
+        m = SessionManager(workspace, max_cached=1)
+        a = m.get_or_create("c:a")
+        m.get_or_create("c:b")
+        m.invalidate("c:a")
+        assert m.get_or_create("c:a") is not a
+
+
+# ---------------------------------------------------------------------------
+# Tail-only loading
+# ---------------------------------------------------------------------------
+
+class TestTailLoading:
+    @pytest.fixture
+    def workspace(self, tmp_path):
+        ws = tmp_path / "workspace"
+        ws.mkdir()
+        return ws
+
+    @staticmethod
+    def _populate(workspace, key, count, last_consolidated=0, saves=4):
+        m = SessionManager(workspace)
+        s = m.get_or_create(key)
+        for i in range(count):
+            s.add_message("user", str(i))
+            if i % (count // saves) == 0:
+                m.save(s)
+        s.last_consolidated = last_consolidated
+        m.save(s)
+
+    def test_loads_only_tail(self, workspace):
+        self._populate(workspace, "l:1", 500, last_consolidated=480)
+        s = SessionManager(workspace, tail_messages=50).get_or_create("l:1")
+        assert len(s.messages) == 50
+        assert s.message_count == 500
+        assert s.messages[0]["content"] == "450"
+        assert s.last_consolidated == 480
+
+    def test_tail_covers_unconsolidated_messages(self, workspace):
+        self._populate(workspace, "l:2", 500, last_consolidated=100)
+        s = SessionManager(workspace, tail_messages=50).get_or_create("l:2")
+        assert len(s.messages) == 400
+        assert s.messages_from(100)[0]["content"] == "100"
+
+    def test_older_messages_materialize_on_demand(self, workspace):
+        self._populate(workspace, "l:3", 300, last_consolidated=300)
+        s = SessionManager(workspace, tail_messages=50).get_or_create("l:3")
+        assert len(s.get_history(max_messages=20)) == 20
+        assert len(s.messages) == 50
+
+        history = s.get_history(max_messages=120)
+        assert [h["content"] for h in history] == [str(i) for i in range(180, 300)]
+        assert len(s.messages) == 120  # only the missing range is read
+        assert s.messages_from(0)[0]["content"] == "0"
+        assert len(s.messages) == 300
+
+    def test_history_budget_pages_in_only_what_fits(self, workspace):
+        self._populate(workspace, "l:8", 1000, last_consolidated=1000)
+        s = SessionManager(workspace).get_or_create("l:8")
+        assert len(s.messages) == 200
+        budget = sum(message_tokens(m) for m in s.messages) + 10 * message_tokens(s.messages[0])
+        history = s.get_history(max_tokens=budget)
+        assert history[-1]["content"] == "999"
+        assert 200 < len(s.messages) < 1000
+
+    def test_rewritten_file_is_tail_loaded(self, workspace):
+        m = SessionManager(workspace)
+        s = m.get_or_create("l:9")
+        s.add_message("user", "old")
+        m.save(s)
+        s.clear()
+        for i in range(100):
+            s.add_message("user", str(i))
+        s.last_consolidated = 100
+        m.save(s)
+
+        again = SessionManager(workspace, tail_messages=10).get_or_create("l:9")
+        assert [msg["content"] for msg in again.messages] == [str(i) for i in range(90, 100)]
+        assert again.message_count == 100
+
+    def test_appends_after_tail_load_keep_full_history(self, workspace):
+        self._populate(workspace, "l:4", 100, last_consolidated=100)
+        m = SessionManager(workspace, tail_messages=10)
+        s = m.get_or_create("l:4")
+        s.add_message("user", "new")
+        m.save(s)
+        m.store.compact(s)
+
+        full = SessionManager(workspace, tail_messages=0).get_or_create("l:4")
+        assert [msg["content"] for msg in full.messages] == [str(i) for i in range(100)] + ["new"]
+        again = SessionManager(workspace, tail_messages=10).get_or_create("l:4")
+        assert again.message_count == 101
+        assert again.messages[-1]["content"] == "new"
+
+    def test_clear_after_tail_load_rewrites_without_deadlock(self, workspace):
+        self._populate(workspace, "l:7", 100, last_consolidated=100)
+        m = SessionManager(workspace, tail_messages=10)
+        s = m.get_or_create("l:7")
+        s._rewrite = True  # e.g. a save racing clear(): the rewrite materializes the head first
+        m.save(s)
+        full = SessionManager(workspace, tail_messages=0).get_or_create("l:7")
+        assert [msg["content"] for msg in full.messages] == [str(i) for i in range(100)]
+
+    def test_legacy_file_without_counts_is_loaded_in_full(self, workspace):
+        import json
+        m = SessionManager(workspace, tail_messages=2)
+        path = m.store._get_session_path("l:5")
+        lines = [{"_type": "metadata", "created_at": "2025-01-01T00:00:00", "metadata": {}, "last_consolidated": 0}]
+        lines += [{"role": "user", "content": str(i)} for i in range(5)]
+        path.write_text("\n".join(json.dumps(line) for line in lines) + "\n")
+
+        s = m.get_or_create("l:5")
+        assert [msg["content"] for msg in s.messages] == ["0", "1", "2", "3", "4"]
+
+    def test_stdlib_formatted_file_is_tail_loaded(self, workspace):
+        import json
+        m = SessionManager(workspace, tail_messages=2)
+        path = m.store._get_session_path("l:6")
+        meta = {"_type": "metadata", "key": "l:6", "created_at": "2025-01-01T00:00:00",
+                "metadata": {}, "last_consolidated": 5, "message_count": 5}
+        lines = [meta] + [{"role": "user", "content": f"é{i}"} for i in range(5)] + [meta]
+        path.write_text("\n".join(json.dumps(line) for line in lines) + "\n")
+
+        s = m.get_or_create("l:6")
+        assert [msg["content"] for msg in s.messages] == ["é3", "é4"]
+        assert s.message_count == 5
+        assert m.store._scan_file(path)["message_count"] == 5
+
+
+# ---------------------------------------------------------------------------
+# Session catalog
+# ---------------------------------------------------------------------------
+
+class TestSessionCatalog:
+    @pytest.fixture
+    def workspace(self, tmp_path):
+        ws = tmp_path / "workspace"
+        ws.mkdir()
+        return ws
+
+    @staticmethod
+    def _save(manager, key, n):
+        s = manager.get_or_create(key)
+        for i in range(n):
+            s.add_message("user", str(i))
+        manager.save(s)
+        return s
+
+    def test_save_updates_catalog_row(self, workspace):
+        m = SessionManager(workspace)
+        s = self._save(m, "web:a_b", 3)
+        row = m.store.catalog.get("web:a_b")
+        assert row["message_count"] == 3
+        assert row["bytes"] == m.store._get_session_path("web:a_b").stat().st_size
+
+        s.add_message("user", "more")
+        s.last_consolidated = 2
+        m.save(s)
+        row = m.store.catalog.get("web:a_b")
+        assert (row["message_count"], row["last_consolidated"]) == (4, 2)
+        assert row["bytes"] == m.store._get_session_path("web:a_b").stat().st_size
+
+    def test_list_keeps_exact_keys(self, workspace):
+        m = SessionManager(workspace)
+        self._save(m, "slack:C1_thread", 1)
+        assert [info["key"] for info in m.list_sessions()] == ["slack:C1_thread"]
+
+    def test_paging_and_sorting(self, workspace):
+        m = SessionManager(workspace)
+        for i in range(5):
+            self._save(m, f"k:{i}", i + 1)
+        assert [s["key"] for s in m.list_sessions(limit=2)] == ["k:4", "k:3"]
+        assert [s["key"] for s in m.list_sessions(limit=2, offset=2)] == ["k:2", "k:1"]
+        by_size = m.list_sessions(sort="message_count", descending=False)
+        assert [s["message_count"] for s in by_size] == [1, 2, 3, 4, 5]
+        with pytest.raises(ValueError):
+            m.list_sessions(sort="path; DROP TABLE sessions")
+
+    def test_missing_catalog_is_rebuilt_from_files(self, workspace):
+        m = SessionManager(workspace)
+        self._save(m, "t:x_y", 2)
+        m.store.catalog.close()
+        for path in (workspace / "sessions").glob("catalog.db*"):
+            path.unlink()
+
+        rebuilt = SessionManager(workspace)
+        row = rebuilt.store.catalog.get("t:x_y")
+        assert row["message_count"] == 2
+        assert rebuilt.store.catalog.count() == 1
+
+
+# ---------------------------------------------------------------------------
+# Store backends
+# ---------------------------------------------------------------------------
+
+class TestSessionStores:
+    @pytest.fixture
+    def workspace(self, tmp_path):
+        ws = tmp_path / "workspace"
+        ws.mkdir()
+        return ws
+
+    @staticmethod
+    def _conversation(session):
+        for i in range(30):
+            session.add_message("user", f"question {i} " + "x" * (i * 40))
+            session.add_message(
+                "assistant", "",
+                tool_calls=[{"id": f"c{i}", "type": "function", "function": {"name": "t", "arguments": "{}"}}],
+            )
+            session.add_message("tool", f"result {i}", tool_call_id=f"c{i}", name="t")
+            session.add_message("assistant", f"answer {i}")
+
+    @pytest.mark.parametrize("backend", ["jsonl", "sqlite"])
+    def test_save_and_reload(self, workspace, backend):
+        m = SessionManager(workspace, backend=backend)
+        s = m.get_or_create("b:1")
+        s.add_message("user", "a")
+        m.save(s)
+        s.add_message("assistant", "b")
+        s.last_consolidated = 1
+        m.save(s)
+        m.close()
+
+        reloaded = SessionManager(workspace, backend=backend).get_or_create("b:1")
+        assert [msg["content"] for msg in reloaded.messages] == ["a", "b"]
+        assert reloaded.last_consolidated == 1
+
+    @pytest.mark.parametrize("backend", ["jsonl", "sqlite"])
+    def test_clear_rewrites(self, workspace, backend):
+        m = SessionManager(workspace, backend=backend)
+        s = m.get_or_create("b:2")
+        s.add_message("user", "old")
+        m.save(s)
+        s.clear()
+        s.add_message("user", "new")
+        m.save(s)
+
+        reloaded = SessionManager(workspace, backend=backend).get_or_create("b:2")
+        assert [msg["content"] for msg in reloaded.messages] == ["new"]
+
+    def test_get_history_parity_across_backends(self, workspace):
+        histories = {}
+        for backend in ("jsonl", "sqlite"):
+            m = SessionManager(workspace / backend, backend=backend, tail_messages=20)
+            s = m.get_or_create("b:3")
+            self._conversation(s)
+            m.save(s)
+            s.last_consolidated = 100
+            m.save(s)
+            m.close()
+
+            reloaded = SessionManager(workspace / backend, backend=backend, tail_messages=20).get_or_create("b:3")
+            histories[backend] = [
+                reloaded.get_history(max_messages=10),
+                reloaded.get_history(max_tokens=800),
+                reloaded.get_history(),
+            ]
+        assert histories["jsonl"] == histories["sqlite"]
+
+    def test_sqlite_loads_tail_and_pages_in_older(self, workspace):
+        m = SessionManager(workspace, backend="sqlite")
+        s = m.get_or_create("b:4")
+        self._conversation(s)
+        s.last_consolidated = 110
+        m.save(s)
+
+        reloaded = SessionManager(workspace, backend="sqlite", tail_messages=5).get_or_create("b:4")
+        assert (len(reloaded.messages), reloaded.message_count) == (10, 120)
+        reloaded.load_all()
+        assert reloaded.messages == s.messages
+
+    @pytest.mark.asyncio
+    async def test_sqlite_batches_writes_per_tick(self, workspace):
+        import asyncio
+
+        m = SessionManager(workspace, backend="sqlite")
+        flushes = []
+        original = m.store._write_rows
+        m.store._write_rows = lambda session: flushes.append(session.key) or original(session)
+
+        for key in ("b:5", "b:6"):
+            s = m.get_or_create(key)
+            s.add_message("user", "hi")
+            m.save(s)
+            m.save(s)
+        assert flushes == []
+        await asyncio.sleep(0)
+        assert sorted(flushes) == ["b:5", "b:6"]
+        assert m.count_sessions() == 2
+
+    def test_migrate_jsonl_to_sqlite(self, workspace):
+        from nanobot.session.manager import make_store, migrate_sessions
+
+        m = SessionManager(workspace)
+        s = m.get_or_create("b:7_x")
+        self._conversation(s)
+        m.save(s)
+        m.close()
+
+        src = make_store("jsonl", m.sessions_dir, tail_messages=0)
+        dst = make_store("sqlite", m.sessions_dir)
+        assert migrate_sessions(src, dst) == 1
+        dst.close()
+
+        migrated = SessionManager(workspace, backend="sqlite").get_or_create("b:7_x")
+        migrated.load_all()
+        assert migrated.get_history() == s.get_history()
+
+    def test_unknown_backend(self, workspace):
+        with pytest.raises(ValueError):
+            SessionManager(workspace, backend="redis")
+
+
+# ---------------------------------------------------------------------------
+# Cold-storage tier
+# ---------------------------------------------------------------------------
+
+class TestSessionArchive:
+    @pytest.fixture
+    def workspace(self, tmp_path):
+        ws = tmp_path / "workspace"
+        ws.mkdir()
+        return ws
+
+    @staticmethod
+    def _old_session(workspace, key, n=50):
+        from datetime import datetime, timedelta
+
+        m = SessionManager(workspace)
+        s = m.get_or_create(key)
+        for i in range(n):
+            s.add_message("user", f"message {i} " + "lorem ipsum " * 10)
+        s.updated_at = datetime.now() - timedelta(days=60)
+        m.save(s)
+        m.close()
+
+    def test_idle_session_is_compressed(self, workspace):
+        self._old_session(workspace, "old:1")
+        m = SessionManager(workspace)
+        plain = m.store._get_session_path("old:1")
+        size = plain.stat().st_size
+
+        archived, reclaimed = m.archive_idle(30)
+        assert archived == 1
+        assert not plain.exists()
+        gz = plain.with_name(plain.name + ".gz")
+        assert reclaimed == size - gz.stat().st_size > 0
+        assert m.list_sessions()[0]["path"].endswith(".jsonl.gz")
+        assert m.archive_stats() == {"sessions": 1, "bytes_reclaimed": reclaimed}
+
+    def test_archived_session_loads_transparently(self, workspace):
+        self._old_session(workspace, "old:2")
+        SessionManager(workspace).archive_idle(30)
+
+        m = SessionManager(workspace, tail_messages=10)
+        s = m.get_or_create("old:2")
+        assert s.message_count == 50
+        s.load_all()
+        assert s.messages[0]["content"].startswith("message 0 ")
+        s.add_message("user", "back again")
+        m.save(s)
+        assert m.store._get_session_path("old:2").exists()
+        assert not m.list_sessions()[0]["path"].endswith(".gz")
+
+    def test_recent_and_cached_sessions_are_kept(self, workspace):
+        self._old_session(workspace, "old:3")
+        m = SessionManager(workspace)
+        s = m.get_or_create("fresh:1")
+        s.add_message("user", "hi")
+        m.save(s)
+        m.get_or_create("old:3")  # in use
+        assert m.archive_idle(30) == (0, 0)
+
+    def test_sessions_owned_by_other_processes_are_kept(self, workspace):
+        self._old_session(workspace, "old:5")
+        self._old_session(workspace, "old:6")
+        m = SessionManager(workspace)
+        assert m.archive_idle(30, owns=lambda key: key == "old:6")[0] == 1
+        assert m.store._get_session_path("old:5").exists()
+        assert not m.store._get_session_path("old:6").exists()
+
+    def test_catalog_rebuild_indexes_archives(self, workspace):
+        self._old_session(workspace, "old:4_x")
+        m = SessionManager(workspace)
+        m.archive_idle(30)
+        m.close()
+        for path in (workspace / "sessions").glob("catalog.db*"):
+            path.unlink()
+
+        row = SessionManager(workspace).store.catalog.get("old:4_x")
+        assert row["message_count"] == 50
+        assert row["path"].endswith(".jsonl.gz")
+
+    def test_sqlite_store_has_no_cold_tier(self, workspace):
+        m = SessionManager(workspace, backend="sqlite")
+        assert m.archive_idle(0) == (0, 0)
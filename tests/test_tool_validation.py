@@ -1,3 +1,4 @@
+import asyncio
 from typing import Any
 
 from nanobot.agent.tools.base import Tool
@@ -86,3 +87,80 @@ async def test_registry_returns_validation_error() -> None:
     reg.register(SampleTool())
     result = await reg.execute("sample", {"query": "hi"})
     assert "Invalid parameters" in result
+
+
+class SleepTool(Tool):
+    """Records start/finish order; optionally declared safe for parallel runs."""
+
+    def __init__(self, name: str, safe: bool, log: list[str]):
+        self._name = name
+        self._safe = safe
+        self._log = log
+        self.active = 0
+        self.peak = 0
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def description(self) -> str:
+        return "sleep"
+
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {"type": "object", "properties": {"delay": {"type": "number"}, "tag": {"type": "string"}}}
+
+    @property
+    def concurrency_safe(self) -> bool:
+        return self._safe
+
+    async def execute(self, delay: float = 0.0, tag: str = "", **kwargs: Any) -> str:
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        self._log.append(f"start:{tag}")
+        await asyncio.sleep(delay)
+        self._log.append(f"end:{tag}")
+        self.active -= 1
+        return tag
+
+
+async def test_execute_batch_preserves_call_order() -> None:
+    log: list[str] = []
+    reg = ToolRegistry()
+    reg.register(SleepTool("fetch", safe=True, log=log))
+    calls = [("fetch", {"delay": 0.03 - i * 0.01, "tag": str(i)}) for i in range(3)]
+    assert await reg.execute_batch(calls) == ["0", "1", "2"]
+
+
+async def test_execute_batch_runs_safe_calls_together_under_cap() -> None:
+    log: list[str] = []
+    reg = ToolRegistry()
+    tool = SleepTool("fetch", safe=True, log=log)
+    reg.register(tool)
+    calls = [("fetch", {"delay": 0.01, "tag": str(i)}) for i in range(6)]
+    await reg.execute_batch(calls, max_concurrency=3)
+    assert tool.peak == 3
+
+
+async def test_execute_batch_unsafe_call_is_a_barrier() -> None:
+    log: list[str] = []
+    reg = ToolRegistry()
+    reg.register(SleepTool("fetch", safe=True, log=log))
+    reg.register(SleepTool("write", safe=False, log=log))
+    calls = [
+        ("fetch", {"delay": 0.02, "tag": "a"}),
+        ("write", {"tag": "w"}),
+        ("fetch", {"tag": "b"}),
+    ]
+    results = await reg.execute_batch(calls)
+    assert results == ["a", "w", "b"]
+    assert log.index("end:a") < log.index("start:w") < log.index("end:w") < log.index("start:b")
+
+
+async def test_execute_batch_reports_unknown_tool_in_place() -> None:
+    reg = ToolRegistry()
+    reg.register(SampleTool())
+    results = await reg.execute_batch([("missing", {}), ("sample", {"query": "hi", "count": 1})])
+    assert "not found" in results[0]
+    assert results[1] == "ok"
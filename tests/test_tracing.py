@@ -0,0 +1,135 @@
+"""Tests for nanobot.utils.tracing — spans, sinks and propagation through a turn."""
+
+import asyncio
+from typing import Any
+
+import pytest
+
+from nanobot.agent.loop import AgentLoop
+from nanobot.bus.events import OutboundMessage
+from nanobot.bus.queue import MessageBus
+from nanobot.channels.base import BaseChannel
+from nanobot.channels.manager import ChannelOutbox
+from nanobot.providers.base import LLMProvider, LLMResponse
+from nanobot.utils import codec, tracing
+from nanobot.utils.tracing import Tracer
+
+
+class TestTracer:
+    def test_spans_nest_and_share_the_trace(self):
+        tracer = Tracer()
+        with tracer.span("outer") as outer:
+            with tracer.span("inner", tool="x") as inner:
+                pass
+        assert inner.trace_id == outer.trace_id
+        assert inner.parent_id == outer.span_id
+        assert outer.parent_id is None
+        assert [s["name"] for s in tracer.recent()] == ["outer", "inner"]  # newest first
+        assert tracer.recent()[1]["attrs"] == {"tool": "x"}
+
+    def test_explicit_context_continues_a_trace(self):
+        tracer = Tracer()
+        with tracer.span("turn", trace_id="t" * 32, parent_id="p" * 16) as span:
+            pass
+        assert (span.trace_id, span.parent_id) == ("t" * 32, "p" * 16)
+
+    def test_exception_marks_span_as_error(self):
+        tracer = Tracer()
+        with pytest.raises(ValueError):
+            with tracer.span("boom"):
+                raise ValueError("bad")
+        [span] = tracer.recent()
+        assert span["status"] == "error"
+        assert span["attrs"]["error"] == "bad"
+
+    def test_recent_filters_by_trace_and_respects_ring_size(self):
+        tracer = Tracer(ring_size=3)
+        for i in range(5):
+            tracer.record(f"s{i}", start=0.0, end=1.0, trace_id="a" if i % 2 else "b")
+        assert [s["name"] for s in tracer.recent()] == ["s4", "s3", "s2"]
+        assert [s["name"] for s in tracer.recent(trace_id="a")] == ["s3"]
+
+    @pytest.mark.asyncio
+    async def test_child_tasks_inherit_the_current_span(self):
+        tracer = Tracer()
+
+        async def child():
+            with tracer.span("child"):
+                await asyncio.sleep(0)
+
+        with tracer.span("parent") as parent:
+            await asyncio.gather(child(), child())
+        children = [s for s in tracer.recent() if s["name"] == "child"]
+        assert [s["parent_id"] for s in children] == [parent.span_id] * 2
+
+    @pytest.mark.parametrize("sink", ["jsonl", "otlp"])
+    def test_file_sinks(self, tmp_path, sink):
+        tracer = Tracer()
+        path = tmp_path / "spans.jsonl"
+        tracer.configure(sink=sink, path=path)
+        with tracer.span("op", n=3, ok=True):
+            pass
+        tracer.close()
+        [record] = [codec.loads(line) for line in path.read_bytes().splitlines()]
+        if sink == "jsonl":
+            assert record["name"] == "op" and record["attrs"] == {"n": 3, "ok": True}
+        else:
+            span = record["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+            assert span["name"] == "op"
+            assert len(span["traceId"]) == 32 and len(span["spanId"]) == 16
+            assert {"key": "n", "value": {"intValue": "3"}} in span["attributes"]
+
+    def test_unknown_sink_is_rejected(self):
+        with pytest.raises(ValueError):
+            Tracer().configure(sink="zipkin")
+
+
+class EchoProvider(LLMProvider):
+    async def chat(self, messages: list[dict[str, Any]], tools=None, model=None,
+                   max_tokens: int = 4096, temperature: float = 0.7) -> LLMResponse:
+        return LLMResponse(content="pong", usage={"prompt_tokens": 5, "completion_tokens": 1})
+
+    def get_default_model(self) -> str:
+        return "test-model"
+
+
+class RecordingChannel(BaseChannel):
+    name = "fake"
+
+    def __init__(self, bus: MessageBus):
+        super().__init__(config=None, bus=bus)
+        self.sent: list[OutboundMessage] = []
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def send(self, msg: OutboundMessage) -> None:
+        self.sent.append(msg)
+
+
+class TestTurnTrace:
+    @pytest.mark.asyncio
+    async def test_trace_follows_message_from_channel_to_send(self, tmp_path):
+        bus = MessageBus()
+        loop = AgentLoop(bus=bus, provider=EchoProvider(), workspace=tmp_path)
+        channel = RecordingChannel(bus)
+        outbox = ChannelOutbox("fake", channel)
+
+        await channel._handle_message("u", "1", "ping")
+        loop._dispatch(await bus.consume_inbound())
+        outbox.put(await asyncio.wait_for(bus.consume_outbound(), 5))
+        while not channel.sent:
+            await asyncio.sleep(0.01)
+
+        trace_id = channel.sent[0].metadata[tracing.TRACE_KEY]["trace_id"]
+        spans = {s["name"]: s for s in tracing.tracer.recent(trace_id=trace_id)}
+        assert set(spans) >= {"channel.receive", "queue.wait", "agent.turn", "llm.chat", "channel.send"}
+        root = spans["channel.receive"]["span_id"]
+        for name in ("queue.wait", "agent.turn", "channel.send"):
+            assert spans[name]["parent_id"] == root
+        assert spans["llm.chat"]["parent_id"] == spans["agent.turn"]["span_id"]
+        assert spans["llm.chat"]["attrs"]["prompt_tokens"] == 5
+        assert spans["channel.send"]["attrs"]["since_received_ms"] >= 0
@@ -122,6 +122,7 @@ class TestStatus:
         assert "uptime_seconds" in d
         assert "connections" in d
         assert isinstance(d["uptime_seconds"], float)
+        assert d["bus"]["inbound"]["interactive"]["depth"] == 0
 
     def test_status_reflects_config(self, client_no_auth):
         r = client_no_auth.get("/api/status")
@@ -142,6 +143,23 @@ class TestStatus:
         assert r.json()["auth_enabled"] is True
 
 
+# ---------------------------------------------------------------------------
+# /api/traces
+# ---------------------------------------------------------------------------
+
+class TestTraces:
+    def test_returns_spans_for_a_trace(self, client_no_auth):
+        from nanobot.utils.tracing import tracer
+        with tracer.span("web.test") as span:
+            pass
+        r = client_no_auth.get("/api/traces", params={"trace_id": span.trace_id})
+        assert r.status_code == 200
+        assert [s["name"] for s in r.json()["spans"]] == ["web.test"]
+
+    def test_requires_auth(self, client_auth):
+        assert client_auth.get("/api/traces").status_code == 401
+
+
 # ---------------------------------------------------------------------------
 # /api/config  GET + PUT
 # ---------------------------------------------------------------------------
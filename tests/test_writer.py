@@ -0,0 +1,110 @@
+"""Tests for nanobot.utils.writer — the group-commit writer."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+
+import pytest
+
+from nanobot.agent.memory import MemoryStore
+from nanobot.session.manager import SessionManager
+from nanobot.utils.writer import GroupCommitWriter
+
+
+class RecordingCommit:
+    def __init__(self):
+        self.batches: list[list] = []
+        self.threads: set[str] = set()
+
+    def __call__(self, items):
+        self.batches.append(list(items))
+        self.threads.add(threading.current_thread().name)
+
+
+class TestGroupCommitWriter:
+    def test_burst_is_committed_as_one_batch(self):
+        writer = GroupCommitWriter(commit_window=0.05)
+        commit = RecordingCommit()
+        futures = [writer.submit(commit, i) for i in range(5)]
+        for f in futures:
+            f.result(timeout=2)
+        writer.close()
+        assert commit.batches == [[0, 1, 2, 3, 4]]
+        assert commit.threads == {"nanobot-writer"}
+
+    def test_same_key_is_coalesced(self):
+        writer = GroupCommitWriter(commit_window=0.05)
+        commit = RecordingCommit()
+        first = writer.submit(commit, "old", key="k")
+        second = writer.submit(commit, "new", key="k")
+        second.result(timeout=2)
+        assert first.done()
+        writer.close()
+        assert commit.batches == [["new"]]
+
+    def test_failure_is_reported_to_futures(self):
+        def failing(items):
+            raise OSError("disk full")
+
+        writer = GroupCommitWriter(commit_window=0)
+        future = writer.submit(failing, 1)
+        with pytest.raises(OSError):
+            future.result(timeout=2)
+        writer.close()
+
+    def test_close_drains_queue(self):
+        writer = GroupCommitWriter(commit_window=10)  # would never fire on its own in time
+        commit = RecordingCommit()
+        future = writer.submit(commit, "x")
+        writer.close()
+        assert future.done()
+        assert commit.batches == [["x"]]
+        with pytest.raises(RuntimeError):
+            writer.submit(commit, "y")
+
+
+class TestBackgroundPersistence:
+    @pytest.mark.asyncio
+    async def test_session_save_is_awaitable(self, tmp_path):
+        writer = GroupCommitWriter(commit_window=0.01)
+        m = SessionManager(tmp_path, writer=writer)
+        s = m.get_or_create("w:1")
+        s.add_message("user", "hi")
+        await asyncio.wrap_future(m.save(s))
+
+        reloaded = SessionManager(tmp_path).get_or_create("w:1")
+        assert [msg["content"] for msg in reloaded.messages] == ["hi"]
+        m.close()
+
+    def test_reload_after_invalidate_sees_queued_clear(self, tmp_path):
+        m = SessionManager(tmp_path, writer=GroupCommitWriter(commit_window=0.05))
+        s = m.get_or_create("w:2")
+        s.add_message("user", "old")
+        m.save(s).result(timeout=2)
+        s.clear()
+        m.save(s)
+        m.invalidate("w:2")
+        assert m.get_or_create("w:2").messages == []
+        m.close()
+
+    @pytest.mark.parametrize("backend", ["jsonl", "sqlite"])
+    def test_close_flushes_everything(self, tmp_path, backend):
+        m = SessionManager(tmp_path, backend=backend, writer=GroupCommitWriter(commit_window=10))
+        for i in range(3):
+            s = m.get_or_create(f"w:{i}")
+            s.add_message("user", str(i))
+            m.save(s)
+        m.close()
+        assert SessionManager(tmp_path, backend=backend).count_sessions() == 3
+
+    def test_memory_reads_its_queued_writes(self, tmp_path):
+        writer = GroupCommitWriter(commit_window=10)
+        memory = MemoryStore(tmp_path, writer=writer)
+        memory.write_long_term("likes tea")
+        memory.append_history("[2026-01-01 10:00] first")
+        memory.append_history("[2026-01-01 11:00] second")
+        assert memory.read_long_term() == "likes tea"
+        writer.close()
+        assert memory.memory_file.read_text() == "likes tea"
+        assert memory.history_file.read_text().count("\n\n") == 2